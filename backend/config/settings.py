@@ -29,7 +29,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("SECRET_KEY")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = os.getenv("DEBUG")
+DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS").split(",")
 
@@ -96,6 +96,46 @@ DATABASES = {
     }
 }
 
+# How the admin dashboard computes table counts: "exact" (COUNT(*)),
+# "counter" (EntityCounter rows maintained by signals) or "approximate"
+# (counters plus planner estimates for the largest tables).
+ADMIN_COUNTS_MODE = os.getenv("ADMIN_COUNTS_MODE", "counter")
+
+# Telemetry ingest: "sync" writes each batch in its request, "buffered"
+# queues it on a per-worker buffer flushed every INGEST_FLUSH_ROWS samples
+# or INGEST_FLUSH_INTERVAL seconds. A full buffer answers 429; on shutdown
+# the buffer drains for up to INGEST_DRAIN_TIMEOUT seconds.
+INGEST_MODE = os.getenv("INGEST_MODE", "sync")
+INGEST_BUFFER_CAPACITY = int(os.getenv("INGEST_BUFFER_CAPACITY", "200000"))
+INGEST_FLUSH_ROWS = int(os.getenv("INGEST_FLUSH_ROWS", "5000"))
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "1.0"))
+INGEST_DRAIN_TIMEOUT = float(os.getenv("INGEST_DRAIN_TIMEOUT", "30"))
+
+# Evon answer cache: seconds an answer is reused (writes to the underlying
+# tables invalidate it earlier) and the CACHES alias it is stored in.
+EVON_CACHE_TTL = int(os.getenv("EVON_CACHE_TTL", "15"))
+EVON_CACHE_ALIAS = os.getenv("EVON_CACHE_ALIAS", "default")
+
+# Evon LLM text-to-SQL fallback. EVON_SQL_GENERATOR is the dotted path of
+# the generator class (users.evon_text2sql.StubSQLGenerator for offline
+# runs); generated SQL runs read-only with a statement timeout and row cap.
+EVON_TEXT2SQL_ENABLED = os.getenv("EVON_TEXT2SQL_ENABLED", "False").lower() == "true"
+EVON_SQL_GENERATOR = os.getenv(
+    "EVON_SQL_GENERATOR", "users.evon_text2sql.LangChainSQLGenerator"
+)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
+EVON_LLM_MODEL = os.getenv("EVON_LLM_MODEL", "gpt-4o-mini")
+EVON_LLM_TIMEOUT = float(os.getenv("EVON_LLM_TIMEOUT", "20"))
+EVON_SQL_STATEMENT_TIMEOUT_MS = int(os.getenv("EVON_SQL_STATEMENT_TIMEOUT_MS", "3000"))
+EVON_SQL_ROW_CAP = int(os.getenv("EVON_SQL_ROW_CAP", "200"))
+# EXPLAIN guard: generated SQL whose estimated planner cost, or rows out of
+# any join, exceeds these limits is refused before it runs.
+EVON_SQL_MAX_COST = float(os.getenv("EVON_SQL_MAX_COST", "500000"))
+EVON_SQL_MAX_JOIN_ROWS = int(os.getenv("EVON_SQL_MAX_JOIN_ROWS", "5000000"))
+# Return the generated SQL and its plan summary with text-to-SQL answers.
+# Meant for local debugging only: it shows every caller the schema.
+EVON_EXPOSE_SQL = os.getenv("EVON_EXPOSE_SQL", "False").lower() == "true"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -0,0 +1,138 @@
+"""
+Compare peak memory of buffered vs streamed admin scoped exports.
+
+Runs against a throwaway test database, never the configured one:
+
+    python manage.py shell -c "from scripts.bench_admin_export_memory import run; run()"
+
+BENCH_ROWS (default 500000) VehicleStats rows are generated for a single
+vehicle and the vehicle scope is exported with and without ``stream=1``.
+ru_maxrss is a process-wide high-water mark, so the streamed export is
+measured first; tracemalloc peaks are reported for both modes as well.
+"""
+
+import os
+import resource
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import Company, User, Vehicle, VehicleStats
+
+
+def _peak_rss_mb():
+    # Linux reports ru_maxrss in KiB.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _generate_rows(vehicle, rows):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users_vehiclestats (vehicle_id, battery_percentage, total, "
+                "battery_health, charging_time, temperature, battery_capacity, "
+                "is_charging, estimated_range, recorded_at) "
+                "SELECT %s, g %% 100, 10000 + g %% 5000, 70 + g %% 30, g %% 120, "
+                "20 + g %% 25, 60, (g %% 7 = 0), 100 + g %% 350, "
+                "now() - (g * interval '5 seconds') "
+                "FROM generate_series(1, %s) AS g",
+                [vehicle.vehicle_id, rows],
+            )
+        return
+
+    # Insert in chunks so data generation does not inflate the RSS baseline.
+    # (vehicle, recorded_at) is unique, so give every sample its own time.
+    now = timezone.now()
+    for start in range(0, rows, 5000):
+        VehicleStats.objects.bulk_create(
+            [
+                VehicleStats(
+                    vehicle=vehicle,
+                    battery_percentage=index % 100,
+                    total=10000 + index % 5000,
+                    battery_health=70 + index % 30,
+                    charging_time=index % 120,
+                    temperature=20 + index % 25,
+                    battery_capacity=60,
+                    is_charging=index % 7 == 0,
+                    estimated_range=100 + index % 350,
+                    recorded_at=now - timedelta(seconds=5 * index),
+                )
+                for index in range(start, min(start + 5000, rows))
+            ]
+        )
+
+
+def _measure(client, vehicle_id, stream):
+    params = {"include_details": "true", "scope_type": "vehicle", "scope_id": vehicle_id}
+    if stream:
+        params["stream"] = "1"
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get("/api/admin/dashboard-data/", params)
+    if stream:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    elapsed = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "bytes": size,
+        "seconds": elapsed,
+        "traced_peak_mb": traced_peak / (1024 * 1024),
+        "rss_peak_mb": _peak_rss_mb(),
+    }
+
+
+def run():
+    rows = int(os.getenv("BENCH_ROWS", "500000"))
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        company = Company.objects.create(
+            company_name="Bench Motors",
+            address="Bench",
+            contact_email="bench@example.com",
+            contact_phone="0000000000",
+            vehicle_manufactured_count=1,
+            vehicle_sold_count=1,
+        )
+        admin = User.objects.create_user(
+            "bench-admin@example.com", "Bench Admin", "bench", role=User.Role.ADMIN
+        )
+        vehicle = Vehicle.objects.create(
+            vehicle_model="Bench EV",
+            vehicle_colour="White",
+            registration_number="BN000001",
+            owner=admin,
+            company=company,
+        )
+        _generate_rows(vehicle, rows)
+
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        baseline = _peak_rss_mb()
+        print(f"{rows:,} rows in scope, baseline RSS {baseline:.1f} MB")
+        print(f"{'mode':>10} {'payload (MB)':>13} {'seconds':>8} {'traced peak (MB)':>17} {'RSS peak (MB)':>14}")
+        for label, stream in (("stream", True), ("buffered", False)):
+            result = _measure(client, vehicle.vehicle_id, stream)
+            print(
+                f"{label:>10} {result['bytes'] / (1024 * 1024):>13.1f} "
+                f"{result['seconds']:>8.2f} {result['traced_peak_mb']:>17.1f} "
+                f"{result['rss_peak_mb']:>14.1f}"
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,117 @@
+"""
+Time the battery analytics endpoint for a single vehicle with many samples.
+
+Runs against a throwaway test database, never the configured one:
+
+    python manage.py shell -c "from scripts.bench_battery_analytics import run; run()"
+
+BENCH_ROWS (default 1000000) VehicleStats rows are generated for one
+vehicle; the endpoint is called REPEATS times and the median total, load
+and compute times are reported.
+"""
+
+import os
+import statistics
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import Company, User, Vehicle, VehicleStats
+
+REPEATS = 5
+
+
+def _generate_rows(vehicle, rows):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            # A sawtooth state of charge, slowly fading health and a daily
+            # temperature swing, one sample every 30 seconds.
+            cursor.execute(
+                "INSERT INTO users_vehiclestats (vehicle_id, battery_percentage, total, "
+                "battery_health, charging_time, temperature, battery_capacity, "
+                "is_charging, estimated_range, recorded_at) "
+                "SELECT %s, abs(g %% 160 - 80) + 15, 10000 + g %% 5000, "
+                "100 - g / 50000, g %% 120, 20 + ((g / 120) %% 30) - 10, 60, "
+                "(g %% 160 >= 80), 4 * (abs(g %% 160 - 80) + 15), "
+                "now() - ((%s - g) * interval '30 seconds') "
+                "FROM generate_series(1, %s) AS g",
+                [vehicle.vehicle_id, rows, rows],
+            )
+            cursor.execute("ANALYZE users_vehiclestats")
+        return
+
+    # (vehicle, recorded_at) is unique, so give every sample its own time.
+    now = timezone.now()
+    for start in range(0, rows, 5000):
+        VehicleStats.objects.bulk_create(
+            [
+                VehicleStats(
+                    vehicle=vehicle,
+                    battery_percentage=abs(index % 160 - 80) + 15,
+                    total=10000 + index % 5000,
+                    battery_health=100 - index // 50000,
+                    charging_time=index % 120,
+                    temperature=20 + (index // 120) % 30 - 10,
+                    battery_capacity=60,
+                    is_charging=index % 160 >= 80,
+                    estimated_range=4 * (abs(index % 160 - 80) + 15),
+                    recorded_at=now - timedelta(seconds=30 * (rows - index)),
+                )
+                for index in range(start, min(start + 5000, rows))
+            ]
+        )
+
+
+def run():
+    rows = int(os.getenv("BENCH_ROWS", "1000000"))
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        company = Company.objects.create(
+            company_name="Bench Motors",
+            address="Bench",
+            contact_email="bench@example.com",
+            contact_phone="0000000000",
+            vehicle_manufactured_count=1,
+            vehicle_sold_count=1,
+        )
+        owner = User.objects.create_user("bench@example.com", "Bench", "bench")
+        vehicle = Vehicle.objects.create(
+            vehicle_model="Bench EV",
+            vehicle_colour="White",
+            registration_number="BN000001",
+            owner=owner,
+            company=company,
+        )
+        _generate_rows(vehicle, rows)
+
+        client = APIClient()
+        client.force_authenticate(owner)
+        url = f"/api/vehicles/{vehicle.vehicle_id}/battery-analytics/"
+
+        totals, loads, computes = [], [], []
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            response = client.get(url)
+            totals.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.status_code
+            payload = response.json()
+            loads.append(payload["timing"]["load_ms"])
+            computes.append(payload["timing"]["compute_ms"])
+
+        print(f"{payload['data']['analytics']['samples']:,} samples ({connection.vendor})")
+        print(f"{'total (ms)':>12} {'load (ms)':>12} {'compute (ms)':>13}")
+        print(
+            f"{statistics.median(totals):>12.1f} {statistics.median(loads):>12.1f} "
+            f"{statistics.median(computes):>13.1f}"
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,209 @@
+"""
+Time billing form assembly for a busy serviceman at growing workloads.
+
+Runs against a throwaway test database and a temporary copy of the
+pricing catalog, never the configured ones:
+
+    python manage.py shell -c "from scripts.bench_billing_form import run; run()"
+
+At full scale one serviceman has BENCH_SERVICES (default 5000) services and
+BENCH_ISSUES (default 20000) open issues spread over BENCH_SERVICES / 5
+vehicles; a tenth of the issues sit on vehicles without a service. The
+endpoint is timed at a quarter, half and full scale (REPEATS calls each,
+median reported); time per issue should stay flat as the workload grows.
+"""
+
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import (
+    BillLineItem,
+    Company,
+    Issues,
+    Service,
+    ServiceTask,
+    User,
+    Vehicle,
+)
+from users.pricing import PRICING_FILE_PATH, pricing_catalog
+
+REPEATS = 3
+SCALES = (0.25, 0.5, 1.0)
+CATEGORIES = (
+    "Battery",
+    "Motor",
+    "Software",
+    "Brake Inspection",
+    "Tyre Pressure",
+    "Wheel Alignment",
+    "AC Repair",
+    "Suspension",
+    "Charging Port",
+    "Coolant Leak",
+)
+TASKS = ("Tire Rotation", "Software Update", "Brake Inspection", "Coolant Flush")
+
+
+def _generate(label, company, admin, services, issues):
+    serviceman = User.objects.create_user(
+        f"{label}@example.com", label, "bench", role=User.Role.SERVICE
+    )
+    owner = User.objects.create_user(f"{label}-owner@example.com", label, "bench")
+    vehicles = Vehicle.objects.bulk_create(
+        [
+            Vehicle(
+                vehicle_model="Bench EV",
+                vehicle_colour="White",
+                registration_number=f"{label}-{index}",
+                owner=owner,
+                company=company,
+            )
+            for index in range(max(services // 5, 1) + max(issues // 200, 1))
+        ]
+    )
+    serviced, unserviced = (
+        vehicles[: max(services // 5, 1)],
+        vehicles[max(services // 5, 1) :],
+    )
+
+    now = timezone.now()
+    service_rows = Service.objects.bulk_create(
+        [
+            Service(
+                vehicle=serviced[index % len(serviced)],
+                serviceman=serviceman,
+                start_time=now,
+                deadline=now + timedelta(days=1),
+                assigned_by=admin,
+                assigned_to=serviceman,
+                sla_time=24,
+                sla_status="ON_TIME",
+                rating=5,
+            )
+            for index in range(services)
+        ],
+        batch_size=2000,
+    )
+    tasks = ServiceTask.objects.bulk_create(
+        [
+            ServiceTask(
+                task_name=TASKS[(index + offset) % len(TASKS)],
+                vehicle_id=service.vehicle_id,
+                serviceman=serviceman,
+            )
+            for index, service in enumerate(service_rows)
+            for offset in (0, 1)
+        ],
+        batch_size=2000,
+    )
+    Service.tasks.through.objects.bulk_create(
+        [
+            Service.tasks.through(
+                service_id=service_rows[position // 2].service_id,
+                servicetask_id=task.task_id,
+            )
+            for position, task in enumerate(tasks)
+        ],
+        batch_size=2000,
+    )
+    issue_rows = Issues.objects.bulk_create(
+        [
+            Issues(
+                vehicle=(
+                    unserviced[index % len(unserviced)]
+                    if index % 10 == 0
+                    else serviced[index % len(serviced)]
+                ),
+                category=CATEGORIES[index % len(CATEGORIES)],
+                description=f"Issue {index}",
+                assigned_to=serviceman,
+                assigned_by=admin,
+                cost=(index * 37) % 1000,
+            )
+            for index in range(issues)
+        ],
+        batch_size=2000,
+    )
+    BillLineItem.objects.bulk_create(
+        [
+            BillLineItem(
+                issue=issue,
+                qty=1,
+                rate=index % 900,
+                tax=5,
+                line_total=index % 900 + 5,
+            )
+            for index, issue in enumerate(issue_rows)
+            if index % 2
+        ],
+        batch_size=2000,
+    )
+    return serviceman
+
+
+def run():
+    services = int(os.getenv("BENCH_SERVICES", "5000"))
+    issues = int(os.getenv("BENCH_ISSUES", "20000"))
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    # The endpoint appends unknown services to the catalog.
+    catalog_dir = Path(tempfile.mkdtemp())
+    shutil.copy(PRICING_FILE_PATH, catalog_dir / PRICING_FILE_PATH.name)
+    original_catalog_path = pricing_catalog.path
+    pricing_catalog.path = catalog_dir / PRICING_FILE_PATH.name
+
+    try:
+        company = Company.objects.create(
+            company_name="Bench Motors",
+            address="Bench",
+            contact_email="bench@example.com",
+            contact_phone="0000000000",
+            vehicle_manufactured_count=1,
+            vehicle_sold_count=1,
+        )
+        admin = User.objects.create_user(
+            "bench-admin@example.com", "Bench", "bench", role=User.Role.ADMIN
+        )
+
+        print(
+            f"{'services':>9} {'issues':>8} {'records':>8} "
+            f"{'median (ms)':>12} {'us/issue':>9}"
+        )
+        for scale in SCALES:
+            scaled_services, scaled_issues = int(services * scale), int(issues * scale)
+            serviceman = _generate(
+                f"bench{int(scale * 100)}", company, admin, scaled_services, scaled_issues
+            )
+            client = APIClient()
+            client.force_authenticate(serviceman)
+
+            timings = []
+            for _ in range(REPEATS):
+                started = time.perf_counter()
+                response = client.get("/api/get-billing-form-data/")
+                timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.status_code
+            records = len(response.json()["data"]["records"])
+
+            median = statistics.median(timings)
+            print(
+                f"{scaled_services:>9,} {scaled_issues:>8,} {records:>8,} "
+                f"{median:>12.1f} {median * 1000 / scaled_issues:>9.1f}"
+            )
+    finally:
+        pricing_catalog.path = original_catalog_path
+        shutil.rmtree(catalog_dir, ignore_errors=True)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
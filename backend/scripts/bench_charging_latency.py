@@ -0,0 +1,138 @@
+"""
+Benchmark GetChargingDetails latency against the size of users_vehiclestats,
+with and without the (vehicle_id, recorded_at DESC) index.
+
+Runs against a throwaway test database, never the configured one:
+
+    python manage.py shell -c "from scripts.bench_charging_latency import run; run()"
+
+BENCH_SIZES (comma separated, default 1000000,10000000,100000000) and
+BENCH_VEHICLES (default 10000) control the generated data set. Set
+BENCH_PARTITIONED=True to convert the test table with the same code as
+``vehiclestats_partitions --convert`` and benchmark the partitioned layout.
+"""
+
+import os
+import statistics
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from users.models import Company, User, Vehicle
+from users.partitioning import (
+    INDEX_NAME,
+    add_months,
+    convert_to_partitioned,
+    create_partition,
+    is_partitioned,
+)
+
+REPEATS = 5
+
+
+def _generate_rows(start, end, first_vehicle_id, vehicle_count):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users_vehiclestats (vehicle_id, battery_percentage, total, "
+            "battery_health, charging_time, temperature, battery_capacity, "
+            "is_charging, estimated_range, recorded_at) "
+            "SELECT %s + (g %% %s), (g %% 100), 10000 + g %% 5000, 70 + g %% 30, "
+            "g %% 120, 20 + g %% 25, 60, (g %% 7 = 0), 100 + g %% 350, "
+            "now() - (g * interval '1 second') "
+            "FROM generate_series(%s, %s) AS g",
+            [first_vehicle_id, vehicle_count, start, end - 1],
+        )
+        cursor.execute("ANALYZE users_vehiclestats")
+
+
+def _time_endpoint(client, vehicle_id):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        response = client.get("/api/get-charging-details/", {"vehicle_id": vehicle_id})
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+    return statistics.median(timings)
+
+
+def run():
+    sizes = [
+        int(size)
+        for size in os.getenv("BENCH_SIZES", "1000000,10000000,100000000").split(",")
+    ]
+    vehicle_count = int(os.getenv("BENCH_VEHICLES", "10000"))
+    partitioned = os.getenv("BENCH_PARTITIONED", "False").lower() == "true"
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        if partitioned and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                convert_to_partitioned(cursor)
+
+        company = Company.objects.create(
+            company_name="Bench Motors",
+            address="Bench",
+            contact_email="bench@example.com",
+            contact_phone="0000000000",
+            vehicle_manufactured_count=vehicle_count,
+            vehicle_sold_count=vehicle_count,
+        )
+        owner = User.objects.create_user("bench@example.com", "Bench", "bench")
+        Vehicle.objects.bulk_create(
+            [
+                Vehicle(
+                    vehicle_model="Bench EV",
+                    vehicle_colour="White",
+                    registration_number=f"BN{index:06d}",
+                    owner=owner,
+                    company=company,
+                )
+                for index in range(vehicle_count)
+            ],
+            batch_size=1000,
+        )
+        first_vehicle_id = Vehicle.objects.order_by("vehicle_id").first().vehicle_id
+
+        # Pre-create monthly partitions for the whole generated time span so
+        # samples do not all land in the default partition.
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                if is_partitioned(cursor):
+                    oldest = timezone.now() - timedelta(seconds=max(sizes))
+                    month_start = oldest.date().replace(day=1)
+                    while month_start <= timezone.now().date():
+                        create_partition(cursor, month_start)
+                        month_start = add_months(month_start, 1)
+
+        client = APIClient()
+        client.force_authenticate(owner)
+
+        print(f"{'rows':>12} {'no index (ms)':>15} {'indexed (ms)':>15}")
+        generated = 0
+        for size in sorted(sizes):
+            _generate_rows(generated, size, first_vehicle_id, vehicle_count)
+            generated = size
+
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+            before = _time_endpoint(client, first_vehicle_id)
+
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE INDEX {INDEX_NAME} "
+                    "ON users_vehiclestats (vehicle_id, recorded_at DESC)"
+                )
+                cursor.execute("ANALYZE users_vehiclestats")
+            after = _time_endpoint(client, first_vehicle_id)
+
+            print(f"{size:>12,} {before:>15.1f} {after:>15.1f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
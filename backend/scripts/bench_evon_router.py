@@ -0,0 +1,71 @@
+"""
+Measure Evon intent routing throughput (prompts/sec) for the router alone,
+without touching the database:
+
+    python manage.py shell -c "from scripts.bench_evon_router import run; run()"
+
+The compiled router (one tokenizer pass plus keyword-indexed pattern
+checks) is compared with a sequential scan that runs ``re.search`` for
+every intent pattern in priority order, the way the old if-chain routed
+prompts.
+BENCH_ITERATIONS (default 20000) passes are made over the prompt corpus.
+"""
+
+import os
+import re
+import time
+
+from users.views.EvonView import FEATURES, INTENTS, route_prompt
+
+PROMPTS = (
+    "hi",
+    "who are you?",
+    "Tell me about user with id 42",
+    "vehicle number 7",
+    "How many active users are there?",
+    "how many inactive users",
+    "How many unsold vehicles do we have",
+    "total vehicles",
+    "pending services this week",
+    "How many unresolved issues are there?",
+    "overdue bills",
+    "how many trips were taken",
+    "notifications today",
+    "What is the average battery health?",
+    "vehicles owned by Jane Doe",
+    "issues for vehicle id 12",
+    "Please summarise the fleet's charging behaviour over the last quarter",
+    "x" * 200,
+)
+
+
+def _sequential_route(prompt):
+    text = prompt.lower()
+    features = {name for name, _, pattern in FEATURES if re.search(pattern, text)}
+    for intent, _, pattern, _, condition in INTENTS:
+        if re.search(pattern, text) and (condition is None or condition(features)):
+            return intent
+    return None
+
+
+def _compiled_route(prompt):
+    routed = route_prompt(prompt)
+    return routed[0] if routed else None
+
+
+def _throughput(route, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for prompt in PROMPTS:
+            route(prompt)
+    elapsed = time.perf_counter() - started
+    return iterations * len(PROMPTS) / elapsed
+
+
+def run():
+    iterations = int(os.getenv("BENCH_ITERATIONS", "20000"))
+
+    print(f"{len(INTENTS)} intents, {len(PROMPTS)} prompts x {iterations:,} passes")
+    print(f"{'router':>12} {'prompts/sec':>14}")
+    for label, route in (("sequential", _sequential_route), ("compiled", _compiled_route)):
+        print(f"{label:>12} {_throughput(route, iterations):>14,.0f}")
@@ -0,0 +1,170 @@
+"""
+Measure Evon SQL validation throughput (validations/sec) on a corpus of
+LLM-style generated queries, without touching the database:
+
+    python manage.py shell -c "from scripts.bench_evon_sql_validation import run; run()"
+
+Three validators are compared: the old regex screen (keywords plus
+FROM/JOIN table names), the sqlparse walk with its verdict cache cleared
+before every call, and the sqlparse walk with the cache warm, which is
+what repeated generated queries hit.
+BENCH_ITERATIONS (default 500) passes are made over the corpus.
+"""
+
+import os
+import re
+import time
+
+from users import evon_text2sql
+from users.evon_text2sql import ALLOWED_TABLES, validate_sql
+
+# (sql, expected to be safe)
+CORPUS = (
+    ("SELECT COUNT(*) AS vehicles FROM users_vehicle", True),
+    ("SELECT user_id, name, email FROM users_user WHERE is_active = true LIMIT 25", True),
+    (
+        "SELECT v.vehicle_model, AVG(s.battery_health) AS avg_health "
+        "FROM users_vehicle v JOIN users_vehiclestats s ON s.vehicle_id = v.vehicle_id "
+        "GROUP BY v.vehicle_model ORDER BY avg_health DESC LIMIT 25",
+        True,
+    ),
+    (
+        'SELECT "u"."name", COUNT("b"."bill_id") FROM "users_user" "u" '
+        'LEFT OUTER JOIN "users_bill" "b" ON "b"."user_id" = "u"."user_id" '
+        'GROUP BY "u"."name"',
+        True,
+    ),
+    (
+        "WITH monthly AS (SELECT vehicle_id, date_trunc('month', start_date) AS month, "
+        "SUM(distance) AS km FROM users_trip GROUP BY 1, 2) "
+        "SELECT v.registration_number, m.month, m.km FROM monthly m "
+        "JOIN users_vehicle v ON v.vehicle_id = m.vehicle_id ORDER BY m.km DESC LIMIT 25",
+        True,
+    ),
+    (
+        "SELECT name FROM users_user WHERE user_id IN "
+        "(SELECT owner_id FROM users_vehicle WHERE vehicle_id IN "
+        "(SELECT vehicle_id FROM users_issues WHERE is_resolved = false))",
+        True,
+    ),
+    (
+        "SELECT EXTRACT(YEAR FROM start_date) AS year, COUNT(*) FROM users_trip "
+        "GROUP BY EXTRACT(YEAR FROM start_date)",
+        True,
+    ),
+    (
+        "SELECT t.vehicle_id, t.total FROM (SELECT vehicle_id, SUM(cost) AS total "
+        "FROM users_issues GROUP BY vehicle_id) AS t WHERE t.total > 1000",
+        True,
+    ),
+    ("SELECT name FROM users_company c, users_vehicle v WHERE v.company_id = c.company_id", True),
+    ("SELECT * FROM users_notification WHERE message LIKE '%; drop%' LIMIT 25", True),
+    ("SELECT * FROM users_user; DROP TABLE users_user", False),
+    ("DELETE FROM users_bill WHERE payment_status = 'PAID'", False),
+    ("WITH gone AS (SELECT 1) DELETE FROM users_user", False),
+    ("SELECT * INTO backup_users FROM users_user", False),
+    ("SELECT * FROM auth_permission", False),
+    ("SELECT u.password FROM users_user u JOIN django_session s ON true", False),
+    ("SELECT * FROM (SELECT * FROM pg_catalog.pg_shadow) AS p", False),
+    ('SELECT * FROM "django_admin_log"', False),
+    ("SELECT 1 FROM users_trip WHERE trip_id IN (SELECT id FROM secrets)", False),
+    (
+        "SELECT d::date, COUNT(t.trip_id) FROM generate_series(now() - interval '7 days', "
+        "now(), interval '1 day') AS d LEFT JOIN users_trip t "
+        "ON t.start_date::date = d::date GROUP BY 1",
+        True,
+    ),
+    ("SELECT * FROM pg_ls_dir('.')", False),
+    ("SELECT * FROM pg_read_file('/etc/passwd')", False),
+    ("SELECT * FROM dblink('host=x','select 1') AS t(a int)", False),
+    ("SELECT * FROM ROWS FROM (pg_ls_dir('.'))", False),
+    ("SELECT * FROM users_trip t CROSS JOIN LATERAL pg_ls_dir('.') AS d", False),
+    ("SELECT * FROM users_user u JOIN users_trip t ON true, pg_authid p", False),
+    (
+        "SELECT * FROM users_user u JOIN users_trip t USING (vehicle_id), pg_authid p",
+        False,
+    ),
+    ("SELECT * FROM ONLY pg_authid", False),
+    ("SELECT * FROM users_user TABLESAMPLE SYSTEM (1), pg_authid", False),
+    (
+        "SELECT * FROM (WITH pg_authid AS (SELECT 1) SELECT * FROM pg_authid) a, "
+        "pg_authid",
+        False,
+    ),
+    ("WITH pg_authid AS (SELECT * FROM pg_authid) SELECT * FROM pg_authid", False),
+    ("SELECT * FROM users_user WITH ORDINALITY, pg_authid", False),
+    ("SELECT * FROM (users_trip t JOIN pg_authid a ON true)", False),
+    (
+        "WITH RECURSIVE r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r WHERE n < 5) "
+        "SELECT * FROM r",
+        True,
+    ),
+    (
+        "SELECT * FROM users_trip t LEFT JOIN LATERAL (SELECT * FROM users_vehicle v "
+        "WHERE v.vehicle_id = t.vehicle_id LIMIT 1) v ON true",
+        True,
+    ),
+)
+
+FORBIDDEN_KEYWORDS = {
+    "insert",
+    "update",
+    "delete",
+    "drop",
+    "alter",
+    "truncate",
+    "grant",
+    "revoke",
+    "create",
+}
+
+
+def _regex_is_safe(sql):
+    cleaned = sql.strip().lower()
+    if ";" in cleaned:
+        return False
+    if not (cleaned.startswith("select") or cleaned.startswith("with")):
+        return False
+    if any(f" {kw} " in f" {cleaned} " for kw in FORBIDDEN_KEYWORDS):
+        return False
+    referenced_tables = re.findall(r"(?:from|join)\s+([a-zA-Z0-9_\.\"]+)", cleaned)
+    normalized_tables = {
+        table.replace('"', "").split(".")[-1] for table in referenced_tables
+    }
+    return not normalized_tables or normalized_tables.issubset(ALLOWED_TABLES)
+
+
+def _sqlparse_cold(sql):
+    evon_text2sql.clear_validation_cache()
+    return validate_sql(sql)[0]
+
+
+def _sqlparse_cached(sql):
+    return validate_sql(sql)[0]
+
+
+def _throughput(validate, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for sql, _ in CORPUS:
+            validate(sql)
+    elapsed = time.perf_counter() - started
+    return iterations * len(CORPUS) / elapsed
+
+
+def run():
+    iterations = int(os.getenv("BENCH_ITERATIONS", "500"))
+    validators = (
+        ("regex", _regex_is_safe),
+        ("sqlparse", _sqlparse_cold),
+        ("cached", _sqlparse_cached),
+    )
+
+    print(f"{len(CORPUS)} queries x {iterations:,} passes")
+    print(f"{'validator':>10} {'correct':>8} {'validations/sec':>16}")
+    for label, validate in validators:
+        correct = sum(validate(sql) == expected for sql, expected in CORPUS)
+        print(
+            f"{label:>10} {correct:>4}/{len(CORPUS):<3} "
+            f"{_throughput(validate, iterations):>16,.0f}"
+        )
@@ -0,0 +1,148 @@
+"""
+Compare synchronous and buffered telemetry ingest under many small batches.
+
+Runs against a throwaway test database, never the configured one:
+
+    python manage.py shell -c "from scripts.bench_ingest_buffer import run; run()"
+
+BENCH_REQUESTS (default 2000) batches of BENCH_BATCH (default 20) samples
+spread over BENCH_VEHICLES (default 100) vehicles are posted once per
+INGEST_MODE. Request latency (median and p99) and accepted samples/sec
+are reported; for the buffered mode the time to drain the buffer
+afterwards is included in the throughput.
+"""
+
+import json
+import os
+import statistics
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.ingest_buffer import ingest_buffer
+from users.models import Company, User, Vehicle, VehicleStats
+
+
+def _bodies(vehicle_ids, requests, batch, start):
+    bodies = []
+    for request in range(requests):
+        lines = []
+        for index in range(batch):
+            sample = request * batch + index
+            lines.append(
+                json.dumps(
+                    {
+                        "vehicle_id": vehicle_ids[sample % len(vehicle_ids)],
+                        "battery_percentage": sample % 100,
+                        "total": 1,
+                        "battery_health": 90,
+                        "charging_time": 1,
+                        "temperature": 30,
+                        "battery_capacity": 60,
+                        "estimated_range": 200,
+                        "recorded_at": (start + timedelta(milliseconds=sample)).isoformat(),
+                    }
+                )
+            )
+        bodies.append("\n".join(lines))
+    return bodies
+
+
+def _wait_for_drain(timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        metrics = ingest_buffer().metrics()
+        if metrics["depth"] == 0 and metrics["in_flight"] == 0:
+            return
+        time.sleep(0.01)
+    raise RuntimeError("ingest buffer did not drain")
+
+
+def run():
+    requests = int(os.getenv("BENCH_REQUESTS", "2000"))
+    batch = int(os.getenv("BENCH_BATCH", "20"))
+    vehicles = int(os.getenv("BENCH_VEHICLES", "100"))
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        company = Company.objects.create(
+            company_name="Bench Motors",
+            address="Bench",
+            contact_email="bench@example.com",
+            contact_phone="0000000000",
+            vehicle_manufactured_count=1,
+            vehicle_sold_count=1,
+        )
+        admin = User.objects.create_user(
+            "bench-admin@example.com", "Bench", "bench", role=User.Role.ADMIN
+        )
+        vehicle_ids = [
+            vehicle.vehicle_id
+            for vehicle in Vehicle.objects.bulk_create(
+                [
+                    Vehicle(
+                        vehicle_model="Bench EV",
+                        vehicle_colour="White",
+                        registration_number=f"BENCH-{index}",
+                        owner=admin,
+                        company=company,
+                    )
+                    for index in range(vehicles)
+                ]
+            )
+        ]
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        print(
+            f"{'mode':>9} {'samples':>9} {'median (ms)':>12} {'p99 (ms)':>9} "
+            f"{'samples/s':>10} {'flushes':>8}"
+        )
+        start = timezone.now() - timedelta(days=1)
+        for offset, mode in enumerate(("sync", "buffered")):
+            bodies = _bodies(
+                vehicle_ids, requests, batch, start + timedelta(hours=offset)
+            )
+            before = VehicleStats.objects.count()
+            timings = []
+            with override_settings(
+                INGEST_MODE=mode, INGEST_BUFFER_CAPACITY=requests * batch
+            ):
+                started = time.perf_counter()
+                for body in bodies:
+                    request_started = time.perf_counter()
+                    response = client.post(
+                        "/api/ingest/vehicle-stats/",
+                        body,
+                        content_type="application/x-ndjson",
+                    )
+                    timings.append((time.perf_counter() - request_started) * 1000)
+                    assert response.status_code in (200, 202), response.status_code
+                if mode == "buffered":
+                    _wait_for_drain()
+                elapsed = time.perf_counter() - started
+
+            written = VehicleStats.objects.count() - before
+            assert written == requests * batch, written
+            timings.sort()
+            print(
+                f"{mode:>9} {written:>9,} {statistics.median(timings):>12.2f} "
+                f"{timings[int(len(timings) * 0.99) - 1]:>9.2f} "
+                f"{written / elapsed:>10,.0f} "
+                f"{ingest_buffer().metrics()['flushes'] if mode == 'buffered' else '-':>8}"
+            )
+    finally:
+        ingest_buffer().close()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
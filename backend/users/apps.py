@@ -3,3 +3,16 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     name = 'users'
+
+    def ready(self):
+        from .signals import (
+            connect_battery_stats_signals,
+            connect_counter_signals,
+            connect_current_state_signals,
+            connect_evon_cache_signals,
+        )
+
+        connect_counter_signals()
+        connect_evon_cache_signals()
+        connect_battery_stats_signals()
+        connect_current_state_signals()
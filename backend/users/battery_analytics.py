@@ -0,0 +1,306 @@
+"""
+Server-side battery analytics over a vehicle's VehicleStats time series.
+
+Samples are loaded column-wise into NumPy arrays (through ``COPY ... TO
+STDOUT`` on PostgreSQL) and every metric is computed with vectorized
+operations, so a vehicle with a million samples is analysed without a
+Python-level loop over rows.
+"""
+
+import io
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.db import connection
+
+from .models import VehicleStats
+
+SECONDS_PER_DAY = 86400.0
+
+# Gaps between samples longer than this are treated as the vehicle being
+# offline and do not count towards temperature exposure.
+MAX_EXPOSURE_GAP_SECONDS = 3600.0
+
+DOD_BIN_EDGES = np.arange(0, 101, 10)
+
+# Upper bounds (exclusive) of every band but the last, in degrees Celsius.
+TEMPERATURE_BAND_EDGES = np.array([0, 15, 25, 35, 45])
+TEMPERATURE_BAND_LABELS = ("below_0", "0_15", "15_25", "25_35", "35_45", "45_plus")
+
+SAMPLE_COLUMNS = (
+    "recorded_at",
+    "battery_percentage",
+    "battery_health",
+    "temperature",
+    "is_charging",
+    "estimated_range",
+)
+
+
+# Row layout of ``COPY ... TO STDOUT WITH (FORMAT binary)`` for the
+# analytics select: a field count followed by a length-prefixed big-endian
+# value per column. Every column is NOT NULL and fixed width, so the whole
+# stream decodes with a single ``np.frombuffer``.
+BINARY_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+BINARY_COPY_ROW = np.dtype(
+    [("field_count", ">i2")]
+    + [
+        field
+        for column, value_type in zip(
+            SAMPLE_COLUMNS, (">f8", ">i4", ">i4", ">i4", ">i4", ">i4")
+        )
+        for field in ((f"{column}_length", ">i4"), (column, value_type))
+    ]
+)
+
+
+def _empty_samples():
+    return {column: np.empty(0) for column in SAMPLE_COLUMNS}
+
+
+def _decode_binary_copy(data):
+    if not data.startswith(BINARY_COPY_SIGNATURE):
+        raise ValueError("Unexpected COPY binary signature.")
+    extension_length = int.from_bytes(data[15:19], "big")
+    body = memoryview(data)[19 + extension_length : -2]
+    if not len(body):
+        return None
+
+    rows = np.frombuffer(body, dtype=BINARY_COPY_ROW)
+    if np.any(rows["field_count"] != len(SAMPLE_COLUMNS)):
+        raise ValueError("Unexpected COPY binary row layout.")
+    return np.column_stack([rows[column].astype(np.float64) for column in SAMPLE_COLUMNS])
+
+
+def _copy_samples(vehicle_id, since, until):
+    quote = connection.ops.quote_name
+    clauses = ["vehicle_id = %s"]
+    params = [vehicle_id]
+    if since is not None:
+        clauses.append("recorded_at >= %s")
+        params.append(since)
+    if until is not None:
+        clauses.append("recorded_at < %s")
+        params.append(until)
+
+    select = (
+        "SELECT EXTRACT(EPOCH FROM recorded_at)::float8, battery_percentage, "
+        "battery_health, temperature, is_charging::int4, estimated_range "
+        "FROM {} WHERE {} ORDER BY recorded_at, stats_id".format(
+            quote(VehicleStats._meta.db_table), " AND ".join(clauses)
+        )
+    )
+
+    buffer = io.BytesIO()
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor
+        query = raw_cursor.mogrify(select, params).decode("utf-8")
+        raw_cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT binary)", buffer)
+
+    return _decode_binary_copy(buffer.getvalue())
+
+
+def _query_samples(vehicle_id, since, until):
+    queryset = VehicleStats.objects.filter(vehicle_id=vehicle_id)
+    if since is not None:
+        queryset = queryset.filter(recorded_at__gte=since)
+    if until is not None:
+        queryset = queryset.filter(recorded_at__lt=until)
+
+    rows = list(
+        queryset.order_by("recorded_at", "stats_id").values_list(*SAMPLE_COLUMNS)
+    )
+    if not rows:
+        return None
+
+    columns = list(zip(*rows))
+    timestamps = np.fromiter(
+        (value.timestamp() for value in columns[0]), dtype=np.float64, count=len(rows)
+    )
+    values = np.array(columns[1:], dtype=np.float64)
+    return np.column_stack((timestamps, values.T))
+
+
+def load_vehicle_samples(vehicle_id, since=None, until=None):
+    """
+    Load a vehicle's samples in ``recorded_at`` order as
+    ``{column: ndarray}``; ``recorded_at`` is in epoch seconds.
+    """
+    matrix = None
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            copy_supported = hasattr(cursor.cursor, "copy_expert")
+        if copy_supported:
+            matrix = _copy_samples(vehicle_id, since, until)
+        else:
+            matrix = _query_samples(vehicle_id, since, until)
+    else:
+        matrix = _query_samples(vehicle_id, since, until)
+
+    if matrix is None:
+        return _empty_samples()
+
+    samples = {column: matrix[:, index] for index, column in enumerate(SAMPLE_COLUMNS)}
+    samples["is_charging"] = samples["is_charging"].astype(bool)
+    return samples
+
+
+def _round(value, digits=4):
+    return None if value is None else round(float(value), digits)
+
+
+def _linear_fit(x, y):
+    """Least-squares line through ``(x, y)``; None when it is undefined."""
+    if x.size < 2:
+        return None
+    dx = x - x.mean()
+    dy = y - y.mean()
+    sxx = dx @ dx
+    if sxx == 0:
+        return None
+    sxy = dx @ dy
+    syy = dy @ dy
+    slope = sxy / sxx
+    return {
+        "slope": slope,
+        "intercept": y.mean() - slope * x.mean(),
+        "r_squared": (sxy * sxy) / (sxx * syy) if syy else 1.0,
+    }
+
+
+def state_of_health(days, health):
+    fit = _linear_fit(days, health)
+    result = {
+        "initial": _round(health[0]),
+        "current": _round(health[-1]),
+        "slope_per_day": None,
+        "slope_per_year": None,
+        "r_squared": None,
+    }
+    if fit:
+        result.update(
+            slope_per_day=_round(fit["slope"], 6),
+            slope_per_year=_round(fit["slope"] * 365.25),
+            r_squared=_round(fit["r_squared"]),
+        )
+    return result
+
+
+def discharge_depths(soc):
+    """
+    Depth of every discharge swing, measured between consecutive local
+    maxima and minima of the state-of-charge curve (plateaus collapsed).
+    """
+    moving = soc[np.r_[True, np.diff(soc) != 0]]
+    if moving.size < 2:
+        return np.empty(0)
+
+    direction = np.sign(np.diff(moving))
+    turns = np.flatnonzero(direction[1:] != direction[:-1]) + 1
+    extrema = moving[np.r_[0, turns, moving.size - 1]]
+    swings = extrema[:-1] - extrema[1:]
+    return swings[swings > 0]
+
+
+def charge_cycles(soc, charging):
+    steps = np.diff(soc)
+    charged = steps[steps > 0].sum()
+    discharged = -steps[steps < 0].sum()
+    sessions = int(np.count_nonzero(charging[1:] & ~charging[:-1]) + charging[0])
+    return {
+        "charged_percent": _round(charged, 2),
+        "discharged_percent": _round(discharged, 2),
+        # One full cycle is 100% discharged plus 100% charged.
+        "equivalent_full_cycles": _round((charged + discharged) / 200.0),
+        "charge_sessions": sessions,
+    }
+
+
+def depth_of_discharge(soc):
+    depths = discharge_depths(soc)
+    counts, _ = np.histogram(np.clip(depths, 0, 100), bins=DOD_BIN_EDGES)
+    return {
+        "discharge_events": int(depths.size),
+        "mean_depth": _round(depths.mean(), 2) if depths.size else None,
+        "max_depth": _round(depths.max(), 2) if depths.size else None,
+        "histogram": [
+            {"range": f"{int(low)}-{int(high)}", "count": int(count)}
+            for low, high, count in zip(DOD_BIN_EDGES[:-1], DOD_BIN_EDGES[1:], counts)
+        ],
+    }
+
+
+def temperature_exposure(timestamps, temperature):
+    # Each sample covers the interval until the next one.
+    durations = np.clip(np.diff(timestamps), 0, MAX_EXPOSURE_GAP_SECONDS)
+    durations = np.r_[durations, 0.0]
+    bands = np.searchsorted(TEMPERATURE_BAND_EDGES, temperature, side="right")
+
+    seconds = np.bincount(bands, weights=durations, minlength=len(TEMPERATURE_BAND_LABELS))
+    samples = np.bincount(bands, minlength=len(TEMPERATURE_BAND_LABELS))
+    total_seconds = seconds.sum()
+
+    lows = (None,) + tuple(int(edge) for edge in TEMPERATURE_BAND_EDGES)
+    highs = tuple(int(edge) for edge in TEMPERATURE_BAND_EDGES) + (None,)
+    return {
+        "min": _round(temperature.min(), 2),
+        "max": _round(temperature.max(), 2),
+        "mean": _round(temperature.mean(), 2),
+        "bands": [
+            {
+                "band": label,
+                "min": low,
+                "max": high,
+                "hours": _round(band_seconds / 3600.0, 2),
+                "share": _round(band_seconds / total_seconds) if total_seconds else None,
+                "samples": int(band_samples),
+            }
+            for label, low, high, band_seconds, band_samples in zip(
+                TEMPERATURE_BAND_LABELS, lows, highs, seconds, samples
+            )
+        ],
+    }
+
+
+def range_vs_soc(soc, estimated_range):
+    fit = _linear_fit(soc, estimated_range)
+    if not fit:
+        return {
+            "km_per_percent": None,
+            "intercept_km": None,
+            "predicted_full_range_km": None,
+            "r_squared": None,
+        }
+    return {
+        "km_per_percent": _round(fit["slope"]),
+        "intercept_km": _round(fit["intercept"], 2),
+        "predicted_full_range_km": _round(fit["slope"] * 100 + fit["intercept"], 2),
+        "r_squared": _round(fit["r_squared"]),
+    }
+
+
+def _isoformat(epoch_seconds):
+    return datetime.fromtimestamp(float(epoch_seconds), tz=dt_timezone.utc).isoformat()
+
+
+def compute_battery_analytics(samples):
+    """Compute every battery metric from arrays produced by ``load_vehicle_samples``."""
+    timestamps = samples["recorded_at"]
+    if not timestamps.size:
+        return {"samples": 0}
+
+    soc = samples["battery_percentage"]
+    days = (timestamps - timestamps[0]) / SECONDS_PER_DAY
+    return {
+        "samples": int(timestamps.size),
+        "period": {
+            "from": _isoformat(timestamps[0]),
+            "to": _isoformat(timestamps[-1]),
+            "days": _round(days[-1], 2),
+        },
+        "state_of_health": state_of_health(days, samples["battery_health"]),
+        "cycles": charge_cycles(soc, samples["is_charging"]),
+        "depth_of_discharge": depth_of_discharge(soc),
+        "temperature_exposure": temperature_exposure(timestamps, samples["temperature"]),
+        "range_vs_soc": range_vs_soc(soc, samples["estimated_range"]),
+    }
@@ -0,0 +1,269 @@
+"""
+Running per-vehicle battery statistics and the fleet figures derived
+from them.
+
+``VehicleBatteryStats`` keeps, per vehicle, the sample count and for each
+of ``TRACKED_METRICS`` the mean, the sum of squared deviations from it
+(``m2``), the minimum and the maximum. Telemetry writes fold the rows
+they actually inserted in with ``fold_samples``: Welford's update builds
+each vehicle's statistics for the batch in one pass, and a single
+``INSERT ... ON CONFLICT DO UPDATE`` merges them into the stored ones
+with the pairwise (Chan et al.) combination, so the database row lock
+serialises concurrent batches. Single ORM saves go through a
+``post_save`` signal.
+
+Fleet figures combine the per-vehicle rows with the same formula in two
+aggregates over ``VehicleBatteryStats``, so reads cost O(vehicles)
+rather than a scan of ``users_vehiclestats``. Deleted samples are not
+subtracted (a minimum cannot be un-merged); ``rebuild_battery_stats``
+recomputes the rows from the raw table.
+"""
+
+import math
+
+from django.db import connection, transaction
+from django.db.models import (
+    Avg,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Max,
+    Min,
+    Sum,
+    Value,
+    Variance,
+)
+from django.utils import timezone
+
+from .models import VehicleBatteryStats, VehicleStats
+
+TRACKED_METRICS = ("battery_health", "temperature", "battery_percentage")
+UPSERT_BATCH_SIZE = 1000
+
+
+def running_stats(rows):
+    """
+    Welford's single-pass statistics of ``(vehicle_id, *TRACKED_METRICS)``
+    rows per vehicle: ``{vehicle_id: [count, [[mean, m2, min, max], ...]]}``
+    with one inner list per metric.
+    """
+    stats = {}
+    for vehicle_id, *values in rows:
+        entry = stats.get(vehicle_id)
+        if entry is None:
+            entry = stats[vehicle_id] = [
+                0,
+                [[0.0, 0.0, value, value] for value in values],
+            ]
+        entry[0] += 1
+        count = entry[0]
+        for running, value in zip(entry[1], values):
+            delta = value - running[0]
+            running[0] += delta / count
+            running[1] += delta * (value - running[0])
+            if value < running[2]:
+                running[2] = value
+            elif value > running[3]:
+                running[3] = value
+    return stats
+
+
+def _stat_fields():
+    return [
+        f"{metric}_{stat}"
+        for metric in TRACKED_METRICS
+        for stat in ("mean", "m2", "min", "max")
+    ]
+
+
+def _merge_assignments(table):
+    quote = connection.ops.quote_name
+    old_count = f"{table}.{quote('samples')}"
+    new_count = f"EXCLUDED.{quote('samples')}"
+    total = f"({old_count} + {new_count})"
+
+    assignments = [f"{quote('samples')} = {old_count} + {new_count}"]
+    for metric in TRACKED_METRICS:
+        mean, m2, low, high = (
+            quote(f"{metric}_{stat}") for stat in ("mean", "m2", "min", "max")
+        )
+        delta = f"(EXCLUDED.{mean} - {table}.{mean})"
+        assignments += [
+            f"{mean} = {table}.{mean} + {delta} * {new_count} / {total}",
+            f"{m2} = {table}.{m2} + EXCLUDED.{m2} + "
+            f"{delta} * {delta} * {old_count} * {new_count} / {total}",
+            f"{low} = CASE WHEN {table}.{low} IS NULL "
+            f"OR EXCLUDED.{low} < {table}.{low} "
+            f"THEN EXCLUDED.{low} ELSE {table}.{low} END",
+            f"{high} = CASE WHEN {table}.{high} IS NULL "
+            f"OR EXCLUDED.{high} > {table}.{high} "
+            f"THEN EXCLUDED.{high} ELSE {table}.{high} END",
+        ]
+    assignments.append(f"{quote('updated_at')} = EXCLUDED.{quote('updated_at')}")
+    return ", ".join(assignments)
+
+
+def fold_samples(rows):
+    """
+    Merge ``(vehicle_id, *TRACKED_METRICS)`` rows of newly stored samples
+    into ``VehicleBatteryStats``.
+    """
+    stats = running_stats(rows)
+    if not stats:
+        return
+
+    opts = VehicleBatteryStats._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    fields = ["vehicle", "samples", *_stat_fields(), "updated_at"]
+    columns = ", ".join(quote(opts.get_field(name).column) for name in fields)
+    row = "({})".format(", ".join(["%s"] * len(fields)))
+    assignments = _merge_assignments(table)
+    updated_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    batch_size = max(
+        1, min(UPSERT_BATCH_SIZE, connection.ops.bulk_batch_size(fields, stats))
+    )
+
+    # Vehicle order keeps concurrent batches from deadlocking on the rows.
+    vehicle_ids = sorted(stats)
+    with connection.cursor() as cursor:
+        for start in range(0, len(vehicle_ids), batch_size):
+            batch = vehicle_ids[start : start + batch_size]
+            params = []
+            for vehicle_id in batch:
+                count, metrics = stats[vehicle_id]
+                params.extend([vehicle_id, count])
+                for running in metrics:
+                    params.extend(running)
+                params.append(updated_at)
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) "
+                f"VALUES {', '.join([row] * len(batch))} "
+                f"ON CONFLICT ({quote('vehicle_id')}) DO UPDATE SET {assignments}",
+                params,
+            )
+
+
+def rebuild_battery_stats():
+    """
+    Replace every vehicle's row with one recomputed from ``VehicleStats``.
+    Returns the number of vehicles with samples.
+
+    Samples ingested while this runs may be counted twice or not at all;
+    run it while ingest is quiet.
+    """
+    aggregates = {"samples": Count("stats_id")}
+    for metric in TRACKED_METRICS:
+        aggregates[f"{metric}_mean"] = Avg(metric)
+        aggregates[f"{metric}_var"] = Variance(metric)
+        aggregates[f"{metric}_min"] = Min(metric)
+        aggregates[f"{metric}_max"] = Max(metric)
+
+    rows = []
+    for values in (
+        VehicleStats.objects.values("vehicle_id")
+        .annotate(**aggregates)
+        .order_by("vehicle_id")
+        .iterator()
+    ):
+        for metric in TRACKED_METRICS:
+            values[f"{metric}_m2"] = float(values.pop(f"{metric}_var")) * values["samples"]
+        rows.append(VehicleBatteryStats(**values))
+
+    with transaction.atomic():
+        VehicleBatteryStats.objects.all().delete()
+        VehicleBatteryStats.objects.bulk_create(rows, batch_size=UPSERT_BATCH_SIZE)
+    return len(rows)
+
+
+def _summary(count, mean, m2, low, high):
+    if not count:
+        return {"mean": None, "variance": None, "stddev": None, "min": None, "max": None}
+    # Population variance; rounding noise can leave m2 a hair below zero.
+    variance = max(m2, 0.0) / count
+    return {
+        "mean": round(mean, 2),
+        "variance": round(variance, 2),
+        "stddev": round(math.sqrt(variance), 2),
+        "min": low,
+        "max": high,
+    }
+
+
+def vehicle_battery_stats(vehicle_ids=None):
+    """Per-vehicle summaries, optionally restricted to ``vehicle_ids``."""
+    queryset = VehicleBatteryStats.objects.order_by("vehicle_id")
+    if vehicle_ids is not None:
+        queryset = queryset.filter(vehicle_id__in=vehicle_ids)
+
+    return [
+        {
+            "vehicle_id": row["vehicle_id"],
+            "samples": row["samples"],
+            **{
+                metric: _summary(
+                    row["samples"],
+                    *(row[f"{metric}_{stat}"] for stat in ("mean", "m2", "min", "max")),
+                )
+                for metric in TRACKED_METRICS
+            },
+            "updated_at": row["updated_at"],
+        }
+        for row in queryset.values("vehicle_id", "samples", *_stat_fields(), "updated_at")
+    ]
+
+
+def fleet_battery_stats(vehicle_ids=None):
+    """
+    Summaries over all samples of all vehicles (or of ``vehicle_ids``),
+    combined from the per-vehicle rows.
+    """
+    queryset = VehicleBatteryStats.objects.filter(samples__gt=0)
+    if vehicle_ids is not None:
+        queryset = queryset.filter(vehicle_id__in=vehicle_ids)
+
+    totals = {"total_samples": Sum("samples"), "vehicle_count": Count("vehicle_id")}
+    for metric in TRACKED_METRICS:
+        totals[f"{metric}_weighted"] = Sum(
+            ExpressionWrapper(
+                F("samples") * F(f"{metric}_mean"), output_field=FloatField()
+            )
+        )
+        totals[f"{metric}_m2_sum"] = Sum(f"{metric}_m2")
+        totals[f"{metric}_low"] = Min(f"{metric}_min")
+        totals[f"{metric}_high"] = Max(f"{metric}_max")
+    totals = queryset.aggregate(**totals)
+
+    count = totals["total_samples"] or 0
+    result = {"vehicles": totals["vehicle_count"], "samples": count}
+    if not count:
+        result.update(
+            {metric: _summary(0, None, None, None, None) for metric in TRACKED_METRICS}
+        )
+        return result
+
+    means = {metric: totals[f"{metric}_weighted"] / count for metric in TRACKED_METRICS}
+    # The fleet m2 adds the spread of vehicle means around the fleet mean.
+    spread = queryset.aggregate(
+        **{
+            metric: Sum(
+                ExpressionWrapper(
+                    F("samples")
+                    * (F(f"{metric}_mean") - Value(means[metric]))
+                    * (F(f"{metric}_mean") - Value(means[metric])),
+                    output_field=FloatField(),
+                )
+            )
+            for metric in TRACKED_METRICS
+        }
+    )
+    for metric in TRACKED_METRICS:
+        result[metric] = _summary(
+            count,
+            means[metric],
+            totals[f"{metric}_m2_sum"] + spread[metric],
+            totals[f"{metric}_low"],
+            totals[f"{metric}_high"],
+        )
+    return result
@@ -0,0 +1,117 @@
+"""
+Move pending bills past their due date to ``OVERDUE``.
+
+``sweep_overdue_bills`` flips every matching bill with one ``UPDATE``
+(``RETURNING`` the touched rows where the database supports it), then
+creates one ``Notification`` per bill for its customer with
+``bulk_create``, all in one transaction. Neither write fires signals, so
+the admin counter and the Evon answer cache are updated here.
+"""
+
+import logging
+import time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .counters import adjust_counter
+from .evon_cache import invalidate_on_commit
+from .models import Bill, Notification
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_BATCH_SIZE = 1000
+
+
+def _overdue_filter(now):
+    return {"payment_status": Bill.PaymentStatus.PENDING, "due_date__lt": now}
+
+
+def _mark_overdue(now):
+    """Flip the bills and return ``(bill_id, customer_id, vehicle_id, total_amount)`` rows."""
+    if connection.features.can_return_columns_from_insert:
+        opts = Bill._meta
+        quote = connection.ops.quote_name
+        columns = ", ".join(
+            quote(opts.get_field(name).column)
+            for name in ("bill_id", "customer", "vehicle", "total_amount")
+        )
+        sql = (
+            f"UPDATE {quote(opts.db_table)} "
+            f"SET {quote(opts.get_field('payment_status').column)} = %s "
+            f"WHERE {quote(opts.get_field('payment_status').column)} = %s "
+            f"AND {quote(opts.get_field('due_date').column)} < %s "
+            f"RETURNING {columns}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql,
+                [
+                    Bill.PaymentStatus.OVERDUE,
+                    Bill.PaymentStatus.PENDING,
+                    connection.ops.adapt_datetimefield_value(now),
+                ],
+            )
+            return cursor.fetchall()
+
+    rows = list(
+        Bill.objects.select_for_update()
+        .filter(**_overdue_filter(now))
+        .values_list("bill_id", "customer_id", "vehicle_id", "total_amount")
+    )
+    Bill.objects.filter(bill_id__in=[row[0] for row in rows]).update(
+        payment_status=Bill.PaymentStatus.OVERDUE
+    )
+    return rows
+
+
+def sweep_overdue_bills(now=None, dry_run=False):
+    """
+    Mark ``PENDING`` bills due before ``now`` as ``OVERDUE`` and notify
+    their customers. With ``dry_run`` only counts them.
+
+    Returns a report with the number of bills and notifications touched
+    and the time taken.
+    """
+    now = now or timezone.now()
+    started = time.perf_counter()
+
+    if dry_run:
+        marked = Bill.objects.filter(**_overdue_filter(now)).count()
+        notified = 0
+    else:
+        with transaction.atomic():
+            rows = _mark_overdue(now)
+            Notification.objects.bulk_create(
+                [
+                    Notification(
+                        user_id=customer_id,
+                        vehicle_id=vehicle_id,
+                        priority=Notification.Priority.HIGH,
+                        message=(
+                            f"Bill #{bill_id} of ₹{float(total_amount):.2f} is past "
+                            "its due date and is now overdue."
+                        ),
+                    )
+                    for bill_id, customer_id, vehicle_id, total_amount in rows
+                ],
+                batch_size=NOTIFICATION_BATCH_SIZE,
+            )
+            marked = notified = len(rows)
+            adjust_counter("notifications", notified)
+            if marked:
+                invalidate_on_commit(Bill, Notification)
+
+    elapsed = time.perf_counter() - started
+    report = {
+        "as_of": now,
+        "dry_run": dry_run,
+        "marked_overdue": marked,
+        "notifications": notified,
+        "duration_ms": round(elapsed * 1000, 2),
+    }
+    logger.info(
+        f"Overdue bill sweep{' (dry run)' if dry_run else ''}: {marked} bill(s) "
+        f"marked overdue, {notified} notification(s) in {report['duration_ms']} ms"
+    )
+    return report
@@ -0,0 +1,174 @@
+"""
+Revenue and receivables figures over ``Bill`` for the admin dashboard.
+
+Everything is aggregated in the database: the revenue series groups by
+``Trunc`` (``date_trunc`` on PostgreSQL), the per-method, per-status and
+per-customer breakdowns use conditional ``Sum``/``Count`` aggregates, and
+the aging buckets are a single filtered aggregate over unpaid bills that
+the ``(payment_status, due_date)`` index serves. No bill row is loaded
+into Python, so the cost does not grow with the number of bills returned.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import Bill
+
+DEFAULT_ANALYTICS_DAYS = 90
+GRANULARITIES = ("day", "week", "month")
+DEFAULT_TOP_CUSTOMERS = 10
+MAX_TOP_CUSTOMERS = 100
+
+UNPAID_STATUSES = (Bill.PaymentStatus.PENDING, Bill.PaymentStatus.OVERDUE)
+
+# label -> (min, max) days past due, both inclusive; None is unbounded.
+AGING_BUCKETS = {
+    "current": (None, 0),
+    "1-30": (1, 30),
+    "31-60": (31, 60),
+    "61-90": (61, 90),
+    "90+": (91, None),
+}
+
+BILLED = ~Q(payment_status=Bill.PaymentStatus.CANCELLED)
+COLLECTED = Q(payment_status=Bill.PaymentStatus.PAID)
+OUTSTANDING = Q(payment_status__in=UNPAID_STATUSES)
+
+
+def _amount(value):
+    return round(float(value or 0), 2)
+
+
+def _revenue_aggregates():
+    return {
+        "bills": Count("bill_id", filter=BILLED),
+        "billed": Sum("total_amount", filter=BILLED),
+        "collected": Sum("total_amount", filter=COLLECTED),
+        "outstanding": Sum("total_amount", filter=OUTSTANDING),
+    }
+
+
+def _revenue_row(row):
+    return {
+        "bills": row["bills"],
+        "billed": _amount(row["billed"]),
+        "collected": _amount(row["collected"]),
+        "outstanding": _amount(row["outstanding"]),
+    }
+
+
+def _aging_filter(now, min_days, max_days):
+    # Days past due are counted in whole days from ``now``: a bill due
+    # within the last 24 hours is 1 day overdue.
+    condition = Q(payment_status__in=UNPAID_STATUSES)
+    if max_days is not None:
+        condition &= Q(due_date__gte=now - timedelta(days=max_days))
+    if min_days is not None:
+        condition &= Q(due_date__lt=now - timedelta(days=min_days - 1))
+    return condition
+
+
+def aging_buckets(now=None):
+    """Count and amount of unpaid bills per days-past-due bucket as of ``now``."""
+    now = now or timezone.now()
+    aggregates = {}
+    for index, (min_days, max_days) in enumerate(AGING_BUCKETS.values()):
+        condition = _aging_filter(now, min_days, max_days)
+        aggregates[f"count_{index}"] = Count("bill_id", filter=condition)
+        aggregates[f"amount_{index}"] = Sum("total_amount", filter=condition)
+
+    row = Bill.objects.filter(payment_status__in=UNPAID_STATUSES).aggregate(
+        **aggregates
+    )
+    return [
+        {
+            "bucket": label,
+            "min_days": min_days,
+            "max_days": max_days,
+            "bills": row[f"count_{index}"],
+            "amount": _amount(row[f"amount_{index}"]),
+        }
+        for index, (label, (min_days, max_days)) in enumerate(AGING_BUCKETS.items())
+    ]
+
+
+def billing_analytics(since=None, until=None, granularity="day", top=DEFAULT_TOP_CUSTOMERS):
+    """
+    Revenue over bills dated in ``[since, until)`` (default: the last
+    ``DEFAULT_ANALYTICS_DAYS`` days) per ``granularity`` period, payment
+    method, payment status and top ``top`` customers, plus the current
+    receivables aging, which ignores the window.
+
+    "billed" excludes cancelled bills, "collected" is paid bills and
+    "outstanding" is pending or overdue bills.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}.")
+    if not 1 <= top <= MAX_TOP_CUSTOMERS:
+        raise ValueError(f"top must be between 1 and {MAX_TOP_CUSTOMERS}.")
+
+    now = timezone.now()
+    until = until or now
+    since = since or until - timedelta(days=DEFAULT_ANALYTICS_DAYS)
+    if since >= until:
+        raise ValueError("since must be earlier than until.")
+
+    bills = Bill.objects.filter(bill_date__gte=since, bill_date__lt=until)
+
+    series = (
+        bills.annotate(period=Trunc("bill_date", granularity))
+        .values("period")
+        .annotate(**_revenue_aggregates())
+        .order_by("period")
+    )
+    by_method = (
+        bills.values("payment_method")
+        .annotate(**_revenue_aggregates())
+        .order_by("payment_method")
+    )
+    by_status = (
+        bills.values("payment_status")
+        .annotate(count=Count("bill_id"), amount=Sum("total_amount"))
+        .order_by("payment_status")
+    )
+    top_customers = (
+        bills.filter(BILLED)
+        .values("customer_id", "customer__name", "customer__email")
+        .annotate(**_revenue_aggregates())
+        .order_by("-billed", "customer_id")[:top]
+    )
+
+    return {
+        "since": since,
+        "until": until,
+        "granularity": granularity,
+        "totals": _revenue_row(bills.aggregate(**_revenue_aggregates())),
+        "series": [
+            {"period": row["period"], **_revenue_row(row)} for row in series
+        ],
+        "by_payment_method": [
+            {"payment_method": row["payment_method"], **_revenue_row(row)}
+            for row in by_method
+        ],
+        "by_payment_status": [
+            {
+                "payment_status": row["payment_status"],
+                "bills": row["count"],
+                "amount": _amount(row["amount"]),
+            }
+            for row in by_status
+        ],
+        "aging": {"as_of": now, "buckets": aging_buckets(now)},
+        "top_customers": [
+            {
+                "customer_id": row["customer_id"],
+                "name": row["customer__name"],
+                "email": row["customer__email"],
+                **_revenue_row(row),
+            }
+            for row in top_customers
+        ],
+    }
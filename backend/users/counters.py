@@ -0,0 +1,186 @@
+"""
+Row counts for the admin dashboard without a COUNT(*) per table.
+
+Three modes are available through ``ADMIN_COUNTS_MODE``:
+
+- ``exact``: live ``COUNT(*)`` queries.
+- ``counter``: read the ``EntityCounter`` table, which signals keep in step
+  with every ORM save/delete and bulk write paths update explicitly.
+  Changes land in one of ``COUNTER_SHARDS`` ``EntityCounterShard`` rows
+  per entity (chosen per worker thread), so concurrent ingest
+  transactions do not queue on one row lock; a count is the base row plus
+  its shards.
+- ``approximate``: like ``counter`` but the largest tables
+  (``APPROXIMATE_COUNT_KEYS``) use the planner's ``reltuples`` estimate.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    Bill,
+    ChargeHistory,
+    Company,
+    EntityCounter,
+    EntityCounterShard,
+    Issues,
+    Notification,
+    Service,
+    ServiceTask,
+    Task,
+    Trip,
+    User,
+    Vehicle,
+    VehicleStats,
+)
+
+COUNTED_MODELS = {
+    "companies": Company,
+    "users": User,
+    "vehicles": Vehicle,
+    "vehicle_stats": VehicleStats,
+    "trips": Trip,
+    "charge_history": ChargeHistory,
+    "tasks": Task,
+    "service_tasks": ServiceTask,
+    "services": Service,
+    "issues": Issues,
+    "notifications": Notification,
+    "bills": Bill,
+}
+
+COUNTER_KEYS_BY_MODEL = {model: key for key, model in COUNTED_MODELS.items()}
+
+APPROXIMATE_COUNT_KEYS = {"vehicle_stats", "trips"}
+
+COUNT_MODES = {"exact", "counter", "approximate"}
+
+COUNTER_SHARDS = 16
+
+
+def counts_mode():
+    mode = str(getattr(settings, "ADMIN_COUNTS_MODE", "counter")).lower()
+    return mode if mode in COUNT_MODES else "counter"
+
+
+def _shard():
+    # Fixed per thread, so one transaction never locks two shards of a key
+    # in an order another transaction could reverse.
+    return hash((os.getpid(), threading.get_ident())) % COUNTER_SHARDS
+
+
+def adjust_counter(key, delta):
+    """Apply ``delta`` to a counter; used by signals and bulk write paths."""
+    if not delta:
+        return
+    opts = EntityCounterShard._meta
+    quote = connection.ops.quote_name
+    table = quote(opts.db_table)
+    name, shard, count, updated_at = (
+        quote(opts.get_field(field).column)
+        for field in ("name", "shard", "count", "updated_at")
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({name}, {shard}, {count}, {updated_at}) "
+            f"VALUES (%s, %s, %s, %s) ON CONFLICT ({name}, {shard}) DO UPDATE "
+            f"SET {count} = {table}.{count} + EXCLUDED.{count}, "
+            f"{updated_at} = EXCLUDED.{updated_at}",
+            [
+                key,
+                _shard(),
+                delta,
+                connection.ops.adapt_datetimefield_value(timezone.now()),
+            ],
+        )
+
+
+def rebuild_counters(keys=None):
+    """Recompute counters from live COUNT(*) queries and clear their shards."""
+    counts = {}
+    for key in keys or COUNTED_MODELS:
+        with transaction.atomic():
+            counts[key] = COUNTED_MODELS[key].objects.count()
+            EntityCounter.objects.update_or_create(
+                name=key, defaults={"count": counts[key]}
+            )
+            EntityCounterShard.objects.filter(name=key).delete()
+    return counts
+
+
+ESTIMATED_ROWS_SQL = (
+    "SELECT CASE WHEN MIN(c.reltuples) < 0 THEN NULL "
+    "ELSE SUM(c.reltuples)::bigint END FROM pg_class c "
+    "WHERE c.relkind = 'r' AND (c.oid = %s::regclass OR c.oid IN "
+    "(SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass))"
+)
+
+
+def _count_expression(key, mode):
+    """Scalar subquery (and params) yielding the count for ``key``."""
+    table = COUNTED_MODELS[key]._meta.db_table
+    if mode == "exact":
+        return f"(SELECT COUNT(*) FROM {connection.ops.quote_name(table)})", []
+
+    # NULL when the base row is missing, so resolve_counts seeds it.
+    quote = connection.ops.quote_name
+    counter_sql = (
+        "(SELECT c.count + COALESCE((SELECT SUM(s.count) FROM {shards} s "
+        "WHERE s.name = c.name), 0) FROM {counters} c WHERE c.name = %s)"
+    ).format(
+        counters=quote(EntityCounter._meta.db_table),
+        shards=quote(EntityCounterShard._meta.db_table),
+    )
+    if (
+        mode == "approximate"
+        and key in APPROXIMATE_COUNT_KEYS
+        and connection.vendor == "postgresql"
+    ):
+        # The planner estimate is NULL for never-analyzed tables; fall back
+        # to the maintained counter then.
+        return (
+            f"COALESCE(({ESTIMATED_ROWS_SQL}), {counter_sql})",
+            [table, table, key],
+        )
+    return counter_sql, [key]
+
+
+def count_select_sql(mode=None):
+    """
+    Build the select list for every summary count so callers can fetch
+    them (optionally alongside other columns) in a single statement.
+
+    Returns ``(sql, params)``; the columns follow ``COUNTED_MODELS`` order.
+    """
+    mode = mode or counts_mode()
+    expressions = []
+    params = []
+    for key in COUNTED_MODELS:
+        sql, expression_params = _count_expression(key, mode)
+        expressions.append(f"{sql} AS {connection.ops.quote_name(key)}")
+        params.extend(expression_params)
+    return ", ".join(expressions), params
+
+
+def resolve_counts(values):
+    """
+    Map a row produced by ``count_select_sql`` to ``{key: count}``,
+    seeding any counter rows that do not exist yet.
+    """
+    counts = dict(zip(COUNTED_MODELS, values))
+    missing = [key for key, value in counts.items() if value is None]
+    if missing:
+        counts.update(rebuild_counters(missing))
+    return {key: int(value) for key, value in counts.items()}
+
+
+def summary_counts(mode=None):
+    """Fetch every summary count in one round trip."""
+    sql, params = count_select_sql(mode)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {sql}", params)
+        return resolve_counts(cursor.fetchone())
@@ -0,0 +1,122 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling of VehicleStats series
+for charts.
+
+``lttb`` keeps the first and last sample and, from each of ``points - 2``
+equal-count buckets in between, the sample forming the largest triangle
+with the previously kept sample and the mean of the next bucket, which
+preserves the visual shape of the curve. Bucket means and the per-bucket
+min/max envelope are computed with ``np.*.reduceat``; only the selection
+walks the buckets in Python, so the cost is one pass over the samples
+plus one short loop per output point.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+
+from .battery_analytics import load_vehicle_samples
+
+CHART_METRICS = ("battery_percentage", "temperature", "estimated_range")
+MIN_POINTS = 3
+MAX_POINTS = 10000
+
+
+def _bucket_edges(size, points):
+    """Start indices of the interior buckets, plus the end of the last one."""
+    return np.linspace(1, size - 1, points - 1).astype(np.intp)
+
+
+def lttb(x, y, points):
+    """
+    Indices of the ``points`` samples LTTB keeps from the series ``(x, y)``
+    (``x`` ascending), and the bucket edges they were picked from.
+
+    Series with ``points`` samples or fewer are returned whole with no
+    edges.
+    """
+    size = x.size
+    if points >= size:
+        return np.arange(size), None
+    if points < MIN_POINTS:
+        raise ValueError(f"points must be at least {MIN_POINTS}.")
+
+    edges = _bucket_edges(size, points)
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    # The last interior bucket ends before the final sample, so reduce over
+    # ``[:size - 1]``; every bucket holds at least one sample.
+    mean_x = np.add.reduceat(x[: size - 1], starts) / counts
+    mean_y = np.add.reduceat(y[: size - 1], starts) / counts
+    # The triangle for the last bucket closes on the final sample.
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = size - 1
+    anchor = 0
+    for bucket, (start, end) in enumerate(zip(starts, edges[1:])):
+        ax, ay = x[anchor], y[anchor]
+        areas = np.abs(
+            (ax - next_x[bucket]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (next_y[bucket] - ay)
+        )
+        anchor = start + int(np.argmax(areas))
+        selected[bucket + 1] = anchor
+
+    return selected, edges
+
+
+def envelope(y, edges):
+    """Per-bucket ``(min, max)`` of ``y`` matching ``lttb``'s selection."""
+    if edges is None:
+        return y, y
+    head, tail = y[:1], y[-1:]
+    interior = y[: y.size - 1]
+    starts = edges[:-1]
+    return (
+        np.concatenate((head, np.minimum.reduceat(interior, starts), tail)),
+        np.concatenate((head, np.maximum.reduceat(interior, starts), tail)),
+    )
+
+
+def _isoformat(timestamps):
+    return [
+        datetime.fromtimestamp(value, tz=dt_timezone.utc).isoformat()
+        for value in timestamps.tolist()
+    ]
+
+
+def downsample_series(samples, points, metrics=CHART_METRICS):
+    """
+    LTTB-downsample each of ``metrics`` from ``load_vehicle_samples``
+    output to at most ``points`` points, each with its bucket's min/max.
+    """
+    x = samples["recorded_at"]
+    series = {}
+    for metric in metrics:
+        y = samples[metric].astype(np.float64)
+        selected, edges = lttb(x, y, points)
+        lows, highs = envelope(y, edges)
+        series[metric] = {
+            "recorded_at": _isoformat(x[selected]),
+            "value": y[selected].tolist(),
+            "min": lows.tolist(),
+            "max": highs.tolist(),
+        }
+    return series
+
+
+def downsampled_vehicle_series(vehicle_id, points, since=None, until=None):
+    """Load a vehicle's samples in ``[since, until)`` and downsample them."""
+    if not MIN_POINTS <= points <= MAX_POINTS:
+        raise ValueError(f"points must be between {MIN_POINTS} and {MAX_POINTS}.")
+
+    samples = load_vehicle_samples(vehicle_id, since, until)
+    return {
+        "vehicle_id": vehicle_id,
+        "samples": int(samples["recorded_at"].size),
+        "points": min(points, int(samples["recorded_at"].size)),
+        "series": downsample_series(samples, points),
+    }
@@ -0,0 +1,140 @@
+"""
+Short-lived cache for Evon answers.
+
+Entries are keyed on the resolved intent and its normalized parameters
+(never the raw prompt), so "How many active users?" and "active users
+count" share one entry. Each key also embeds a version number per
+dependent table; model signals bump the version once a save/delete
+commits, which orphans the affected entries immediately instead of
+waiting for the TTL. High-churn tables (telemetry) are deliberately left out of
+invalidation and rely on the TTL alone.
+
+Answers and versions live in the configured cache (``EVON_CACHE_ALIAS``);
+with the default local-memory backend both, like the hit/miss counters,
+are per worker process.
+"""
+
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Bill, Company, Issues, Notification, Service, Trip, User, Vehicle
+
+KEY_PREFIX = "evon"
+
+# Tables whose writes invalidate cached answers.
+INVALIDATING_MODELS = (Bill, Company, Issues, Notification, Service, Trip, User, Vehicle)
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def evon_cache():
+    return caches[getattr(settings, "EVON_CACHE_ALIAS", "default")]
+
+
+def default_ttl():
+    return int(getattr(settings, "EVON_CACHE_TTL", 15))
+
+
+def cacheable(*models, ttl=None, params=None):
+    """
+    Mark an intent handler as cacheable.
+
+    ``models`` are the tables whose writes invalidate the answer, ``ttl``
+    overrides EVON_CACHE_TTL and ``params(match)`` adds parameters beyond
+    the trigger's named groups (e.g. the current date).
+    """
+
+    def decorate(handler):
+        handler.cache_policy = (models, ttl, params)
+        return handler
+
+    return decorate
+
+
+def _version_key(model):
+    return f"{KEY_PREFIX}:version:{model._meta.db_table}"
+
+
+def invalidate(*models):
+    """Bump the version of ``models`` so dependent cached answers miss."""
+    cache = evon_cache()
+    for model in models:
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def invalidate_on_commit(*models):
+    """
+    ``invalidate(*models)`` once the current transaction commits (at once
+    outside one), so a reader cannot cache the pre-write answer under the
+    new version before the write is visible.
+    """
+    transaction.on_commit(lambda: invalidate(*models))
+
+
+def _answer_key(intent, params, models):
+    cache = evon_cache()
+    versions = cache.get_many([_version_key(model) for model in models])
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    version = ".".join(str(versions.get(_version_key(model), 0)) for model in models)
+    return f"{KEY_PREFIX}:answer:{intent}:{digest}:{version}"
+
+
+def _record(hit):
+    with _stats_lock:
+        _stats["hits" if hit else "misses"] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def cached_answer(intent, handler, match):
+    """
+    Run ``handler(intent, match)`` through the cache when it is cacheable.
+
+    Returns ``(answer, value, intent, hit)``; ``hit`` is None for handlers
+    that are not cached.
+    """
+    policy = getattr(handler, "cache_policy", None)
+    if policy is None:
+        return (*handler(intent, match), None)
+
+    models, ttl, extra_params = policy
+    params = {
+        name: value.strip() if isinstance(value, str) else value
+        for name, value in match.groupdict().items()
+        if value is not None
+    }
+    if extra_params:
+        params.update(extra_params(match))
+
+    cache = evon_cache()
+    key = _answer_key(intent, params, models)
+    cached = cache.get(key)
+    if cached is not None:
+        _record(True)
+        return (*cached, True)
+
+    result = handler(intent, match)
+    cache.set(key, result, default_ttl() if ttl is None else ttl)
+    _record(False)
+    return (*result, False)
@@ -0,0 +1,655 @@
+"""
+Read-only SQL execution for Evon and the optional LLM text-to-SQL fallback.
+
+The SQL generator (LLM client, schema-aware chain and its SQLAlchemy
+engine) is built once per process on first use and reused by every
+request; ``EVON_SQL_GENERATOR`` picks the implementation, so tests and
+offline setups can plug in ``StubSQLGenerator`` instead of OpenAI.
+
+Every query must pass ``validate_sql`` (a single sqlparse walk whose
+verdicts are cached by SQL hash) and then runs in a
+``READ ONLY`` transaction with a PostgreSQL ``statement_timeout``. Before
+it runs, a ``LIMIT`` of ``EVON_SQL_ROW_CAP`` (+1 to detect truncation) is
+injected and its ``EXPLAIN (FORMAT JSON)`` plan is checked against
+``EVON_SQL_MAX_COST`` (per plan node, so the LIMIT cannot hide an
+expensive scan or sort) and ``EVON_SQL_MAX_JOIN_ROWS``, so a cartesian join
+over telemetry is refused before it touches the shared database.
+"""
+
+import asyncio
+import hashlib
+import importlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+import sqlparse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+from sqlparse.tokens import Comment, Keyword, Name, String
+
+logger = logging.getLogger(__name__)
+
+FORBIDDEN_SQL_KEYWORDS = {
+    "insert",
+    "update",
+    "delete",
+    "drop",
+    "alter",
+    "truncate",
+    "grant",
+    "revoke",
+    "create",
+    "into",
+    "copy",
+}
+
+ALLOWED_TABLES = {
+    "users_user",
+    "users_vehicle",
+    "users_company",
+    "users_service",
+    "users_issues",
+    "users_bill",
+    "users_trip",
+    "users_vehiclestats",
+    "users_vehiclebatterystats",
+    "users_notification",
+}
+
+TEXT2SQL_INSTRUCTIONS = (
+    "Generate a single read-only SQL query for PostgreSQL. "
+    "Use only SELECT, never modify data, and apply LIMIT 25 for row listings. "
+    "For averages, minimums or maximums of battery_health, temperature or "
+    "battery_percentage read users_vehiclebatterystats (one row per vehicle; "
+    "weight the *_mean columns by samples for fleet figures) instead of "
+    "users_vehiclestats. "
+    "Question: {prompt}"
+)
+
+# Set-returning functions that may appear as a FROM/JOIN source. Any other
+# function there (pg_ls_dir, pg_read_file, dblink, ...) is rejected.
+ALLOWED_TABLE_FUNCTIONS = {"generate_series", "unnest"}
+
+STUB_SQL = "SELECT COUNT(*) AS vehicles FROM users_vehicle"
+
+VALIDATION_CACHE_SIZE = 1024
+
+_verdict_lock = threading.Lock()
+_verdicts = OrderedDict()
+
+_generator_lock = threading.Lock()
+_generator = None
+_generator_built = False
+
+
+def extract_sql(raw_text):
+    if not raw_text:
+        return ""
+
+    # Prefer fenced SQL block if model returns markdown.
+    code_match = re.search(
+        r"```(?:sql)?\s*(.*?)```", raw_text, re.IGNORECASE | re.DOTALL
+    )
+    if code_match:
+        raw_text = code_match.group(1)
+
+    # A lone trailing semicolon is harmless; anything after one is not.
+    return raw_text.strip().rstrip(";").rstrip()
+
+
+class _Rejected(Exception):
+    pass
+
+
+# Keywords that end a FROM clause (and open the rest of the query).
+FROM_CLAUSE_END = {
+    "where",
+    "group",
+    "having",
+    "window",
+    "order",
+    "limit",
+    "offset",
+    "fetch",
+    "union",
+    "intersect",
+    "except",
+    "for",
+}
+JOIN_PREFIXES = {"natural", "inner", "left", "right", "full", "outer", "cross"}
+
+
+class _Frame:
+    """
+    One parenthesised level of the statement.
+
+    ``query`` frames hold a (sub)query or a join tree and track which clause
+    the walk is in; ``expr`` frames are function arguments and other
+    expressions, where FROM is not a table clause
+    (``EXTRACT(YEAR FROM start_date)``). ``scope`` holds the CTE names the
+    frame's WITH defined, visible only inside it.
+    """
+
+    def __init__(self, kind, state=None, resume=None, cte=None):
+        self.kind = kind
+        self.state = state
+        self.resume = resume
+        self.cte = cte
+        self.scope = set()
+        self.recursive = False
+        self.pending = None
+
+
+def _words(token):
+    return token.normalized.lower().split() if token.ttype in Keyword else []
+
+
+def _is_name(token):
+    return token is not None and (token.ttype in Name or token.ttype in String.Symbol)
+
+
+def _name(token):
+    # Quoted identifiers are case-sensitive, bare ones fold to lower case.
+    if token.ttype in String.Symbol:
+        return token.value[1:-1].replace('""', '"')
+    return token.value.lower()
+
+
+def _opens_query(token):
+    return token is not None and (
+        token.ttype in (Keyword.DML, Keyword.CTE) or _words(token) == ["values"]
+    )
+
+
+class _Walker:
+    """
+    Walk the statement's tokens once, rejecting forbidden keywords and any
+    FROM-clause token that is not part of a table source, and collect the
+    tables read that are not CTEs in scope.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+        self.stack = [_Frame("query", "start")]
+        self.tables = set()
+
+    def _peek(self, offset=1):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def _open(self, resume, state=None, cte=None):
+        """
+        Enter the parenthesis at the current token: a subquery, else a join
+        tree when ``state`` is given, else an expression.
+        """
+        if _opens_query(self._peek()):
+            self.stack.append(_Frame("query", "start", resume, cte))
+        elif state is not None:
+            self.stack.append(_Frame("query", state, resume))
+        else:
+            self.stack.append(_Frame("expr", resume=resume))
+
+    def _close(self):
+        frame = self.stack.pop()
+        if not self.stack:
+            raise _Rejected("unbalanced parentheses")
+        parent = self.stack[-1]
+        if frame.cte is not None:
+            parent.scope.add(frame.cte)
+        if parent.kind == "query":
+            parent.state = frame.resume
+
+    def _table_source(self, token):
+        """Read a possibly qualified name, or a table function call."""
+        parts = [_name(token)]
+        while self._peek() is not None and self._peek().value == "." and _is_name(
+            self._peek(2)
+        ):
+            self.position += 2
+            parts.append(_name(self.tokens[self.position]))
+        following = self._peek()
+        if following is not None and following.value == "(":
+            if len(parts) > 1 or parts[0].lower() not in ALLOWED_TABLE_FUNCTIONS:
+                raise _Rejected(f"function {'.'.join(parts)!r} not allowed in FROM")
+            self.position += 1
+            self.stack.append(_Frame("expr", resume="source"))
+            return
+        if parts[:-1] not in ([], ["public"]):
+            raise _Rejected(f"schema {'.'.join(parts[:-1])!r} not allowed")
+        if not any(parts[-1] in frame.scope for frame in self.stack):
+            self.tables.add(parts[-1])
+        self.stack[-1].state = "source"
+
+    def walk(self):
+        while self.position < len(self.tokens):
+            token = self.tokens[self.position]
+            words = _words(token)
+            forbidden = FORBIDDEN_SQL_KEYWORDS.intersection(words)
+            if forbidden:
+                raise _Rejected(f"forbidden keyword {forbidden.pop().upper()}")
+            if token.value == ";":
+                raise _Rejected("multiple statements")
+
+            if token.value in (")", "]"):
+                self._close()
+            elif self.stack[-1].kind == "expr":
+                if token.value in ("(", "["):
+                    self._open(resume=None)
+            else:
+                self._step(token, words)
+            self.position += 1
+
+        if len(self.stack) != 1:
+            raise _Rejected("unbalanced parentheses")
+        return self.tables
+
+    def _step(self, token, words):
+        frame = self.stack[-1]
+        state = frame.state
+        value = token.value
+        head = words[0] if words else None
+
+        if state == "start":
+            if token.ttype is Keyword.CTE:
+                frame.state = "cte_name"
+            elif _opens_query(token):
+                frame.state = "body"
+            elif value == "(":
+                self._open(resume="body")
+            else:
+                raise _Rejected(f"unexpected {value!r}")
+
+        elif state == "cte_name":
+            if words == ["recursive"] and frame.pending is None:
+                frame.recursive = True
+            elif _is_name(token):
+                frame.pending = _name(token)
+                if frame.recursive:
+                    frame.scope.add(frame.pending)
+                frame.state = "cte_columns"
+            else:
+                raise _Rejected(f"unexpected {value!r} in WITH")
+        elif state in ("cte_columns", "cte_as"):
+            if value == "(" and state == "cte_columns":
+                self._open(resume="cte_as")
+            elif words == ["as"]:
+                frame.state = "cte_body"
+            else:
+                raise _Rejected(f"unexpected {value!r} in WITH")
+        elif state == "cte_body":
+            if head in ("not", "materialized"):
+                pass
+            elif value == "(" and _opens_query(self._peek()):
+                # A non-recursive CTE is visible only after its own body.
+                self._open(
+                    resume="cte_next", cte=None if frame.recursive else frame.pending
+                )
+            else:
+                raise _Rejected(f"unexpected {value!r} in WITH")
+        elif state == "cte_next":
+            if value == ",":
+                frame.state = "cte_name"
+            elif _opens_query(token) and token.ttype is not Keyword.CTE:
+                frame.state = "body"
+            elif value == "(":
+                self._open(resume="body")
+            else:
+                raise _Rejected(f"unexpected {value!r} after WITH")
+
+        elif state == "body":
+            previous = self.tokens[self.position - 1] if self.position else None
+            if words == ["from"] and _words(previous) != ["distinct"]:
+                frame.state = "table"
+            elif value in ("(", "["):
+                self._open(resume="body")
+
+        elif state == "table":
+            if words in (["lateral"], ["only"]):
+                pass
+            elif _is_name(token):
+                self._table_source(token)
+            elif value == "(":
+                # A subquery, or a parenthesised join tree.
+                self._open(resume="source", state="table")
+            else:
+                raise _Rejected(f"unrecognised table reference {value!r}")
+        elif state == "alias":
+            if not _is_name(token):
+                raise _Rejected(f"unexpected {value!r} after AS")
+            frame.state = "aliased"
+        elif state == "sample":
+            if not (_is_name(token) or token.ttype in Keyword):
+                raise _Rejected(f"unexpected {value!r} after TABLESAMPLE")
+            frame.state = "arguments"
+        elif state == "arguments":
+            if value != "(":
+                raise _Rejected(f"unexpected {value!r} in FROM")
+            self._open(resume="source")
+        elif state == "ordinality":
+            if words != ["ordinality"]:
+                raise _Rejected(f"unexpected {value!r} after WITH")
+            frame.state = "source"
+        elif state == "join":
+            if not words or words[-1] != "join":
+                raise _Rejected(f"unexpected {value!r} in FROM")
+            frame.state = "table"
+
+        elif state in ("source", "aliased", "condition"):
+            if value == ",":
+                frame.state = "table"
+            elif words and words[-1] == "join":
+                frame.state = "table"
+            elif head in JOIN_PREFIXES:
+                frame.state = "join"
+            elif head in FROM_CLAUSE_END:
+                frame.state = "body"
+            elif state == "condition":
+                if value in ("(", "["):
+                    self._open(resume="condition")
+            elif words == ["on"]:
+                frame.state = "condition"
+            elif words in (["using"], ["repeatable"]):
+                frame.state = "arguments"
+            elif words == ["tablesample"]:
+                frame.state = "sample"
+            elif words == ["as"] and state == "source":
+                frame.state = "alias"
+            elif _is_name(token) and state == "source":
+                frame.state = "aliased"
+            elif value == "(" and state == "aliased":
+                # Column aliases: "AS d(day)".
+                self._open(resume="source")
+            elif token.ttype is Keyword.CTE:
+                frame.state = "ordinality"
+            else:
+                raise _Rejected(f"unexpected {value!r} in FROM")
+
+
+def _check_sql(sql):
+    statements = [
+        statement for statement in sqlparse.parse(sql) if str(statement).strip()
+    ]
+    if len(statements) != 1:
+        return "exactly one statement is required"
+    statement = statements[0]
+    if statement.get_type() != "SELECT":
+        return "only SELECT queries are allowed"
+
+    tokens = [
+        token
+        for token in statement.flatten()
+        if not token.is_whitespace and token.ttype not in Comment
+    ]
+    try:
+        tables = _Walker(tokens).walk()
+    except _Rejected as exc:
+        return str(exc)
+
+    disallowed = tables - ALLOWED_TABLES
+    if disallowed:
+        return f"table(s) not allowed: {', '.join(sorted(disallowed))}"
+    return None
+
+
+def validate_sql(sql):
+    """
+    Return ``(safe, reason)`` for ``sql``: safe only for a single SELECT
+    (optionally with CTEs) that reads nothing but ``ALLOWED_TABLES``.
+
+    Verdicts are cached in an LRU keyed by a hash of the SQL text, so
+    repeated queries skip the parse.
+    """
+    if not sql or not sql.strip():
+        return False, "empty query"
+
+    key = hashlib.blake2b(sql.encode("utf-8"), digest_size=16).digest()
+    with _verdict_lock:
+        if key in _verdicts:
+            _verdicts.move_to_end(key)
+            reason = _verdicts[key]
+            return reason is None, reason
+
+    reason = _check_sql(sql)
+    with _verdict_lock:
+        _verdicts[key] = reason
+        if len(_verdicts) > VALIDATION_CACHE_SIZE:
+            _verdicts.popitem(last=False)
+    return reason is None, reason
+
+
+def clear_validation_cache():
+    with _verdict_lock:
+        _verdicts.clear()
+
+
+def inject_limit(sql, limit):
+    """
+    Bound ``sql`` to ``limit`` rows by wrapping it in an outer SELECT, which
+    holds whatever LIMIT, OFFSET or FETCH FIRST the query has of its own.
+
+    Comments are stripped first, and the query sits on its own lines so
+    nothing it ends with can swallow the closing parenthesis.
+    """
+    sql = sqlparse.format(sql, strip_comments=True).strip()
+    return f"SELECT * FROM (\n{sql}\n) AS evon_query LIMIT {int(limit)}"
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def summarize_plan(plan):
+    """Cost and row estimates of an ``EXPLAIN (FORMAT JSON)`` plan."""
+    nodes = list(_plan_nodes(plan))
+    join_rows = [
+        node["Plan Rows"]
+        for node in nodes
+        if node["Node Type"] == "Nested Loop" or node["Node Type"].endswith("Join")
+    ]
+    return {
+        "node": plan["Node Type"],
+        "total_cost": plan["Total Cost"],
+        # The injected LIMIT scales the top node's cost down by the share of
+        # rows it expects to fetch; the nodes under it keep the full
+        # estimate of the scan or sort they would run.
+        "max_cost": max(node["Total Cost"] for node in nodes),
+        "rows": plan["Plan Rows"],
+        "max_join_rows": max(join_rows, default=0),
+        "nodes": len(nodes),
+        "relations": sorted(
+            {node["Relation Name"] for node in nodes if "Relation Name" in node}
+        ),
+    }
+
+
+def check_plan(cursor, sql, params=None):
+    """
+    EXPLAIN ``sql`` and return its plan summary.
+
+    Raises ValueError when the estimated cost of any plan node or the rows
+    produced by any join exceed ``EVON_SQL_MAX_COST`` /
+    ``EVON_SQL_MAX_JOIN_ROWS``.
+    """
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params or [])
+    document = cursor.fetchone()[0]
+    if isinstance(document, str):
+        document = json.loads(document)
+    summary = summarize_plan(document[0]["Plan"])
+
+    if summary["max_cost"] > settings.EVON_SQL_MAX_COST:
+        raise ValueError(
+            f"Query blocked: estimated cost {summary['max_cost']:.0f} exceeds "
+            f"{settings.EVON_SQL_MAX_COST:.0f}"
+        )
+    if summary["max_join_rows"] > settings.EVON_SQL_MAX_JOIN_ROWS:
+        raise ValueError(
+            f"Query blocked: a join is estimated at {summary['max_join_rows']:.0f} "
+            f"rows, above {settings.EVON_SQL_MAX_JOIN_ROWS}"
+        )
+    return summary
+
+
+def run_read_only(sql, params=None, row_cap=None, explain=False):
+    """
+    Run a guarded SELECT and return ``(rows, truncated, plan)``.
+
+    The query is limited to ``row_cap`` rows (default ``EVON_SQL_ROW_CAP``)
+    plus one, so ``truncated`` tells whether more were available. On
+    PostgreSQL it runs in a READ ONLY transaction bounded by
+    ``EVON_SQL_STATEMENT_TIMEOUT_MS``; with ``explain`` the plan is checked
+    first (see ``check_plan``) and its summary returned, otherwise ``plan``
+    is None.
+    """
+    safe, reason = validate_sql(sql)
+    if not safe:
+        raise ValueError(f"Unsafe SQL query was blocked: {reason}")
+
+    row_cap = row_cap or settings.EVON_SQL_ROW_CAP
+    sql = inject_limit(sql, row_cap + 1)
+    plan = None
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SET TRANSACTION READ ONLY")
+            # set_config(..., true) is SET LOCAL: it ends with the transaction.
+            cursor.execute(
+                "SELECT set_config('statement_timeout', %s, true)",
+                [str(settings.EVON_SQL_STATEMENT_TIMEOUT_MS)],
+            )
+            if explain:
+                plan = check_plan(cursor, sql, params)
+        cursor.execute(sql, params or [])
+        columns = [col[0] for col in cursor.description]
+        rows = cursor.fetchmany(row_cap + 1)
+
+    truncated = len(rows) > row_cap
+    return [dict(zip(columns, row)) for row in rows[:row_cap]], truncated, plan
+
+
+def execute_safe_sql(sql, params=None):
+    rows, _, _ = run_read_only(sql, params)
+    return rows
+
+
+def build_db_uri():
+    database = settings.DATABASES["default"]
+    name = database.get("NAME", "")
+    user = database.get("USER", "")
+    password = database.get("PASSWORD", "")
+    host = database.get("HOST") or "localhost"
+    port = database.get("PORT") or "5432"
+
+    if database["ENGINE"] != "django.db.backends.postgresql" or not (name and user):
+        return None
+
+    return f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{name}"
+
+
+class LangChainSQLGenerator:
+    """OpenAI chat model driving LangChain's ``create_sql_query_chain``."""
+
+    def __init__(self):
+        chat_openai_module = importlib.import_module("langchain_openai")
+        sql_utils_module = importlib.import_module("langchain_community.utilities")
+        chains_module = importlib.import_module("langchain.chains")
+        ChatOpenAI = getattr(chat_openai_module, "ChatOpenAI")
+        SQLDatabase = getattr(sql_utils_module, "SQLDatabase")
+        create_sql_query_chain = getattr(chains_module, "create_sql_query_chain")
+
+        db_uri = build_db_uri()
+        if not settings.OPENAI_API_KEY or not db_uri:
+            raise ValueError("OPENAI_API_KEY or a PostgreSQL database is missing")
+
+        # The engine is only used to reflect the schema and sample rows for
+        # the prompt, so a small pool is enough.
+        self.db = SQLDatabase.from_uri(
+            db_uri,
+            include_tables=sorted(ALLOWED_TABLES),
+            engine_args={"pool_size": 2, "max_overflow": 0, "pool_pre_ping": True},
+        )
+        self.llm = ChatOpenAI(
+            model=settings.EVON_LLM_MODEL,
+            temperature=0,
+            timeout=settings.EVON_LLM_TIMEOUT,
+            max_retries=1,
+        )
+        self.chain = create_sql_query_chain(self.llm, self.db)
+
+    async def agenerate(self, prompt):
+        return await self.chain.ainvoke(
+            {"question": TEXT2SQL_INSTRUCTIONS.format(prompt=prompt)}
+        )
+
+
+class StubSQLGenerator:
+    """Offline generator for tests and local runs; always answers ``sql``."""
+
+    def __init__(self, sql=STUB_SQL):
+        self.sql = sql
+
+    async def agenerate(self, prompt):
+        return self.sql
+
+
+def get_generator():
+    """
+    The process-wide SQL generator, built on first use.
+
+    Returns None when text-to-SQL is disabled or the generator cannot be
+    built; a failed build is not retried until ``reset_generator()``.
+    """
+    global _generator, _generator_built
+    if not settings.EVON_TEXT2SQL_ENABLED:
+        return None
+    if _generator_built:
+        return _generator
+
+    with _generator_lock:
+        if not _generator_built:
+            try:
+                _generator = import_string(settings.EVON_SQL_GENERATOR)()
+            except Exception as exc:
+                logger.warning("Evon text2sql unavailable: %s", str(exc))
+                _generator = None
+            _generator_built = True
+    return _generator
+
+
+def reset_generator():
+    global _generator, _generator_built
+    with _generator_lock:
+        _generator, _generator_built = None, False
+
+
+async def text2sql(prompt):
+    """
+    Generate SQL for ``prompt`` and run it read-only.
+
+    Returns ``(sql, rows, truncated, plan)``, or None when text-to-SQL is
+    off, fails or the plan guard rejects the query. The LLM call is awaited (and cancelled after
+    ``EVON_LLM_TIMEOUT`` seconds); only the query itself uses a thread.
+    """
+    generator = await sync_to_async(get_generator, thread_sensitive=False)()
+    if generator is None:
+        return None
+
+    try:
+        raw = await asyncio.wait_for(
+            generator.agenerate(prompt), timeout=settings.EVON_LLM_TIMEOUT
+        )
+        sql = extract_sql(raw)
+        rows, truncated, plan = await sync_to_async(run_read_only)(sql, explain=True)
+        return sql, rows, truncated, plan
+    except asyncio.TimeoutError:
+        logger.warning("Evon text2sql timed out after %ss", settings.EVON_LLM_TIMEOUT)
+        return None
+    except Exception as exc:
+        logger.warning("Evon text2sql failed: %s", str(exc))
+        return None
@@ -0,0 +1,281 @@
+"""
+In-process buffer in front of ``VehicleStats`` writes.
+
+With ``INGEST_MODE = "buffered"`` the ingest endpoint validates a batch
+and hands its samples to the worker's ``IngestBuffer`` instead of writing
+them in the request. A background thread flushes the buffer through
+``write_samples`` (``COPY`` on PostgreSQL for large flushes) once
+``INGEST_FLUSH_ROWS`` samples are waiting or the oldest has waited
+``INGEST_FLUSH_INTERVAL`` seconds, so many small requests become a few
+large writes.
+
+At most ``INGEST_BUFFER_CAPACITY`` samples are held, counting those being
+flushed. A batch that does not fit is refused whole with ``BufferFull``,
+which the view turns into 429 with a ``Retry-After`` estimate. On
+interpreter exit (a gunicorn worker shutting down) the buffer stops
+taking batches and drains for up to ``INGEST_DRAIN_TIMEOUT`` seconds.
+
+Each worker process has its own buffer, so ``metrics()`` describes the
+worker that answers the request. Samples are acknowledged before they are
+written: a crash, or a flush that fails, loses them, and both are counted
+as dropped. Buffered batches therefore never record an
+``Idempotency-Key``; a client that retries gets its samples written
+again, and duplicates are skipped on ``(vehicle, recorded_at)``.
+"""
+
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+from .telemetry import write_samples
+
+logger = logging.getLogger(__name__)
+
+INGEST_MODES = {"sync", "buffered"}
+
+
+class BufferFull(Exception):
+    """The buffer cannot take a batch; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class IngestBuffer:
+    def __init__(self, capacity, flush_rows, flush_interval, drain_timeout):
+        self.capacity = capacity
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.drain_timeout = drain_timeout
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        # (enqueued_at, samples) per accepted request, oldest first.
+        self._batches = deque()
+        self._pending = 0
+        self._in_flight = 0
+        self._closing = False
+        self._stats = {
+            "enqueued": 0,
+            "flushed": 0,
+            "inserted": 0,
+            "duplicates": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "rejected_batches": 0,
+        }
+        self._dropped = {"backpressure": 0, "flush_error": 0, "shutdown": 0}
+        self._latency = {"last": None, "total": 0.0, "max": None}
+
+    def _ensure_started(self):
+        # A forked worker inherits the parent's buffer object but not its
+        # thread; start over with an empty buffer of its own.
+        if self._pid != os.getpid():
+            self._reset()
+            self._pid = os.getpid()
+            self._thread = None
+        if self._thread is None and not self._closing:
+            self._thread = threading.Thread(
+                target=self._run, name="ingest-buffer", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _retry_after(self):
+        """Seconds until roughly the current backlog has been flushed."""
+        flushes = math.ceil((self._pending + self._in_flight) / self.flush_rows)
+        average = (
+            self._latency["total"] / self._stats["flushes"]
+            if self._stats["flushes"]
+            else self.flush_interval
+        )
+        return max(1, math.ceil(self.flush_interval + flushes * average))
+
+    def offer(self, samples):
+        """
+        Queue validated samples for the next flush.
+
+        Raises ``BufferFull`` when they do not fit or the buffer is
+        shutting down; nothing from the batch is queued then.
+        """
+        if not samples:
+            return
+        with self._lock:
+            self._ensure_started()
+            if self._closing:
+                self._stats["rejected_batches"] += 1
+                self._dropped["shutdown"] += len(samples)
+                raise BufferFull("Ingest worker is shutting down.", self._retry_after())
+            if self._pending + self._in_flight + len(samples) > self.capacity:
+                self._stats["rejected_batches"] += 1
+                self._dropped["backpressure"] += len(samples)
+                raise BufferFull(
+                    "Ingest buffer is full, retry later.", self._retry_after()
+                )
+
+            # Wake the flusher to start the interval clock on an empty
+            # buffer, or to flush at once when a full flush is waiting.
+            if not self._batches or self._pending + len(samples) >= self.flush_rows:
+                self._wakeup.notify()
+            self._batches.append((time.monotonic(), list(samples)))
+            self._pending += len(samples)
+            self._stats["enqueued"] += len(samples)
+
+    def _due_in(self):
+        """Seconds until the next flush is due; 0 when it is due now."""
+        if not self._batches:
+            return None
+        if self._closing or self._pending >= self.flush_rows:
+            return 0
+        waited = time.monotonic() - self._batches[0][0]
+        return max(0.0, self.flush_interval - waited)
+
+    def _take(self):
+        """Pop whole request batches up to ``flush_rows`` samples (at least one)."""
+        samples = []
+        while self._batches and (
+            not samples or len(samples) + len(self._batches[0][1]) <= self.flush_rows
+        ):
+            samples.extend(self._batches.popleft()[1])
+        self._pending -= len(samples)
+        self._in_flight = len(samples)
+        return samples
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while True:
+                    due_in = self._due_in()
+                    if due_in == 0:
+                        break
+                    if due_in is None and self._closing:
+                        connections.close_all()
+                        return
+                    self._wakeup.wait(due_in)
+                samples = self._take()
+            self._flush(samples)
+
+    def _flush(self, samples):
+        started = time.perf_counter()
+        try:
+            close_old_connections()
+            with transaction.atomic():
+                _, inserted = write_samples(samples)
+        except Exception:
+            logger.error(
+                f"Ingest buffer flush of {len(samples)} samples failed", exc_info=True
+            )
+            with self._lock:
+                self._stats["flush_errors"] += 1
+                self._dropped["flush_error"] += len(samples)
+                self._in_flight = 0
+            return
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["flushed"] += len(samples)
+            self._stats["inserted"] += inserted
+            self._stats["duplicates"] += len(samples) - inserted
+            self._latency["last"] = elapsed
+            self._latency["total"] += elapsed
+            self._latency["max"] = max(self._latency["max"] or 0.0, elapsed)
+            self._in_flight = 0
+
+    def close(self, timeout=None):
+        """Stop taking batches and wait for what is queued to be written."""
+        with self._wakeup:
+            if self._thread is None or self._pid != os.getpid():
+                return
+            self._closing = True
+            self._wakeup.notify()
+        thread = self._thread
+        thread.join(self.drain_timeout if timeout is None else timeout)
+
+        with self._lock:
+            if thread.is_alive():
+                lost = self._pending + self._in_flight
+                self._dropped["shutdown"] += lost
+                logger.error(
+                    f"Ingest buffer did not drain in time; {lost} samples not written"
+                )
+            else:
+                logger.info(
+                    f"Ingest buffer drained: {self._stats['flushed']} samples "
+                    f"in {self._stats['flushes']} flushes"
+                )
+            self._thread = None
+
+    def metrics(self):
+        with self._lock:
+            oldest = self._batches[0][0] if self._batches else None
+            flushes = self._stats["flushes"]
+            return {
+                "pid": os.getpid(),
+                "running": self._thread is not None and not self._closing,
+                "depth": self._pending,
+                "in_flight": self._in_flight,
+                "capacity": self.capacity,
+                "utilisation": round(
+                    (self._pending + self._in_flight) / self.capacity, 4
+                ),
+                "oldest_sample_age_ms": (
+                    round((time.monotonic() - oldest) * 1000, 2)
+                    if oldest is not None
+                    else None
+                ),
+                "flush_rows": self.flush_rows,
+                "flush_interval_s": self.flush_interval,
+                **self._stats,
+                "dropped": {**self._dropped, "total": sum(self._dropped.values())},
+                "flush_latency_ms": {
+                    "last": _ms(self._latency["last"]),
+                    "avg": _ms(self._latency["total"] / flushes) if flushes else None,
+                    "max": _ms(self._latency["max"]),
+                },
+            }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def ingest_mode():
+    mode = str(getattr(settings, "INGEST_MODE", "sync")).lower()
+    return mode if mode in INGEST_MODES else "sync"
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def ingest_buffer():
+    """This worker's buffer, created on first use from the INGEST_* settings."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = IngestBuffer(
+                capacity=int(getattr(settings, "INGEST_BUFFER_CAPACITY", 200000)),
+                flush_rows=int(getattr(settings, "INGEST_FLUSH_ROWS", 5000)),
+                flush_interval=float(getattr(settings, "INGEST_FLUSH_INTERVAL", 1.0)),
+                drain_timeout=float(getattr(settings, "INGEST_DRAIN_TIMEOUT", 30)),
+            )
+        return _buffer
+
+
+def active_buffer():
+    """The buffer to ingest through, or ``None`` when writes are synchronous."""
+    return ingest_buffer() if ingest_mode() == "buffered" else None
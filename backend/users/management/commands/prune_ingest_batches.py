@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from users.models import IngestBatch
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete telemetry idempotency keys older than --hours; a batch retried "
+        "after that is written again and deduplicated per sample. Intended to "
+        "run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=48,
+            help="Keep keys received within this many hours (default: 48).",
+        )
+
+    def handle(self, *args, **options):
+        if options["hours"] < 1:
+            raise CommandError("--hours must be at least 1.")
+
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        deleted, _ = IngestBatch.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} idempotency key(s).")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from users.battery_stats import fleet_battery_stats, rebuild_battery_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the running per-vehicle battery statistics from "
+        "VehicleStats, e.g. after samples were deleted, and report any drift."
+    )
+
+    def handle(self, *args, **options):
+        before = fleet_battery_stats()["samples"]
+        vehicles = rebuild_battery_stats()
+        after = fleet_battery_stats()["samples"]
+
+        line = f"  samples: {after}"
+        if after != before:
+            line += f" (drift {after - before:+d})"
+        self.stdout.write(line)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt battery stats for {vehicles} vehicle(s).")
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.counters import COUNTED_MODELS, rebuild_counters, summary_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the EntityCounter rows used by the admin dashboard from "
+        "live COUNT(*) queries and report any drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "keys",
+            nargs="*",
+            help=f"Counters to rebuild (default: all). One of: {', '.join(COUNTED_MODELS)}.",
+        )
+
+    def handle(self, *args, **options):
+        keys = options["keys"] or list(COUNTED_MODELS)
+        unknown = sorted(set(keys) - set(COUNTED_MODELS))
+        if unknown:
+            raise CommandError(f"Unknown counter(s): {', '.join(unknown)}")
+
+        before = summary_counts("counter")
+        after = rebuild_counters(keys)
+
+        for key in keys:
+            drift = after[key] - before[key]
+            line = f"  {key}: {after[key]}"
+            if drift:
+                line += f" (drift {drift:+d})"
+            self.stdout.write(line)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(keys)} counter(s)."))
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold trips, charging sessions and battery samples added since the "
+        "last run into VehicleDailyRollup. Intended to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild every day that has source data, except archived months.",
+        )
+        parser.add_argument(
+            "--since",
+            default=None,
+            help="Rebuild every day from this date (YYYY-MM-DD) onwards.",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = datetime.strptime(options["since"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+
+        report = refresh_rollups(full=options["full"], since=since)
+
+        for source, last_id in report["watermarks"].items():
+            self.stdout.write(f"  {source}: watermark {last_id}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report['mode'].capitalize()} refresh: {report['days']} day(s), "
+                f"{report['upserted']} rollup(s) upserted, {report['deleted']} deleted."
+            )
+        )
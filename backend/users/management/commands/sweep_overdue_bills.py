@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from users.bill_sweeper import sweep_overdue_bills
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark pending bills past their due date as overdue and notify their "
+        "customers. Intended to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the bills that would be marked overdue.",
+        )
+
+    def handle(self, *args, **options):
+        report = sweep_overdue_bills(dry_run=options["dry_run"])
+
+        if report["dry_run"]:
+            message = f"{report['marked_overdue']} bill(s) would be marked overdue."
+        else:
+            message = (
+                f"{report['marked_overdue']} bill(s) marked overdue, "
+                f"{report['notifications']} notification(s) created "
+                f"in {report['duration_ms']} ms."
+            )
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from users.partitioning import (
+    ARCHIVE_SCHEMA,
+    convert_to_partitioned,
+    detach_old_partitions,
+    ensure_future_partitions,
+    is_partitioned,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain monthly partitions of users_vehiclestats: create upcoming "
+        "partitions and detach/archive expired ones. Intended to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Convert an unpartitioned users_vehiclestats table first.",
+        )
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=3,
+            help="Number of future months to pre-create (default: 3).",
+        )
+        parser.add_argument(
+            "--retain-months",
+            type=int,
+            default=None,
+            help="Detach partitions older than this many months.",
+        )
+        parser.add_argument(
+            "--archive-schema",
+            default=ARCHIVE_SCHEMA,
+            help=f"Schema detached partitions are moved to (default: {ARCHIVE_SCHEMA}).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning is only supported on PostgreSQL.")
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if options["convert"]:
+                if convert_to_partitioned(cursor, months_ahead=options["ahead"]):
+                    self.stdout.write(
+                        self.style.SUCCESS("Converted users_vehiclestats to monthly partitions.")
+                    )
+
+            if not is_partitioned(cursor):
+                raise CommandError(
+                    "users_vehiclestats is not partitioned. Re-run with --convert."
+                )
+
+            created = ensure_future_partitions(cursor, options["ahead"])
+            for name in created:
+                self.stdout.write(f"  + {name}")
+
+            detached = []
+            if options["retain_months"] is not None:
+                detached = detach_old_partitions(
+                    cursor, options["retain_months"], options["archive_schema"]
+                )
+                for name in detached:
+                    self.stdout.write(f"  - {name}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(created)} partition(s), detached {len(detached)} partition(s)."
+            )
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.28 on 2026-10-17 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_add_profile_fields_to_user'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiclestats',
+            index=models.Index(fields=['vehicle', '-recorded_at'], name='users_vstats_vehicle_rec_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.28 on 2026-10-17 07:54
+
+from django.db import migrations, models
+
+
+COUNTED_MODELS = {
+    "companies": "Company",
+    "users": "User",
+    "vehicles": "Vehicle",
+    "vehicle_stats": "VehicleStats",
+    "trips": "Trip",
+    "charge_history": "ChargeHistory",
+    "tasks": "Task",
+    "service_tasks": "ServiceTask",
+    "services": "Service",
+    "issues": "Issues",
+    "notifications": "Notification",
+    "bills": "Bill",
+}
+
+
+def seed_counters(apps, schema_editor):
+    EntityCounter = apps.get_model("users", "EntityCounter")
+    EntityCounter.objects.bulk_create(
+        [
+            EntityCounter(
+                name=key, count=apps.get_model("users", model_name).objects.count()
+            )
+            for key, model_name in COUNTED_MODELS.items()
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_vehiclestats_vehicle_recorded_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntityCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.28 on 2026-10-17 08:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_scope_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('source', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VehicleDailyRollup',
+            fields=[
+                ('rollup_id', models.AutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('trip_count', models.IntegerField(default=0)),
+                ('distance', models.BigIntegerField(default=0)),
+                ('energy_used', models.BigIntegerField(default=0)),
+                ('charge_sessions', models.IntegerField(default=0)),
+                ('energy_added_kwh', models.BigIntegerField(default=0)),
+                ('charge_cost', models.BigIntegerField(default=0)),
+                ('stats_samples', models.IntegerField(default=0)),
+                ('battery_min', models.IntegerField(blank=True, null=True)),
+                ('battery_max', models.IntegerField(blank=True, null=True)),
+                ('battery_avg', models.FloatField(blank=True, null=True)),
+                ('temperature_min', models.IntegerField(blank=True, null=True)),
+                ('temperature_max', models.IntegerField(blank=True, null=True)),
+                ('temperature_avg', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='users.vehicle')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='users_rollup_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='vehicledailyrollup',
+            constraint=models.UniqueConstraint(fields=('vehicle', 'day'), name='users_rollup_vehicle_day_uniq'),
+        ),
+    ]
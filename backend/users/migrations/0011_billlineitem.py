@@ -0,0 +1,146 @@
+# Generated by Django 4.2.28 on 2026-10-17 08:31
+
+from decimal import Decimal, InvalidOperation
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BILLING_META_PREFIX = "[BILLING_META]"
+BATCH_SIZE = 2000
+# Bounds of the DecimalField(max_digits=10/12, decimal_places=2) columns.
+MAX_VALUE = Decimal("1e8")
+MAX_LINE_TOTAL = Decimal("1e10")
+
+
+def _split_billing_meta(description):
+    marker_index = description.rfind(BILLING_META_PREFIX)
+    if marker_index == -1:
+        return description, None
+
+    raw_json = description[marker_index + len(BILLING_META_PREFIX) :].strip()
+    try:
+        meta = json.loads(raw_json)
+    except (TypeError, ValueError):
+        return description, None
+    if not isinstance(meta, dict):
+        return description, None
+    return description[:marker_index].rstrip(), meta
+
+
+def _decimal(value, default):
+    try:
+        number = Decimal(str(float(value or default)))
+    except (TypeError, ValueError, InvalidOperation):
+        return None
+    if not number.is_finite() or abs(number) >= MAX_VALUE:
+        return None
+    return number.quantize(Decimal("0.01"))
+
+
+def move_billing_meta(apps, schema_editor):
+    Bill = apps.get_model("users", "Bill")
+    BillLineItem = apps.get_model("users", "BillLineItem")
+    Issues = apps.get_model("users", "Issues")
+
+    last_id = 0
+    while True:
+        # Keyset batches rather than an open cursor: the loop rewrites the
+        # rows it reads.
+        batch = list(
+            Issues.objects.filter(
+                issue_id__gt=last_id, description__contains=BILLING_META_PREFIX
+            )
+            .only("issue_id", "description")
+            .order_by("issue_id")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1].issue_id
+
+        # A bill only records the first issue it covered; lines of older
+        # bills that cannot be matched keep no bill.
+        bills = dict(
+            Bill.objects.filter(issue_id__in=[issue.issue_id for issue in batch])
+            .order_by("bill_id")
+            .values_list("issue_id", "bill_id")
+        )
+
+        issues, line_items = [], []
+        for issue in batch:
+            description, meta = _split_billing_meta(issue.description)
+            if meta is None:
+                continue
+            qty = _decimal(meta.get("qty"), 1)
+            rate = _decimal(meta.get("rate"), 0)
+            tax = _decimal(meta.get("tax"), 0)
+            if qty is None or rate is None or tax is None:
+                continue
+            line_total = (qty * rate + tax).quantize(Decimal("0.01"))
+            if abs(line_total) >= MAX_LINE_TOTAL:
+                continue
+
+            issue.description = description
+            issues.append(issue)
+            line_items.append(
+                BillLineItem(
+                    bill_id=bills.get(issue.issue_id),
+                    issue_id=issue.issue_id,
+                    qty=qty,
+                    rate=rate,
+                    tax=tax,
+                    line_total=line_total,
+                )
+            )
+
+        BillLineItem.objects.bulk_create(line_items)
+        Issues.objects.bulk_update(issues, ["description"])
+
+
+def restore_billing_meta(apps, schema_editor):
+    BillLineItem = apps.get_model("users", "BillLineItem")
+    Issues = apps.get_model("users", "Issues")
+
+    latest = {}
+    for line_item in BillLineItem.objects.order_by("line_item_id"):
+        latest[line_item.issue_id] = line_item
+
+    issues = list(Issues.objects.filter(issue_id__in=latest).only("issue_id", "description"))
+    for issue in issues:
+        line_item = latest[issue.issue_id]
+        payload = {
+            "qty": float(line_item.qty),
+            "rate": float(line_item.rate),
+            "tax": float(line_item.tax),
+        }
+        issue.description = (
+            f"{issue.description} {BILLING_META_PREFIX} {json.dumps(payload)}"
+        )
+    Issues.objects.bulk_update(issues, ["description"], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_vehicledailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillLineItem',
+            fields=[
+                ('line_item_id', models.AutoField(primary_key=True, serialize=False)),
+                ('qty', models.DecimalField(decimal_places=2, default=1, max_digits=10)),
+                ('rate', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('tax', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('line_total', models.DecimalField(decimal_places=2, default=0.0, max_digits=12)),
+                ('bill', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='users.bill')),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='line_items', to='users.issues')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['issue', '-line_item_id'], name='users_lineitem_issue_idx')],
+            },
+        ),
+        migrations.RunPython(move_billing_meta, restore_billing_meta),
+    ]
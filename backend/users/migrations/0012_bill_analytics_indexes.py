@@ -0,0 +1,21 @@
+# Generated by Django 4.2.28 on 2026-10-17 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_billlineitem'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['payment_status', 'due_date'], name='users_bill_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['bill_date'], name='users_bill_date_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.28 on 2026-10-17 08:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+STATE_FIELDS = (
+    "battery_percentage",
+    "total",
+    "battery_health",
+    "charging_time",
+    "temperature",
+    "battery_capacity",
+    "is_charging",
+    "estimated_range",
+    "recorded_at",
+)
+
+
+def backfill_current_state(apps, schema_editor):
+    Vehicle = apps.get_model("users", "Vehicle")
+    VehicleStats = apps.get_model("users", "VehicleStats")
+    VehicleCurrentState = apps.get_model("users", "VehicleCurrentState")
+
+    states = []
+    for vehicle_id in Vehicle.objects.values_list("vehicle_id", flat=True).iterator():
+        # Served by the (vehicle, -recorded_at) index.
+        latest = (
+            VehicleStats.objects.filter(vehicle_id=vehicle_id)
+            .order_by("-recorded_at", "-stats_id")
+            .values(*STATE_FIELDS)
+            .first()
+        )
+        if latest:
+            states.append(VehicleCurrentState(vehicle_id=vehicle_id, **latest))
+    VehicleCurrentState.objects.bulk_create(states, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_bill_analytics_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleCurrentState',
+            fields=[
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='current_state', serialize=False, to='users.vehicle')),
+                ('battery_percentage', models.IntegerField()),
+                ('total', models.IntegerField()),
+                ('battery_health', models.IntegerField()),
+                ('charging_time', models.IntegerField()),
+                ('temperature', models.IntegerField()),
+                ('battery_capacity', models.IntegerField()),
+                ('is_charging', models.BooleanField(default=False)),
+                ('estimated_range', models.IntegerField()),
+                ('recorded_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_current_state, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def _free_timestamps(VehicleStats, vehicle_id, start, needed):
+    """
+    The first ``needed`` timestamps after ``start``, a microsecond apart,
+    at which ``vehicle_id`` has no sample yet.
+    """
+    step = timedelta(microseconds=1)
+    free = []
+    candidate = start
+    while len(free) < needed:
+        window_end = candidate + step * (needed - len(free))
+        taken = set(
+            VehicleStats.objects.filter(
+                vehicle_id=vehicle_id,
+                recorded_at__gt=candidate,
+                recorded_at__lte=window_end,
+            ).values_list("recorded_at", flat=True)
+        )
+        while candidate < window_end:
+            candidate += step
+            if candidate not in taken:
+                free.append(candidate)
+    return free
+
+
+def spread_duplicate_timestamps(apps, schema_editor):
+    """
+    Before (vehicle, recorded_at) becomes unique: COPY-ingested batches
+    stamped every sample with one server time, so samples of a vehicle in
+    the same batch share a timestamp.
+
+    These rows are kept on purpose rather than deduplicated. They are
+    distinct readings that happened to be stamped alike, not retried
+    copies of one reading, so dropping them would lose data. The retried
+    copies that inflated averages are stopped from now on by the
+    constraint, and ingest now stores the time the device sends. Each
+    later row moves to the first free microsecond after the shared
+    timestamp, skipping any sample already stored there, so migration
+    0015 cannot fail on a collision.
+    """
+    VehicleStats = apps.get_model("users", "VehicleStats")
+
+    duplicates = list(
+        VehicleStats.objects.values("vehicle_id", "recorded_at")
+        .annotate(samples=Count("stats_id"))
+        .filter(samples__gt=1)
+        .order_by("vehicle_id", "recorded_at")
+    )
+    for group in duplicates:
+        rows = list(
+            VehicleStats.objects.filter(
+                vehicle_id=group["vehicle_id"], recorded_at=group["recorded_at"]
+            )
+            .only("stats_id", "recorded_at")
+            .order_by("stats_id")
+        )[1:]
+        free = _free_timestamps(
+            VehicleStats, group["vehicle_id"], group["recorded_at"], len(rows)
+        )
+        for row, recorded_at in zip(rows, free):
+            row.recorded_at = recorded_at
+        # Saved per group, so later groups see these timestamps as taken.
+        VehicleStats.objects.bulk_update(rows, ["recorded_at"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_vehiclecurrentstate'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_duplicate_timestamps, migrations.RunPython.noop),
+    ]
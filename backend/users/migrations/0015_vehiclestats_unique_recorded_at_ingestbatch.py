@@ -0,0 +1,48 @@
+# Generated by Django 4.2.28 on 2026-10-17 08:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_spread_duplicate_vehiclestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestBatch',
+            fields=[
+                ('batch_id', models.AutoField(primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=255)),
+                ('payload_hash', models.CharField(max_length=64)),
+                ('report', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='vehiclestats',
+            name='recorded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name='vehiclestats',
+            constraint=models.UniqueConstraint(fields=('vehicle', 'recorded_at'), name='users_vstats_vehicle_rec_uniq'),
+        ),
+        migrations.AddField(
+            model_name='ingestbatch',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingest_batches', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='ingestbatch',
+            index=models.Index(fields=['created_at'], name='users_ingest_batch_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='ingestbatch',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='users_ingest_batch_key_uniq'),
+        ),
+    ]
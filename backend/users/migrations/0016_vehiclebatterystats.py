@@ -0,0 +1,59 @@
+# Generated by Django 4.2.28 on 2026-10-17 08:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+TRACKED_METRICS = ("battery_health", "temperature", "battery_percentage")
+
+
+def backfill_battery_stats(apps, schema_editor):
+    VehicleStats = apps.get_model("users", "VehicleStats")
+    VehicleBatteryStats = apps.get_model("users", "VehicleBatteryStats")
+
+    aggregates = {"samples": models.Count("stats_id")}
+    for metric in TRACKED_METRICS:
+        aggregates[f"{metric}_mean"] = models.Avg(metric)
+        aggregates[f"{metric}_var"] = models.Variance(metric)
+        aggregates[f"{metric}_min"] = models.Min(metric)
+        aggregates[f"{metric}_max"] = models.Max(metric)
+
+    rows = []
+    for values in (
+        VehicleStats.objects.values("vehicle_id").annotate(**aggregates).iterator()
+    ):
+        for metric in TRACKED_METRICS:
+            values[f"{metric}_m2"] = float(values.pop(f"{metric}_var")) * values["samples"]
+        rows.append(VehicleBatteryStats(**values))
+    VehicleBatteryStats.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_vehiclestats_unique_recorded_at_ingestbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleBatteryStats',
+            fields=[
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='battery_stats', serialize=False, to='users.vehicle')),
+                ('samples', models.BigIntegerField(default=0)),
+                ('battery_health_mean', models.FloatField(default=0)),
+                ('battery_health_m2', models.FloatField(default=0)),
+                ('battery_health_min', models.IntegerField(blank=True, null=True)),
+                ('battery_health_max', models.IntegerField(blank=True, null=True)),
+                ('temperature_mean', models.FloatField(default=0)),
+                ('temperature_m2', models.FloatField(default=0)),
+                ('temperature_min', models.IntegerField(blank=True, null=True)),
+                ('temperature_max', models.IntegerField(blank=True, null=True)),
+                ('battery_percentage_mean', models.FloatField(default=0)),
+                ('battery_percentage_m2', models.FloatField(default=0)),
+                ('battery_percentage_min', models.IntegerField(blank=True, null=True)),
+                ('battery_percentage_max', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_battery_stats, migrations.RunPython.noop),
+    ]
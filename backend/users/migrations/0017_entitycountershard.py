@@ -0,0 +1,27 @@
+# Generated by Django 4.2.28 on 2026-10-17 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0016_vehiclebatterystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntityCounterShard',
+            fields=[
+                ('shard_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50)),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='entitycountershard',
+            constraint=models.UniqueConstraint(fields=('name', 'shard'), name='users_counter_shard_uniq'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.28 on 2026-10-17 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0017_entitycountershard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPartition',
+            fields=[
+                ('month', models.DateField(primary_key=True, serialize=False)),
+                ('table_name', models.CharField(max_length=128)),
+                ('detached_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -4,7 +4,10 @@ from django.contrib.auth.models import (
     PermissionsMixin,
     BaseUserManager,
 )
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 
 class CustomUserManager(BaseUserManager):
@@ -80,6 +83,20 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = CustomUserManager()
 
+    class Meta:
+        # Trigram indexes back the admin scope search, which filters with
+        # icontains (UPPER(col) LIKE UPPER(%q%)) on PostgreSQL.
+        indexes = [
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="users_user_name_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("email"), name="gin_trgm_ops"),
+                name="users_user_email_trgm",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name} <{self.email}>"
 
@@ -104,6 +121,14 @@ class Vehicle(models.Model):
     is_active = models.BooleanField(default=True)
     deactivated_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                OpClass(Upper("registration_number"), name="gin_trgm_ops"),
+                name="users_vehicle_regno_trgm",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.vehicle_model} ({self.registration_number})"
 
@@ -139,12 +164,111 @@ class VehicleStats(models.Model):
     battery_capacity = models.IntegerField()
     is_charging = models.BooleanField(default=False)
     estimated_range = models.IntegerField()
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    # Supplied by the device for ingested samples, so a retried sample maps
+    # onto the same (vehicle, recorded_at) key.
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vehicle", "recorded_at"], name="users_vstats_vehicle_rec_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["vehicle", "-recorded_at"],
+                name="users_vstats_vehicle_rec_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Stats {self.stats_id} - Vehicle {self.vehicle_id}"
 
 
+class IngestBatch(models.Model):
+    """Idempotency key of a telemetry batch and the report it was acknowledged with."""
+
+    batch_id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="ingest_batches"
+    )
+    key = models.CharField(max_length=255)
+    payload_hash = models.CharField(max_length=64)
+    report = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="users_ingest_batch_key_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["created_at"], name="users_ingest_batch_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Ingest batch {self.key} - User {self.user_id}"
+
+
+class VehicleCurrentState(models.Model):
+    """
+    Latest telemetry sample of a vehicle, upserted by every telemetry write
+    (ingest batches and ``VehicleStats`` saves through the ORM).
+    """
+
+    vehicle = models.OneToOneField(
+        Vehicle,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="current_state",
+    )
+    battery_percentage = models.IntegerField()
+    total = models.IntegerField()
+    battery_health = models.IntegerField()
+    charging_time = models.IntegerField()
+    temperature = models.IntegerField()
+    battery_capacity = models.IntegerField()
+    is_charging = models.BooleanField(default=False)
+    estimated_range = models.IntegerField()
+    recorded_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Current state - Vehicle {self.vehicle_id}"
+
+
+class VehicleBatteryStats(models.Model):
+    """
+    Running count, mean, sum of squared deviations (``*_m2``), min and max
+    of a vehicle's battery telemetry, folded in as samples are written.
+    """
+
+    vehicle = models.OneToOneField(
+        Vehicle,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="battery_stats",
+    )
+    samples = models.BigIntegerField(default=0)
+    battery_health_mean = models.FloatField(default=0)
+    battery_health_m2 = models.FloatField(default=0)
+    battery_health_min = models.IntegerField(null=True, blank=True)
+    battery_health_max = models.IntegerField(null=True, blank=True)
+    temperature_mean = models.FloatField(default=0)
+    temperature_m2 = models.FloatField(default=0)
+    temperature_min = models.IntegerField(null=True, blank=True)
+    temperature_max = models.IntegerField(null=True, blank=True)
+    battery_percentage_mean = models.FloatField(default=0)
+    battery_percentage_m2 = models.FloatField(default=0)
+    battery_percentage_min = models.IntegerField(null=True, blank=True)
+    battery_percentage_max = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Battery stats - Vehicle {self.vehicle_id}"
+
+
 class ChargeHistory(models.Model):
     charge_id = models.AutoField(primary_key=True)
     vehicle = models.ForeignKey(
@@ -333,6 +457,14 @@ class Bill(models.Model):
     payment_date = models.DateTimeField(null=True, blank=True)
     notes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["payment_status", "due_date"], name="users_bill_status_due_idx"
+            ),
+            models.Index(fields=["bill_date"], name="users_bill_date_idx"),
+        ]
+
     def __str__(self):
         return f"Bill {self.bill_id} - {self.customer.name} - ₹{self.total_amount}"
 
@@ -341,3 +473,126 @@ class Bill(models.Model):
         self.tax_amount = (self.subtotal * self.tax_percentage) / 100
         self.total_amount = self.subtotal + self.tax_amount - self.discount
         return self.total_amount
+
+
+class BillLineItem(models.Model):
+    """One billed item; the latest line for an issue holds its billing terms."""
+
+    line_item_id = models.AutoField(primary_key=True)
+    bill = models.ForeignKey(
+        Bill, on_delete=models.CASCADE, null=True, blank=True, related_name="line_items"
+    )
+    issue = models.ForeignKey(
+        Issues, on_delete=models.PROTECT, related_name="line_items"
+    )
+    qty = models.DecimalField(max_digits=10, decimal_places=2, default=1)
+    rate = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    tax = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    line_total = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["issue", "-line_item_id"], name="users_lineitem_issue_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Line item {self.line_item_id} - Issue {self.issue_id}"
+
+
+class EntityCounter(models.Model):
+    """Denormalized row count per entity, kept current by signals."""
+
+    name = models.CharField(max_length=50, primary_key=True)
+    count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.count}"
+
+
+class EntityCounterShard(models.Model):
+    """
+    Changes to an ``EntityCounter`` since it was last rebuilt, spread over
+    a few rows per entity so concurrent writers do not queue on one lock.
+    """
+
+    shard_id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=50)
+    shard = models.PositiveSmallIntegerField()
+    count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "shard"], name="users_counter_shard_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name}[{self.shard}]: {self.count}"
+
+
+class ArchivedPartition(models.Model):
+    """
+    A month of ``users_vehiclestats`` detached from the live table by
+    ``vehiclestats_partitions --retain-months``. Kept after the archived
+    table itself is dumped or dropped, so rollup rebuilds leave those days alone.
+    """
+
+    month = models.DateField(primary_key=True)
+    table_name = models.CharField(max_length=128)
+    detached_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}: {self.table_name}"
+
+
+class VehicleDailyRollup(models.Model):
+    """Per-vehicle, per-day aggregates of trips, charging and battery samples."""
+
+    rollup_id = models.AutoField(primary_key=True)
+    vehicle = models.ForeignKey(
+        Vehicle, on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    day = models.DateField()
+    trip_count = models.IntegerField(default=0)
+    distance = models.BigIntegerField(default=0)
+    energy_used = models.BigIntegerField(default=0)
+    charge_sessions = models.IntegerField(default=0)
+    energy_added_kwh = models.BigIntegerField(default=0)
+    charge_cost = models.BigIntegerField(default=0)
+    stats_samples = models.IntegerField(default=0)
+    battery_min = models.IntegerField(null=True, blank=True)
+    battery_max = models.IntegerField(null=True, blank=True)
+    battery_avg = models.FloatField(null=True, blank=True)
+    temperature_min = models.IntegerField(null=True, blank=True)
+    temperature_max = models.IntegerField(null=True, blank=True)
+    temperature_avg = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vehicle", "day"], name="users_rollup_vehicle_day_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="users_rollup_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"Rollup {self.day} - Vehicle {self.vehicle_id}"
+
+
+class RollupWatermark(models.Model):
+    """Highest primary key of a source table already folded into the rollups."""
+
+    source = models.CharField(max_length=50, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: {self.last_id}"
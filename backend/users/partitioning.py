@@ -0,0 +1,211 @@
+"""
+Monthly range partitioning for the ``users_vehiclestats`` time series.
+
+Partitioning is PostgreSQL-only and opt-in: the conversion is run by the
+``vehiclestats_partitions --convert`` command, never by a migration, so the
+migrated schema does not depend on settings. The parent table keeps its name so the ORM is unaffected; each month lives
+in ``users_vehiclestats_pYYYY_MM`` and a default partition catches samples
+that fall outside the pre-created range.
+"""
+
+import re
+from datetime import date, timedelta
+
+from django.db import connection
+
+from .models import ArchivedPartition
+
+PARENT_TABLE = "users_vehiclestats"
+LEGACY_TABLE = "users_vehiclestats_legacy"
+DEFAULT_PARTITION = "users_vehiclestats_default"
+SEQUENCE_NAME = "users_vehiclestats_part_stats_id_seq"
+INDEX_NAME = "users_vstats_vehicle_rec_idx"
+UNIQUE_NAME = "users_vstats_vehicle_rec_uniq"
+VEHICLE_FK_NAME = "users_vehiclestats_vehicle_id_part_fk"
+ARCHIVE_SCHEMA = "archive"
+
+PARTITION_NAME_RE = re.compile(r"^users_vehiclestats_p(\d{4})_(\d{2})$")
+
+
+def add_months(month_start, months):
+    index = month_start.year * 12 + (month_start.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month_start):
+    return f"{PARENT_TABLE}_p{month_start.year:04d}_{month_start.month:02d}"
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace",
+        [PARENT_TABLE],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor):
+    """Return ``{month_start: partition_name}`` for attached monthly partitions."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = %s "
+        "AND parent.relnamespace = current_schema()::regnamespace",
+        [PARENT_TABLE],
+    )
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def create_partition(cursor, month_start):
+    name = partition_name(month_start)
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS {} PARTITION OF {} "
+        "FOR VALUES FROM (%s) TO (%s)".format(
+            connection.ops.quote_name(name), connection.ops.quote_name(PARENT_TABLE)
+        ),
+        [month_start.isoformat(), add_months(month_start, 1).isoformat()],
+    )
+    return name
+
+
+def ensure_future_partitions(cursor, months_ahead, today=None):
+    """Create partitions from the current month through ``months_ahead`` months."""
+    current = (today or date.today()).replace(day=1)
+    existing = list_partitions(cursor)
+    created = []
+    for offset in range(months_ahead + 1):
+        month_start = add_months(current, offset)
+        if month_start not in existing:
+            created.append(create_partition(cursor, month_start))
+    return created
+
+
+def detach_old_partitions(cursor, retain_months, archive_schema=ARCHIVE_SCHEMA, today=None):
+    """
+    Detach partitions older than ``retain_months`` and move them into
+    ``archive_schema`` so they can be dumped or dropped out of band. Each
+    month is recorded in ``ArchivedPartition`` for the rollup rebuilds.
+    """
+    cutoff = add_months((today or date.today()).replace(day=1), -retain_months)
+    quote = connection.ops.quote_name
+    detached = []
+
+    for month_start, name in sorted(list_partitions(cursor).items()):
+        if month_start >= cutoff:
+            continue
+        cursor.execute(
+            "ALTER TABLE {} DETACH PARTITION {}".format(quote(PARENT_TABLE), quote(name))
+        )
+        cursor.execute("CREATE SCHEMA IF NOT EXISTS {}".format(quote(archive_schema)))
+        cursor.execute(
+            "ALTER TABLE {} SET SCHEMA {}".format(quote(name), quote(archive_schema))
+        )
+        ArchivedPartition.objects.update_or_create(
+            month=month_start, defaults={"table_name": f"{archive_schema}.{name}"}
+        )
+        detached.append(f"{archive_schema}.{name}")
+
+    return detached
+
+
+def archived_ranges():
+    """``(first_day, last_day)`` of every archived month, oldest first."""
+    return [
+        (month, add_months(month, 1) - timedelta(days=1))
+        for month in ArchivedPartition.objects.order_by("month").values_list(
+            "month", flat=True
+        )
+    ]
+
+
+def convert_to_partitioned(cursor, months_ahead=3):
+    """
+    Rebuild ``users_vehiclestats`` as a table partitioned by month on
+    ``recorded_at`` and copy existing samples into it.
+
+    PostgreSQL requires the partition key in the primary key and (before 17)
+    does not allow identity columns on partitioned tables, so the new parent
+    uses ``(stats_id, recorded_at)`` as its key and an explicit sequence.
+    """
+    if is_partitioned(cursor):
+        return False
+
+    quote = connection.ops.quote_name
+    parent, legacy = quote(PARENT_TABLE), quote(LEGACY_TABLE)
+
+    # The (vehicle_id, recorded_at) key includes the partition column, so it
+    # can be carried over when it exists.
+    cursor.execute(
+        "SELECT 1 FROM pg_constraint WHERE conname = %s AND conrelid = %s::regclass",
+        [UNIQUE_NAME, PARENT_TABLE],
+    )
+    has_unique = cursor.fetchone() is not None
+
+    cursor.execute("ALTER TABLE {} RENAME TO {}".format(parent, legacy))
+    cursor.execute(
+        "CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (recorded_at)".format(parent, legacy)
+    )
+    cursor.execute(
+        "CREATE SEQUENCE {} OWNED BY {}.stats_id".format(quote(SEQUENCE_NAME), parent)
+    )
+    cursor.execute(
+        "SELECT setval(%s, COALESCE((SELECT MAX(stats_id) FROM {}), 0) + 1, false)".format(
+            legacy
+        ),
+        [SEQUENCE_NAME],
+    )
+    cursor.execute(
+        "ALTER TABLE {} ALTER COLUMN stats_id SET DEFAULT nextval(%s::regclass)".format(
+            parent
+        ),
+        [SEQUENCE_NAME],
+    )
+    cursor.execute("ALTER TABLE {} ADD PRIMARY KEY (stats_id, recorded_at)".format(parent))
+    cursor.execute(
+        "ALTER TABLE {} ADD CONSTRAINT {} FOREIGN KEY (vehicle_id) "
+        "REFERENCES {} (vehicle_id) DEFERRABLE INITIALLY DEFERRED".format(
+            parent, quote(VEHICLE_FK_NAME), quote("users_vehicle")
+        )
+    )
+
+    cursor.execute("SELECT MIN(recorded_at) FROM {}".format(legacy))
+    oldest = cursor.fetchone()[0]
+    first_month = (oldest.date() if oldest else date.today()).replace(day=1)
+    last_month = add_months(date.today().replace(day=1), months_ahead)
+
+    month_start = first_month
+    while month_start <= last_month:
+        create_partition(cursor, month_start)
+        month_start = add_months(month_start, 1)
+
+    cursor.execute(
+        "CREATE TABLE {} PARTITION OF {} DEFAULT".format(quote(DEFAULT_PARTITION), parent)
+    )
+
+    cursor.execute("INSERT INTO {} SELECT * FROM {}".format(parent, legacy))
+    cursor.execute("DROP TABLE {}".format(legacy))
+
+    # Recreate the composite index on the parent once the legacy copy (and
+    # its index of the same name) is gone; it cascades to every partition.
+    cursor.execute(
+        "CREATE INDEX {} ON {} (vehicle_id, recorded_at DESC)".format(
+            quote(INDEX_NAME), parent
+        )
+    )
+    if has_unique:
+        cursor.execute(
+            "ALTER TABLE {} ADD CONSTRAINT {} UNIQUE (vehicle_id, recorded_at)".format(
+                parent, quote(UNIQUE_NAME)
+            )
+        )
+    return True
+
@@ -0,0 +1,182 @@
+"""
+Service pricing catalog backed by ``data/service_pricing.csv``.
+
+``pricing_catalog`` parses the file once per process into a dict keyed by
+normalized service name and reparses only when the file's mtime/size
+change, so billing requests pay for a ``stat()`` instead of a CSV parse.
+
+Appends (``add_missing``) are serialized across processes with an
+exclusive lock on a sidecar ``.lock`` file; the new contents are written
+to a temporary file and swapped in with ``os.replace``, so readers never
+see a half-written catalog.
+"""
+
+import csv
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized per process.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PRICING_FILE_PATH = Path(__file__).resolve().parents[1] / "data" / "service_pricing.csv"
+FIELDNAMES = ("service_name", "price", "description")
+
+# ``entries``: normalized name -> {"name", "price", "description"} (the last
+# row for a name wins). ``products``: one product per name (the first row
+# wins) with ids in file order, sorted by name for the billing form.
+CatalogSnapshot = namedtuple("CatalogSnapshot", ["entries", "products"])
+
+
+def normalize_name(value: str) -> str:
+    return " ".join((value or "").strip().lower().split())
+
+
+def _parse(text):
+    entries = {}
+    first_rows = {}
+    for row in csv.DictReader(io.StringIO(text)):
+        service_name = (row.get("service_name") or "").strip()
+        if not service_name:
+            continue
+
+        try:
+            price = float(row.get("price") or 0)
+        except (TypeError, ValueError):
+            price = 0.0
+
+        entry = {
+            "name": service_name,
+            "price": round(price, 2),
+            "description": (row.get("description") or "").strip(),
+        }
+        key = normalize_name(service_name)
+        entries[key] = entry
+        first_rows.setdefault(key, entry)
+
+    products = sorted(
+        (
+            {**entry, "id": index + 1, "source": "pricing_catalog"}
+            for index, entry in enumerate(first_rows.values())
+        ),
+        key=lambda item: item["name"].lower(),
+    )
+    return CatalogSnapshot(entries, products)
+
+
+class PricingCatalog:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._snapshot = CatalogSnapshot({}, [])
+
+    def _file_stamp(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read(self):
+        try:
+            with self.path.open("r", newline="", encoding="utf-8") as csv_file:
+                return csv_file.read()
+        except FileNotFoundError:
+            return ""
+
+    def snapshot(self):
+        """The current catalog, reparsed only if the file changed."""
+        stamp = self._file_stamp()
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._snapshot = _parse(self._read())
+                    self._stamp = stamp
+        return self._snapshot
+
+    def get(self, name):
+        return self.snapshot().entries.get(normalize_name(name))
+
+    @contextmanager
+    def _file_lock(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add_missing(self, rows):
+        """
+        Append the ``rows`` ({"service_name", "price", "description"}) whose
+        names are not in the catalog yet. Returns the number appended.
+        """
+        if not rows:
+            return 0
+
+        with self._file_lock():
+            # Re-read under the lock: another process may have appended.
+            text = self._read()
+            known = set(_parse(text).entries)
+            new_rows = []
+            for row in rows:
+                key = normalize_name(row["service_name"])
+                if key and key not in known:
+                    known.add(key)
+                    new_rows.append(row)
+            if not new_rows:
+                return 0
+
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=FIELDNAMES)
+            if not text:
+                writer.writeheader()
+            elif not text.endswith("\n"):
+                buffer.write("\n")
+            for row in new_rows:
+                writer.writerow(
+                    {
+                        "service_name": row["service_name"],
+                        "price": f"{float(row['price']):.2f}",
+                        "description": row.get("description", ""),
+                    }
+                )
+
+            fd, temp_path = tempfile.mkstemp(
+                dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp"
+            )
+            try:
+                # mkstemp creates the file 0600; keep the catalog's mode.
+                if text:
+                    shutil.copymode(self.path, temp_path)
+                else:
+                    os.chmod(temp_path, 0o644)
+                with os.fdopen(fd, "w", newline="", encoding="utf-8") as temp_file:
+                    temp_file.write(text)
+                    temp_file.write(buffer.getvalue())
+                    temp_file.flush()
+                    os.fsync(temp_file.fileno())
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+
+        logger.info(f"Added {len(new_rows)} service(s) to the pricing catalog")
+        return len(new_rows)
+
+
+pricing_catalog = PricingCatalog(PRICING_FILE_PATH)
@@ -0,0 +1,381 @@
+"""
+Materialized per-vehicle daily rollups of trips, charging sessions and
+battery samples.
+
+``refresh_rollups`` folds rows added since the previous run into
+``VehicleDailyRollup``: each source keeps a primary-key watermark in
+``RollupWatermark``, the (vehicle, day) pairs touched by newer rows are
+recomputed from the raw tables and upserted. A full (or ``since``)
+rebuild recomputes every day in range, which also picks up edits and
+deletes of already-processed rows. Days in months whose telemetry
+partition was detached (``ArchivedPartition``) are never recomputed or
+deleted, as their raw samples are no longer in the live table.
+
+``daily_summary`` serves dashboard ranges: ranges longer than a day read
+the rollups, shorter ones aggregate the raw rows with the same queries.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    ChargeHistory,
+    RollupWatermark,
+    Trip,
+    VehicleDailyRollup,
+    VehicleStats,
+)
+from .partitioning import archived_ranges
+
+DEFAULT_SUMMARY_DAYS = 30
+REBUILD_CHUNK_DAYS = 31
+
+ROLLUP_FIELDS = (
+    "trip_count",
+    "distance",
+    "energy_used",
+    "charge_sessions",
+    "energy_added_kwh",
+    "charge_cost",
+    "stats_samples",
+    "battery_min",
+    "battery_max",
+    "battery_avg",
+    "temperature_min",
+    "temperature_max",
+    "temperature_avg",
+)
+
+# source name -> (model, primary key field, day expression)
+ROLLUP_SOURCES = {
+    "trips": (Trip, "trip_id", TruncDate("start_date")),
+    "charge_history": (ChargeHistory, "charge_id", F("charge_date")),
+    "vehicle_stats": (VehicleStats, "stats_id", TruncDate("recorded_at")),
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _empty_rollup():
+    values = dict.fromkeys(ROLLUP_FIELDS, 0)
+    for field in ROLLUP_FIELDS:
+        if field.startswith(("battery_", "temperature_")):
+            values[field] = None
+    return values
+
+
+def aggregate_raw(first_day, last_day, vehicle_ids=None):
+    """
+    Aggregate raw rows for ``first_day``..``last_day`` (inclusive) into
+    ``{(vehicle_id, day): rollup values}`` with one grouped query per source.
+    """
+    start, end = _day_start(first_day), _day_start(last_day + timedelta(days=1))
+    vehicle_filter = Q() if vehicle_ids is None else Q(vehicle_id__in=vehicle_ids)
+    rows = defaultdict(_empty_rollup)
+
+    trips = (
+        Trip.objects.filter(vehicle_filter, start_date__gte=start, start_date__lt=end)
+        .annotate(day=TruncDate("start_date"))
+        .values("vehicle_id", "day")
+        .annotate(
+            trip_count=Count("trip_id"),
+            distance=Sum("distance"),
+            energy_used=Sum("battery_used"),
+        )
+        .order_by()
+    )
+    for row in trips:
+        rows[(row.pop("vehicle_id"), row.pop("day"))].update(row)
+
+    charges = (
+        ChargeHistory.objects.filter(
+            vehicle_filter, charge_date__gte=first_day, charge_date__lte=last_day
+        )
+        .values("vehicle_id", day=F("charge_date"))
+        .annotate(
+            charge_sessions=Count("charge_id"),
+            energy_added_kwh=Sum("energy_added_kwh"),
+            charge_cost=Sum("cost"),
+        )
+        .order_by()
+    )
+    for row in charges:
+        rows[(row.pop("vehicle_id"), row.pop("day"))].update(row)
+
+    stats = (
+        VehicleStats.objects.filter(
+            vehicle_filter, recorded_at__gte=start, recorded_at__lt=end
+        )
+        .annotate(day=TruncDate("recorded_at"))
+        .values("vehicle_id", "day")
+        .annotate(
+            stats_samples=Count("stats_id"),
+            battery_min=Min("battery_percentage"),
+            battery_max=Max("battery_percentage"),
+            battery_avg=Avg("battery_percentage"),
+            temperature_min=Min("temperature"),
+            temperature_max=Max("temperature"),
+            temperature_avg=Avg("temperature"),
+        )
+        .order_by()
+    )
+    for row in stats:
+        rows[(row.pop("vehicle_id"), row.pop("day"))].update(row)
+
+    return rows
+
+
+def rebuild_range(first_day, last_day, vehicle_ids=None):
+    """
+    Recompute rollups for ``first_day``..``last_day`` (inclusive), limited
+    to ``vehicle_ids`` when given, and drop rows whose source data is gone.
+
+    Returns ``(upserted, deleted)``.
+    """
+    rows = aggregate_raw(first_day, last_day, vehicle_ids)
+    VehicleDailyRollup.objects.bulk_create(
+        [
+            VehicleDailyRollup(vehicle_id=vehicle_id, day=day, **values)
+            for (vehicle_id, day), values in rows.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["vehicle", "day"],
+        update_fields=list(ROLLUP_FIELDS) + ["updated_at"],
+        batch_size=1000,
+    )
+
+    stale = VehicleDailyRollup.objects.filter(day__gte=first_day, day__lte=last_day)
+    if vehicle_ids is not None:
+        stale = stale.filter(vehicle_id__in=vehicle_ids)
+    stale_ids = [
+        rollup_id
+        for rollup_id, vehicle_id, day in stale.values_list(
+            "rollup_id", "vehicle_id", "day"
+        )
+        if (vehicle_id, day) not in rows
+    ]
+    deleted = 0
+    if stale_ids:
+        deleted, _ = VehicleDailyRollup.objects.filter(rollup_id__in=stale_ids).delete()
+    return len(rows), deleted
+
+
+def _source_bounds():
+    """Current maximum primary key of every source table."""
+    bounds = {}
+    for source, (model, pk_field, _) in ROLLUP_SOURCES.items():
+        bounds[source] = model.objects.aggregate(last=Max(pk_field))["last"] or 0
+    return bounds
+
+
+def _touched_pairs(watermarks, bounds):
+    """
+    ``{day: {vehicle_id}}`` for rows added between the watermarks and bounds.
+
+    Primary keys are handed out before commit, so a row whose transaction
+    was still open during a run can fall behind the watermark; periodic
+    ``since`` rebuilds cover that window.
+    """
+    touched = defaultdict(set)
+    for source, (model, pk_field, day_expression) in ROLLUP_SOURCES.items():
+        low, high = watermarks.get(source, 0), bounds[source]
+        if high <= low:
+            continue
+        pairs = (
+            model.objects.filter(**{f"{pk_field}__gt": low, f"{pk_field}__lte": high})
+            .annotate(day=day_expression)
+            .values_list("vehicle_id", "day")
+            .distinct()
+            .order_by()
+        )
+        for vehicle_id, day in pairs:
+            touched[day].add(vehicle_id)
+    return touched
+
+
+def _full_span(since=None):
+    days = []
+    for model, _, day_expression in ROLLUP_SOURCES.values():
+        span = model.objects.annotate(day=day_expression).aggregate(
+            first=Min("day"), last=Max("day")
+        )
+        if span["first"] is not None:
+            days.extend([span["first"], span["last"]])
+    if not days:
+        return None
+    first_day = max(min(days), since) if since else min(days)
+    return first_day, max(days)
+
+
+def _live_ranges(first_day, last_day, archived):
+    """Split ``first_day``..``last_day`` around the ``archived`` ranges."""
+    ranges = []
+    for archived_first, archived_last in archived:
+        if archived_last < first_day:
+            continue
+        if archived_first > last_day:
+            break
+        if archived_first > first_day:
+            ranges.append((first_day, archived_first - timedelta(days=1)))
+        first_day = archived_last + timedelta(days=1)
+    if first_day <= last_day:
+        ranges.append((first_day, last_day))
+    return ranges
+
+
+def refresh_rollups(full=False, since=None):
+    """
+    Bring the rollups up to date.
+
+    Incremental by default; ``full`` rebuilds every day with source data
+    and ``since`` rebuilds from that date onwards. The first run (no
+    watermarks yet) is always a full rebuild.
+    """
+    report = {"mode": "incremental", "days": 0, "upserted": 0, "deleted": 0}
+
+    with transaction.atomic():
+        watermarks = {
+            watermark.source: watermark.last_id
+            for watermark in RollupWatermark.objects.select_for_update()
+        }
+        bounds = _source_bounds()
+        archived = archived_ranges()
+
+        if full or since or not watermarks:
+            report["mode"] = "full" if not since else "since"
+            span = _full_span(since)
+
+            # Days outside the span no longer have any source rows, unless
+            # their partition was archived.
+            outside = VehicleDailyRollup.objects.all()
+            if since:
+                outside = outside.filter(day__gte=since)
+            if span:
+                outside = outside.exclude(day__range=span)
+            for archived_span in archived:
+                outside = outside.exclude(day__range=archived_span)
+            report["deleted"], _ = outside.delete()
+
+            live = _live_ranges(*span, archived) if span else []
+            for first_day, last_day in live:
+                while first_day <= last_day:
+                    chunk_end = min(
+                        first_day + timedelta(days=REBUILD_CHUNK_DAYS - 1), last_day
+                    )
+                    upserted, deleted = rebuild_range(first_day, chunk_end)
+                    report["days"] += (chunk_end - first_day).days + 1
+                    report["upserted"] += upserted
+                    report["deleted"] += deleted
+                    first_day = chunk_end + timedelta(days=1)
+        else:
+            for day, vehicle_ids in sorted(_touched_pairs(watermarks, bounds).items()):
+                if any(first <= day <= last for first, last in archived):
+                    continue
+                upserted, deleted = rebuild_range(day, day, vehicle_ids)
+                report["days"] += 1
+                report["upserted"] += upserted
+                report["deleted"] += deleted
+
+        for source, last_id in bounds.items():
+            RollupWatermark.objects.update_or_create(
+                source=source, defaults={"last_id": last_id}
+            )
+
+    report["watermarks"] = bounds
+    return report
+
+
+def _combine_days(rows):
+    """Fold per-vehicle daily values (dicts keyed like ROLLUP_FIELDS) by day."""
+    days = {}
+    for day, values in rows:
+        combined = days.setdefault(day, _empty_rollup())
+        _merge(combined, values)
+    return days
+
+
+def _merge(target, values):
+    samples = target["stats_samples"]
+    added = values["stats_samples"] or 0
+    for field in ("battery", "temperature"):
+        if values[f"{field}_avg"] is None:
+            continue
+        if target[f"{field}_avg"] is None:
+            target[f"{field}_min"] = values[f"{field}_min"]
+            target[f"{field}_max"] = values[f"{field}_max"]
+            target[f"{field}_avg"] = values[f"{field}_avg"]
+            continue
+        target[f"{field}_min"] = min(target[f"{field}_min"], values[f"{field}_min"])
+        target[f"{field}_max"] = max(target[f"{field}_max"], values[f"{field}_max"])
+        target[f"{field}_avg"] = (
+            target[f"{field}_avg"] * samples + values[f"{field}_avg"] * added
+        ) / (samples + added)
+    for field in (
+        "trip_count",
+        "distance",
+        "energy_used",
+        "charge_sessions",
+        "energy_added_kwh",
+        "charge_cost",
+        "stats_samples",
+    ):
+        target[field] += values[field] or 0
+
+
+def daily_summary(vehicle_ids, since=None, until=None):
+    """
+    Per-day series and totals for ``vehicle_ids`` (None for the whole
+    fleet) over ``[since, until)``, defaulting to the last
+    ``DEFAULT_SUMMARY_DAYS`` days.
+
+    Ranges longer than a day are served from ``VehicleDailyRollup`` (whole
+    days); shorter ones aggregate the raw tables.
+    """
+    until = until or timezone.now()
+    since = since or until - timedelta(days=DEFAULT_SUMMARY_DAYS)
+    if since >= until:
+        raise ValueError("since must be earlier than until.")
+
+    first_day = timezone.localdate(since)
+    last_day = timezone.localdate(until - timedelta(microseconds=1))
+
+    if until - since > timedelta(days=1):
+        source = "rollup"
+        rollups = VehicleDailyRollup.objects.filter(
+            day__gte=first_day, day__lte=last_day
+        )
+        if vehicle_ids is not None:
+            rollups = rollups.filter(vehicle_id__in=vehicle_ids)
+        rows = [
+            (row.pop("day"), row)
+            for row in rollups.order_by("day").values("day", *ROLLUP_FIELDS)
+        ]
+        as_of = RollupWatermark.objects.aggregate(as_of=Min("updated_at"))["as_of"]
+    else:
+        source = "raw"
+        rows = [
+            (day, values)
+            for (_, day), values in aggregate_raw(first_day, last_day, vehicle_ids).items()
+        ]
+        as_of = timezone.now()
+
+    days = _combine_days(rows)
+    totals = _empty_rollup()
+    for values in days.values():
+        _merge(totals, values)
+
+    return {
+        "source": source,
+        "as_of": as_of,
+        "since": since,
+        "until": until,
+        "days": [{"day": day, **values} for day, values in sorted(days.items())],
+        "totals": totals,
+    }
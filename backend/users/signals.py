@@ -0,0 +1,73 @@
+from django.db.models.signals import post_delete, post_save
+
+from .battery_stats import TRACKED_METRICS, fold_samples
+from .counters import COUNTER_KEYS_BY_MODEL, adjust_counter
+from .evon_cache import INVALIDATING_MODELS, invalidate_on_commit
+from .models import VehicleStats
+from .telemetry import WRITE_FIELDS, upsert_current_state
+
+
+def _count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_counter(COUNTER_KEYS_BY_MODEL[sender], 1)
+
+
+def _count_deleted(sender, instance, **kwargs):
+    adjust_counter(COUNTER_KEYS_BY_MODEL[sender], -1)
+
+
+def connect_counter_signals():
+    # bulk_create/COPY and queryset.update() bypass these; bulk write paths
+    # call adjust_counter() themselves.
+    for model, key in COUNTER_KEYS_BY_MODEL.items():
+        post_save.connect(
+            _count_created, sender=model, dispatch_uid=f"entity_counter_save_{key}"
+        )
+        post_delete.connect(
+            _count_deleted, sender=model, dispatch_uid=f"entity_counter_delete_{key}"
+        )
+
+
+def _invalidate_evon_cache(sender, **kwargs):
+    invalidate_on_commit(sender)
+
+
+def connect_evon_cache_signals():
+    # Bulk write paths that bypass signals call evon_cache.invalidate_on_commit().
+    for model in INVALIDATING_MODELS:
+        label = model._meta.model_name
+        post_save.connect(
+            _invalidate_evon_cache, sender=model, dispatch_uid=f"evon_cache_save_{label}"
+        )
+        post_delete.connect(
+            _invalidate_evon_cache, sender=model, dispatch_uid=f"evon_cache_delete_{label}"
+        )
+
+
+def _fold_battery_sample(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        fold_samples(
+            [(instance.vehicle_id, *(getattr(instance, name) for name in TRACKED_METRICS))]
+        )
+
+
+def connect_battery_stats_signals():
+    # Telemetry ingest bypasses this and calls fold_samples() with the rows
+    # it inserted; deletes are only reconciled by rebuild_battery_stats.
+    post_save.connect(
+        _fold_battery_sample, sender=VehicleStats, dispatch_uid="battery_stats_save"
+    )
+
+
+def _update_current_state(sender, instance, raw=False, **kwargs):
+    if not raw:
+        upsert_current_state([{name: getattr(instance, name) for name in WRITE_FIELDS}])
+
+
+def connect_current_state_signals():
+    # Telemetry ingest bypasses this and upserts the newest sample of each
+    # batch itself. Deleting a vehicle's newest sample does not move its
+    # state back to the previous one.
+    post_save.connect(
+        _update_current_state, sender=VehicleStats, dispatch_uid="current_state_save"
+    )
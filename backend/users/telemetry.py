@@ -0,0 +1,470 @@
+"""
+Bulk ingestion helpers for VehicleStats telemetry batches.
+
+Batches arrive as newline-delimited JSON or CSV, are validated in bulk
+(one vehicle lookup per batch) and written inside a single transaction,
+through PostgreSQL ``COPY`` when available and a multi-row ``INSERT``
+otherwise. The same transaction upserts each vehicle's
+``VehicleCurrentState`` and folds the inserted samples into its
+``VehicleBatteryStats``.
+
+Every sample carries the device's ``recorded_at``, and ``(vehicle_id,
+recorded_at)`` is unique: samples a gateway re-sends are dropped by
+``ON CONFLICT DO NOTHING`` inside the insert itself. A batch sent with an
+``Idempotency-Key`` is recorded in ``IngestBatch`` with its report, and a
+retry with the same key gets that report back without being written again.
+
+With ``INGEST_MODE = "buffered"`` the write is deferred: valid samples
+are queued on the worker's ``ingest_buffer.IngestBuffer``, which flushes
+them through ``write_samples`` in the background.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .battery_stats import TRACKED_METRICS, fold_samples
+from .counters import adjust_counter
+from .models import IngestBatch, VehicleCurrentState, VehicleStats
+
+INGEST_MAX_ROWS = 50000
+COPY_MIN_ROWS = 500
+BULK_CREATE_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 50
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+# Device clocks may run slightly ahead of ours; later samples are rejected.
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+STAGE_TABLE = "users_vehiclestats_ingest_stage"
+
+SAMPLE_INT_FIELDS = (
+    "battery_percentage",
+    "total",
+    "battery_health",
+    "charging_time",
+    "temperature",
+    "battery_capacity",
+    "estimated_range",
+)
+PERCENT_FIELDS = {"battery_percentage", "battery_health"}
+SAMPLE_FIELDS = ("vehicle_id",) + SAMPLE_INT_FIELDS + ("is_charging",)
+WRITE_FIELDS = SAMPLE_FIELDS + ("recorded_at",)
+STATE_FIELDS = SAMPLE_INT_FIELDS + ("is_charging", "recorded_at")
+
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+
+
+class IdempotencyKeyReused(Exception):
+    """An ``Idempotency-Key`` was sent again with a different payload."""
+
+
+class BatchTooLarge(Exception):
+    """A batch holds more than ``INGEST_MAX_ROWS`` samples."""
+
+
+class MalformedBatch(Exception):
+    """A body that is not UTF-8 or not parseable as CSV."""
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _as_int(value):
+    if isinstance(value, bool):
+        raise ValueError("boolean is not a number")
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError("expected an integer")
+        return int(value)
+    return int(str(value).strip())
+
+
+def _as_recorded_at(value, latest):
+    """
+    Parse an ISO 8601 datetime (naive values are UTC) or epoch seconds
+    into an aware datetime no later than ``latest``.
+    """
+    if isinstance(value, bool):
+        raise ValueError("recorded_at must be an ISO 8601 datetime or epoch seconds.")
+    try:
+        if isinstance(value, (int, float)):
+            parsed = datetime.fromtimestamp(value, tz=dt_timezone.utc)
+        else:
+            text = str(value).strip()
+            try:
+                parsed = datetime.fromtimestamp(float(text), tz=dt_timezone.utc)
+            except ValueError:
+                parsed = parse_datetime(text)
+    except (OverflowError, OSError, ValueError):
+        parsed = None
+
+    if parsed is None:
+        raise ValueError("recorded_at must be an ISO 8601 datetime or epoch seconds.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    if parsed > latest:
+        raise ValueError("recorded_at is in the future.")
+    return parsed
+
+
+def parse_batch(body, content_type):
+    """
+    Split a raw request body into ``(line_number, record)`` pairs.
+
+    NDJSON lines that cannot be decoded are returned as errors rather than
+    failing the whole batch. Raises ``MalformedBatch`` when the body is not
+    UTF-8 or the CSV framing is broken, since no line can be trusted then.
+    """
+    try:
+        text = body.decode("utf-8-sig") if isinstance(body, bytes) else body
+    except UnicodeDecodeError as e:
+        raise MalformedBatch(f"Body is not valid UTF-8 (byte {e.start}).") from e
+    media_type = (content_type or "").split(";")[0].strip().lower()
+
+    records = []
+    errors = []
+
+    if media_type in CSV_CONTENT_TYPES:
+        reader = csv.DictReader(io.StringIO(text))
+        try:
+            for row in reader:
+                records.append((reader.line_num, row))
+        except csv.Error as e:
+            raise MalformedBatch(f"Invalid CSV at line {reader.line_num}: {e}") from e
+        return records, errors
+
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except (TypeError, ValueError):
+            errors.append({"line": line_number, "reason": "Invalid JSON."})
+            continue
+        if not isinstance(record, dict):
+            errors.append({"line": line_number, "reason": "Expected a JSON object."})
+            continue
+        records.append((line_number, record))
+
+    return records, errors
+
+
+def validate_samples(records, vehicle_queryset):
+    """
+    Validate parsed records against the vehicles the caller may write to.
+
+    Vehicle ownership is resolved with a single query for the whole batch.
+    Returns ``(samples, errors)`` where samples are clean field dicts.
+    """
+    candidates = []
+    errors = []
+    latest = timezone.now() + MAX_CLOCK_SKEW
+
+    for line_number, record in records:
+        sample = {}
+        reason = None
+
+        for field in ("vehicle_id",) + SAMPLE_INT_FIELDS:
+            value = record.get(field)
+            if value in (None, ""):
+                reason = f"{field} is required."
+                break
+            try:
+                sample[field] = _as_int(value)
+            except (TypeError, ValueError):
+                reason = f"{field} must be an integer."
+                break
+
+            if field in PERCENT_FIELDS and not 0 <= sample[field] <= 100:
+                reason = f"{field} must be between 0 and 100."
+                break
+
+        if not reason:
+            value = record.get("recorded_at")
+            if value in (None, ""):
+                reason = "recorded_at is required."
+            else:
+                try:
+                    sample["recorded_at"] = _as_recorded_at(value, latest)
+                except ValueError as e:
+                    reason = str(e)
+
+        if reason:
+            errors.append({"line": line_number, "reason": reason})
+            continue
+
+        sample["is_charging"] = _as_bool(record.get("is_charging", False))
+        candidates.append((line_number, sample))
+
+    vehicle_ids = {sample["vehicle_id"] for _, sample in candidates}
+    allowed_ids = set(
+        vehicle_queryset.filter(vehicle_id__in=vehicle_ids).values_list(
+            "vehicle_id", flat=True
+        )
+    )
+
+    samples = []
+    for line_number, sample in candidates:
+        if sample["vehicle_id"] not in allowed_ids:
+            errors.append(
+                {
+                    "line": line_number,
+                    "reason": f"Vehicle {sample['vehicle_id']} not found or not permitted.",
+                }
+            )
+            continue
+        samples.append(sample)
+
+    return samples, errors
+
+
+def _columns(model, fields):
+    opts = model._meta
+    return ", ".join(
+        connection.ops.quote_name(opts.get_field(name).column) for name in fields
+    )
+
+
+def _returning():
+    # What fold_samples needs from each row that was actually inserted.
+    return "RETURNING " + _columns(VehicleStats, ("vehicle_id",) + TRACKED_METRICS)
+
+
+def _copy_samples(cursor, samples):
+    """COPY into a staging table, then insert what is new; returns the inserted rows."""
+    quote = connection.ops.quote_name
+    table = quote(VehicleStats._meta.db_table)
+    stage = quote(STAGE_TABLE)
+    columns = _columns(VehicleStats, WRITE_FIELDS)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for sample in samples:
+        writer.writerow(
+            [sample[name] for name in SAMPLE_FIELDS] + [sample["recorded_at"].isoformat()]
+        )
+    buffer.seek(0)
+
+    # COPY has no ON CONFLICT clause, so it lands in a temporary table.
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE {stage} ON COMMIT DROP AS "
+        f"SELECT {columns} FROM {table} WITH NO DATA"
+    )
+    cursor.copy_expert(f"COPY {stage} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    cursor.execute(
+        f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {stage} "
+        f"ON CONFLICT (vehicle_id, recorded_at) DO NOTHING {_returning()}"
+    )
+    inserted = cursor.fetchall()
+    cursor.execute(f"DROP TABLE {stage}")
+    return inserted
+
+
+def _insert_samples(cursor, samples):
+    """Multi-row INSERT ... ON CONFLICT DO NOTHING; returns the inserted rows."""
+    table = connection.ops.quote_name(VehicleStats._meta.db_table)
+    columns = _columns(VehicleStats, WRITE_FIELDS)
+    row = "({})".format(", ".join(["%s"] * len(WRITE_FIELDS)))
+    batch_size = max(
+        1,
+        min(BULK_CREATE_BATCH_SIZE, connection.ops.bulk_batch_size(WRITE_FIELDS, samples)),
+    )
+
+    inserted = []
+    for start in range(0, len(samples), batch_size):
+        batch = samples[start : start + batch_size]
+        params = []
+        for sample in batch:
+            params.extend(sample[name] for name in SAMPLE_FIELDS)
+            params.append(connection.ops.adapt_datetimefield_value(sample["recorded_at"]))
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) VALUES {', '.join([row] * len(batch))} "
+            f"ON CONFLICT (vehicle_id, recorded_at) DO NOTHING {_returning()}",
+            params,
+        )
+        inserted.extend(cursor.fetchall())
+    return inserted
+
+
+def write_samples(samples):
+    """
+    Persist validated samples in the current transaction, skipping any
+    whose ``(vehicle_id, recorded_at)`` is already stored.
+
+    Returns ``(write_method, inserted)``; ``write_method`` is ``"copy"``
+    or ``"insert"``.
+    """
+    if not samples:
+        return "none", 0
+
+    write_method = "insert"
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor
+        if (
+            len(samples) >= COPY_MIN_ROWS
+            and connection.vendor == "postgresql"
+            and hasattr(raw_cursor, "copy_expert")
+        ):
+            write_method = "copy"
+            inserted = _copy_samples(raw_cursor, samples)
+        else:
+            inserted = _insert_samples(cursor, samples)
+
+    # Neither path fires post_save, so keep the admin counter and the
+    # running battery stats in step with the rows actually inserted.
+    adjust_counter("vehicle_stats", len(inserted))
+    if inserted:
+        upsert_current_state(samples)
+        fold_samples(inserted)
+    return write_method, len(inserted)
+
+
+def upsert_current_state(samples):
+    """
+    Point each vehicle's ``VehicleCurrentState`` at its newest sample with
+    one ``INSERT ... ON CONFLICT (vehicle_id) DO UPDATE``. A stored state
+    newer than the batch (a late, out-of-order upload) is left as is.
+    """
+    latest = {}
+    for sample in samples:
+        current = latest.get(sample["vehicle_id"])
+        if current is None or sample["recorded_at"] >= current["recorded_at"]:
+            latest[sample["vehicle_id"]] = sample
+
+    quote = connection.ops.quote_name
+    table = quote(VehicleCurrentState._meta.db_table)
+    fields = SAMPLE_FIELDS + ("recorded_at", "updated_at")
+    assignments = ", ".join(
+        f"{quote(name)} = EXCLUDED.{quote(name)}"
+        for name in STATE_FIELDS + ("updated_at",)
+    )
+    row = "({})".format(", ".join(["%s"] * len(fields)))
+    batch_size = max(
+        1,
+        min(BULK_CREATE_BATCH_SIZE, connection.ops.bulk_batch_size(fields, latest)),
+    )
+    updated_at = connection.ops.adapt_datetimefield_value(timezone.now())
+
+    states = list(latest.values())
+    with connection.cursor() as cursor:
+        for start in range(0, len(states), batch_size):
+            batch = states[start : start + batch_size]
+            params = []
+            for sample in batch:
+                params.extend(sample[name] for name in SAMPLE_FIELDS)
+                params.append(
+                    connection.ops.adapt_datetimefield_value(sample["recorded_at"])
+                )
+                params.append(updated_at)
+            cursor.execute(
+                f"INSERT INTO {table} ({_columns(VehicleCurrentState, fields)}) "
+                f"VALUES {', '.join([row] * len(batch))} "
+                f"ON CONFLICT ({quote('vehicle_id')}) DO UPDATE SET {assignments} "
+                f"WHERE {table}.{quote('recorded_at')} <= EXCLUDED.{quote('recorded_at')}",
+                params,
+            )
+
+
+def payload_hash(body):
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+def _replay(batch, digest):
+    if batch.payload_hash != digest:
+        raise IdempotencyKeyReused(
+            "Idempotency-Key was already used for a different batch."
+        )
+    return {**batch.report, "replayed": True}
+
+
+def ingest_vehicle_stats(
+    body, content_type, vehicle_queryset, user=None, idempotency_key=None, buffer=None
+):
+    """
+    Parse, validate and write one telemetry batch.
+
+    With an ``idempotency_key`` (scoped to ``user``) a batch already
+    accepted under that key is not written again; its stored report is
+    returned with ``"replayed": True``.
+
+    With a ``buffer`` (an ``ingest_buffer.IngestBuffer``) valid samples are
+    queued on it rather than written; ``inserted`` and ``duplicates`` are
+    then unknown and reported as ``None``, and ``BufferFull`` propagates.
+    A buffered batch does not record its key: the flush may still fail, and
+    a retry has to write the samples again rather than replay an
+    acceptance. Retries are deduplicated on ``(vehicle, recorded_at)``.
+
+    Raises ``MalformedBatch`` when the body cannot be parsed,
+    ``BatchTooLarge`` when it exceeds ``INGEST_MAX_ROWS`` and
+    ``IdempotencyKeyReused`` when the key came with a different payload.
+    Returns a report with accepted/inserted/rejected counts and throughput.
+    """
+    started = time.perf_counter()
+
+    digest = None
+    if idempotency_key:
+        digest = payload_hash(body)
+        previous = IngestBatch.objects.filter(user=user, key=idempotency_key).first()
+        if previous is not None:
+            return _replay(previous, digest)
+
+    records, errors = parse_batch(body, content_type)
+    received = len(records) + len(errors)
+    if received > INGEST_MAX_ROWS:
+        raise BatchTooLarge(f"Batch exceeds the limit of {INGEST_MAX_ROWS} samples.")
+
+    samples, validation_errors = validate_samples(records, vehicle_queryset)
+    errors.extend(validation_errors)
+    errors.sort(key=lambda error: error["line"])
+
+    def build_report(write_method, inserted, write_started):
+        finished = time.perf_counter()
+        elapsed = finished - started
+        return {
+            "received": received,
+            "accepted": len(samples),
+            "inserted": inserted,
+            "duplicates": None if inserted is None else len(samples) - inserted,
+            "rejected": len(errors),
+            "errors": errors[:MAX_REPORTED_ERRORS],
+            "write_method": write_method,
+            "duration_ms": round(elapsed * 1000, 2),
+            "write_duration_ms": round((finished - write_started) * 1000, 2),
+            "rows_per_sec": round(len(samples) / elapsed, 2) if elapsed > 0 else None,
+        }
+
+    write_started = time.perf_counter()
+    if buffer is not None:
+        # Nothing is written here, so there is no transaction to wait for.
+        buffer.offer(samples)
+        return {**build_report("buffered", None, write_started), "replayed": False}
+
+    with transaction.atomic():
+        if idempotency_key:
+            # A concurrent retry blocks on the unique key until this
+            # transaction ends, then replays the committed report.
+            batch, created = IngestBatch.objects.get_or_create(
+                user=user, key=idempotency_key, defaults={"payload_hash": digest}
+            )
+            if not created:
+                return _replay(batch, digest)
+
+        write_method, inserted = write_samples(samples)
+        result = build_report(write_method, inserted, write_started)
+
+        if idempotency_key:
+            batch.report = result
+            batch.save(update_fields=["report"])
+
+    return {**result, "replayed": False}
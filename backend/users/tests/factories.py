@@ -0,0 +1,71 @@
+"""Small builders for the rows most tests need."""
+
+import itertools
+import json
+
+from ..models import Company, User, Vehicle, VehicleStats
+
+_sequence = itertools.count(1)
+
+
+def make_company(**fields):
+    number = next(_sequence)
+    values = {
+        "company_name": f"Company {number}",
+        "address": "1 Test Street",
+        "contact_email": f"company{number}@example.com",
+        "contact_phone": "0000000000",
+        "vehicle_manufactured_count": 10,
+        "vehicle_sold_count": 10,
+    }
+    values.update(fields)
+    return Company.objects.create(**values)
+
+
+def make_user(role=User.Role.PERSONAL, **fields):
+    number = next(_sequence)
+    email = fields.pop("email", f"user{number}@example.com")
+    name = fields.pop("name", f"User {number}")
+    return User.objects.create_user(email, name, "password", role=role, **fields)
+
+
+def make_vehicle(owner, company=None, **fields):
+    number = next(_sequence)
+    values = {
+        "vehicle_model": "Model E",
+        "vehicle_colour": "White",
+        "registration_number": f"TS{number:06d}",
+        "owner": owner,
+        "company": company or make_company(),
+    }
+    values.update(fields)
+    return Vehicle.objects.create(**values)
+
+
+def sample_record(vehicle_id, recorded_at, **fields):
+    """One telemetry sample as the ingest endpoint receives it."""
+    record = {
+        "vehicle_id": vehicle_id,
+        "battery_percentage": 80,
+        "total": 1000,
+        "battery_health": 95,
+        "charging_time": 30,
+        "temperature": 25,
+        "battery_capacity": 60,
+        "estimated_range": 300,
+        "is_charging": False,
+        "recorded_at": recorded_at.isoformat(),
+    }
+    record.update(fields)
+    return record
+
+
+def make_stats(vehicle, recorded_at, **fields):
+    """A VehicleStats row saved through the ORM, so its signals fire."""
+    values = sample_record(vehicle.vehicle_id, recorded_at, **fields)
+    values["recorded_at"] = recorded_at
+    return VehicleStats.objects.create(**values)
+
+
+def ndjson(records):
+    return "\n".join(json.dumps(record) for record in records)
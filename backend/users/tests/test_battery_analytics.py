@@ -0,0 +1,134 @@
+import struct
+from datetime import timedelta
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..battery_analytics import (
+    BINARY_COPY_SIGNATURE,
+    SAMPLE_COLUMNS,
+    _decode_binary_copy,
+    charge_cycles,
+    compute_battery_analytics,
+    discharge_depths,
+    load_vehicle_samples,
+    state_of_health,
+    temperature_exposure,
+)
+from ..models import User, VehicleStats
+from .factories import make_user, make_vehicle
+
+
+class BatteryMetricTests(SimpleTestCase):
+    def test_discharge_depths_follow_swings_and_ignore_plateaus(self):
+        soc = np.array([90, 90, 70, 50, 50, 80, 100, 40, 40, 60], dtype=float)
+        np.testing.assert_array_equal(discharge_depths(soc), [40, 60])
+
+    def test_flat_curve_has_no_discharges(self):
+        self.assertEqual(discharge_depths(np.full(5, 50.0)).size, 0)
+
+    def test_charge_cycles(self):
+        soc = np.array([100, 50, 100, 0], dtype=float)
+        charging = np.array([True, False, True, True])
+
+        self.assertEqual(
+            charge_cycles(soc, charging),
+            {
+                "charged_percent": 50.0,
+                "discharged_percent": 150.0,
+                "equivalent_full_cycles": 1.0,
+                "charge_sessions": 2,
+            },
+        )
+
+    def test_state_of_health_trend(self):
+        days = np.array([0.0, 1.0, 2.0])
+        result = state_of_health(days, np.array([100.0, 99.0, 98.0]))
+
+        self.assertEqual(result["slope_per_day"], -1.0)
+        self.assertEqual(result["r_squared"], 1.0)
+        self.assertEqual(state_of_health(days[:1], np.array([100.0]))["slope_per_day"], None)
+
+    def test_temperature_exposure_caps_offline_gaps(self):
+        timestamps = np.array([0.0, 1800.0, 1800.0 + 86400.0])
+        result = temperature_exposure(timestamps, np.array([-5.0, 20.0, 50.0]))
+
+        hours = {band["band"]: band["hours"] for band in result["bands"]}
+        self.assertEqual(hours["below_0"], 0.5)
+        self.assertEqual(hours["15_25"], 1.0)
+        self.assertEqual(hours["45_plus"], 0.0)
+
+    def test_binary_copy_stream_decodes_to_columns(self):
+        rows = [(1700000000.5, 80, 95, 25, 1, 300), (1700000060.0, 79, 95, 26, 0, 296)]
+        stream = BINARY_COPY_SIGNATURE + struct.pack(">ii", 0, 0)
+        for row in rows:
+            stream += struct.pack(">h", len(SAMPLE_COLUMNS))
+            stream += struct.pack(">id", 8, row[0])
+            for value in row[1:]:
+                stream += struct.pack(">ii", 4, value)
+        stream += struct.pack(">h", -1)
+
+        np.testing.assert_array_equal(_decode_binary_copy(stream), np.array(rows))
+
+    def test_binary_copy_rejects_other_streams(self):
+        with self.assertRaises(ValueError):
+            _decode_binary_copy(b"not a copy stream")
+
+
+class BatteryAnalyticsEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicle = make_vehicle(cls.owner)
+        start = timezone.now() - timedelta(days=2)
+        for index, soc in enumerate((100, 60, 20, 90)):
+            VehicleStats.objects.create(
+                vehicle=cls.vehicle,
+                battery_percentage=soc,
+                total=1000,
+                battery_health=95,
+                charging_time=0,
+                temperature=25,
+                battery_capacity=60,
+                estimated_range=soc * 4,
+                is_charging=index == 3,
+                recorded_at=start + timedelta(hours=index),
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def url(self, vehicle_id):
+        return f"/api/vehicles/{vehicle_id}/battery-analytics/"
+
+    def test_samples_load_in_time_order(self):
+        samples = load_vehicle_samples(self.vehicle.vehicle_id)
+
+        np.testing.assert_array_equal(samples["battery_percentage"], [100, 60, 20, 90])
+        self.assertTrue(np.all(np.diff(samples["recorded_at"]) == 3600))
+
+    def test_owner_gets_analytics(self):
+        response = self.client.get(self.url(self.vehicle.vehicle_id))
+
+        self.assertEqual(response.status_code, 200)
+        analytics = response.json()["data"]["analytics"]
+        self.assertEqual(analytics["samples"], 4)
+        self.assertEqual(analytics["depth_of_discharge"]["max_depth"], 80.0)
+        self.assertEqual(analytics["range_vs_soc"]["km_per_percent"], 4.0)
+        self.assertEqual(analytics["cycles"]["charge_sessions"], 1)
+
+    def test_empty_window_reports_no_samples(self):
+        self.assertEqual(compute_battery_analytics(load_vehicle_samples(0)), {"samples": 0})
+
+    def test_other_users_are_refused_and_admins_are_not(self):
+        self.client.force_authenticate(make_user())
+        self.assertEqual(self.client.get(self.url(self.vehicle.vehicle_id)).status_code, 403)
+
+        self.client.force_authenticate(make_user(role=User.Role.ADMIN))
+        self.assertEqual(self.client.get(self.url(self.vehicle.vehicle_id)).status_code, 200)
+
+    def test_unknown_vehicle_is_a_404(self):
+        self.assertEqual(self.client.get(self.url(0)).status_code, 404)
@@ -0,0 +1,147 @@
+from datetime import timedelta
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from ..battery_stats import (
+    TRACKED_METRICS,
+    fleet_battery_stats,
+    rebuild_battery_stats,
+    running_stats,
+    vehicle_battery_stats,
+)
+from ..models import Vehicle, VehicleBatteryStats, VehicleStats
+from ..telemetry import ingest_vehicle_stats
+from .factories import make_stats, make_user, make_vehicle, ndjson, sample_record
+
+STAT_FIELDS = ["samples"] + [
+    f"{metric}_{stat}" for metric in TRACKED_METRICS for stat in ("mean", "m2", "min", "max")
+]
+
+
+class RunningStatsTests(SimpleTestCase):
+    def test_welford_matches_a_two_pass_computation(self):
+        rng = np.random.default_rng(3)
+        values = rng.integers(0, 100, size=(500, 3))
+        rows = [(1, *row) for row in values.tolist()] + [(2, 5, 6, 7)]
+
+        stats = running_stats(rows)
+
+        count, metrics = stats[1]
+        self.assertEqual(count, 500)
+        for column, (mean, m2, low, high) in enumerate(metrics):
+            series = values[:, column]
+            self.assertAlmostEqual(mean, series.mean())
+            self.assertAlmostEqual(m2, series.var() * series.size, places=6)
+            self.assertEqual((low, high), (series.min(), series.max()))
+        self.assertEqual(stats[2], [1, [[5, 0.0, 5, 5], [6, 0.0, 6, 6], [7, 0.0, 7, 7]]])
+
+
+class IncrementalBatteryStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicles = [make_vehicle(cls.owner) for _ in range(3)]
+
+    def setUp(self):
+        self.rng = np.random.default_rng(11)
+        self.start = timezone.now() - timedelta(days=1)
+        self.offset = 0
+
+    def ingest_batch(self, size):
+        records = []
+        for _ in range(size):
+            vehicle = self.vehicles[int(self.rng.integers(len(self.vehicles)))]
+            self.offset += 1
+            records.append(
+                sample_record(
+                    vehicle.vehicle_id,
+                    self.start + timedelta(seconds=self.offset),
+                    battery_health=int(self.rng.integers(70, 101)),
+                    temperature=int(self.rng.integers(-10, 50)),
+                    battery_percentage=int(self.rng.integers(0, 101)),
+                )
+            )
+        ingest_vehicle_stats(ndjson(records), "application/x-ndjson", Vehicle.objects.all())
+        return records
+
+    def stored(self):
+        return {
+            row.pop("vehicle_id"): row
+            for row in VehicleBatteryStats.objects.values("vehicle_id", *STAT_FIELDS)
+        }
+
+    def assertStatsEqual(self, actual, expected):
+        self.assertEqual(actual.keys(), expected.keys())
+        for vehicle_id, row in expected.items():
+            for field, value in row.items():
+                with self.subTest(vehicle_id=vehicle_id, field=field):
+                    self.assertAlmostEqual(actual[vehicle_id][field], value, places=6)
+
+    def test_merged_batches_match_a_rebuild(self):
+        for size in (1, 7, 40, 3, 120):
+            self.ingest_batch(size)
+        make_stats(self.vehicles[0], self.start, temperature=-20)
+        incremental = self.stored()
+
+        self.assertEqual(rebuild_battery_stats(), 3)
+
+        self.assertStatsEqual(incremental, self.stored())
+
+    def test_resent_samples_are_not_folded_twice(self):
+        records = self.ingest_batch(20)
+        before = self.stored()
+
+        ingest_vehicle_stats(ndjson(records), "application/x-ndjson", Vehicle.objects.all())
+
+        self.assertStatsEqual(self.stored(), before)
+
+    def test_fleet_figures_match_the_raw_samples(self):
+        self.ingest_batch(200)
+
+        fleet = fleet_battery_stats()
+
+        self.assertEqual(fleet["vehicles"], 3)
+        self.assertEqual(fleet["samples"], 200)
+        for metric in TRACKED_METRICS:
+            values = np.array(VehicleStats.objects.values_list(metric, flat=True))
+            with self.subTest(metric=metric):
+                # Summaries are rounded to two places.
+                self.assertAlmostEqual(fleet[metric]["mean"], values.mean(), delta=0.01)
+                self.assertAlmostEqual(fleet[metric]["variance"], values.var(), delta=0.01)
+                self.assertEqual(fleet[metric]["min"], values.min())
+                self.assertEqual(fleet[metric]["max"], values.max())
+
+    def test_per_vehicle_summaries(self):
+        self.ingest_batch(30)
+        vehicle_id = self.vehicles[1].vehicle_id
+
+        (summary,) = vehicle_battery_stats([vehicle_id])
+
+        values = VehicleStats.objects.filter(vehicle_id=vehicle_id)
+        self.assertEqual(summary["samples"], values.count())
+        self.assertEqual(
+            summary["temperature"]["max"],
+            max(values.values_list("temperature", flat=True)),
+        )
+
+    def test_empty_fleet(self):
+        fleet = fleet_battery_stats()
+
+        self.assertEqual(fleet["samples"], 0)
+        self.assertIsNone(fleet["temperature"]["mean"])
+
+    def test_rebuild_command_reports_drift_after_deletes(self):
+        self.ingest_batch(10)
+        VehicleStats.objects.filter(
+            stats_id__in=VehicleStats.objects.values_list("stats_id", flat=True)[:4]
+        ).delete()
+        out = StringIO()
+
+        call_command("rebuild_battery_stats", stdout=out)
+
+        self.assertIn("samples: 6 (drift -4)", out.getvalue())
+        self.assertEqual(fleet_battery_stats()["samples"], 6)
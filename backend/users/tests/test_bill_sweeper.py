@@ -0,0 +1,105 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ..bill_sweeper import sweep_overdue_bills
+from ..counters import rebuild_counters, summary_counts
+from ..models import Bill, Notification
+from .factories import make_user, make_vehicle
+
+
+class SweepOverdueBillsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        cls.customer = make_user()
+        cls.vehicle = make_vehicle(cls.customer)
+
+        def bill(status, due_in_days, amount="100.00"):
+            return Bill.objects.create(
+                vehicle=cls.vehicle,
+                customer=cls.customer,
+                due_date=cls.now + timedelta(days=due_in_days),
+                total_amount=Decimal(amount),
+                payment_status=status,
+            )
+
+        pending, paid = Bill.PaymentStatus.PENDING, Bill.PaymentStatus.PAID
+        cls.late = [bill(pending, -3, "120.50"), bill(pending, -1)]
+        cls.not_due = bill(pending, 2)
+        cls.paid_late = bill(paid, -5)
+        cls.cancelled_late = bill(Bill.PaymentStatus.CANCELLED, -5)
+
+    def statuses(self):
+        return dict(Bill.objects.values_list("bill_id", "payment_status"))
+
+    def assertSwept(self, report):
+        self.assertEqual(report["marked_overdue"], 2)
+        self.assertEqual(report["notifications"], 2)
+
+        statuses = self.statuses()
+        for bill in self.late:
+            self.assertEqual(statuses[bill.bill_id], Bill.PaymentStatus.OVERDUE)
+        self.assertEqual(statuses[self.not_due.bill_id], Bill.PaymentStatus.PENDING)
+        self.assertEqual(statuses[self.paid_late.bill_id], Bill.PaymentStatus.PAID)
+        self.assertEqual(
+            statuses[self.cancelled_late.bill_id], Bill.PaymentStatus.CANCELLED
+        )
+
+        notifications = Notification.objects.filter(user=self.customer)
+        self.assertEqual(notifications.count(), 2)
+        self.assertTrue(
+            notifications.filter(
+                vehicle=self.vehicle,
+                priority=Notification.Priority.HIGH,
+                message=(
+                    f"Bill #{self.late[0].bill_id} of ₹120.50 is past its due "
+                    "date and is now overdue."
+                ),
+            ).exists()
+        )
+
+    def test_pending_bills_past_due_are_marked_and_notified(self):
+        self.assertSwept(sweep_overdue_bills(self.now))
+
+    def test_without_update_returning(self):
+        with mock.patch.object(
+            connection.features, "can_return_columns_from_insert", False
+        ):
+            self.assertSwept(sweep_overdue_bills(self.now))
+
+    def test_second_sweep_finds_nothing(self):
+        sweep_overdue_bills(self.now)
+
+        report = sweep_overdue_bills(self.now)
+
+        self.assertEqual(report["marked_overdue"], 0)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_dry_run_only_counts(self):
+        report = sweep_overdue_bills(self.now, dry_run=True)
+
+        self.assertEqual(report["marked_overdue"], 2)
+        self.assertEqual(report["notifications"], 0)
+        self.assertNotIn(Bill.PaymentStatus.OVERDUE, self.statuses().values())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_notification_counter_stays_exact(self):
+        rebuild_counters(["notifications"])
+
+        sweep_overdue_bills(self.now)
+
+        self.assertEqual(summary_counts("counter")["notifications"], 2)
+
+    def test_command_reports_counts(self):
+        out = StringIO()
+
+        call_command("sweep_overdue_bills", stdout=out)
+
+        self.assertIn("2 bill(s) marked overdue, 2 notification(s) created", out.getvalue())
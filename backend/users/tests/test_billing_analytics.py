@@ -0,0 +1,100 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..billing_analytics import aging_buckets, billing_analytics
+from ..models import Bill, User
+from .factories import make_user, make_vehicle
+
+ANALYTICS_URL = "/api/admin/billing-analytics/"
+
+
+class BillingAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        cls.alice = make_user(name="Alice")
+        cls.bob = make_user(name="Bob")
+        cls.vehicle = make_vehicle(cls.alice)
+
+        def bill(customer, amount, status, method=None, days_ago=1, due_in=7):
+            created = Bill.objects.create(
+                vehicle=cls.vehicle,
+                customer=customer,
+                due_date=cls.now + timedelta(days=due_in),
+                total_amount=Decimal(amount),
+                payment_status=status,
+                payment_method=method,
+            )
+            # bill_date is auto_now_add.
+            Bill.objects.filter(pk=created.pk).update(
+                bill_date=cls.now - timedelta(days=days_ago)
+            )
+
+        paid, pending = Bill.PaymentStatus.PAID, Bill.PaymentStatus.PENDING
+        overdue, cancelled = Bill.PaymentStatus.OVERDUE, Bill.PaymentStatus.CANCELLED
+        bill(cls.alice, "100.00", paid, "CARD", days_ago=1)
+        bill(cls.alice, "50.00", pending, days_ago=1, due_in=3)
+        bill(cls.bob, "30.00", overdue, days_ago=40, due_in=-35)
+        bill(cls.bob, "999.00", cancelled, days_ago=2)
+        bill(cls.bob, "20.00", paid, "UPI", days_ago=200)
+
+    def test_totals_exclude_cancelled_and_respect_the_window(self):
+        analytics = billing_analytics()
+
+        self.assertEqual(
+            analytics["totals"],
+            {"bills": 3, "billed": 180.0, "collected": 100.0, "outstanding": 80.0},
+        )
+        self.assertEqual(
+            {row["payment_status"]: row["bills"] for row in analytics["by_payment_status"]},
+            {"PAID": 1, "PENDING": 1, "OVERDUE": 1, "CANCELLED": 1},
+        )
+
+    def test_monthly_series_sums_to_the_totals(self):
+        analytics = billing_analytics(
+            since=self.now - timedelta(days=365), granularity="month"
+        )
+
+        periods = [row["period"] for row in analytics["series"]]
+        self.assertEqual(periods, sorted(periods))
+        self.assertEqual(sum(row["billed"] for row in analytics["series"]), 200.0)
+
+    def test_top_customers_rank_by_billed_amount(self):
+        customers = billing_analytics(top=1)["top_customers"]
+
+        self.assertEqual(len(customers), 1)
+        self.assertEqual(customers[0]["name"], "Alice")
+        self.assertEqual(customers[0]["billed"], 150.0)
+
+    def test_aging_buckets_by_days_past_due(self):
+        buckets = {row["bucket"]: row for row in aging_buckets(self.now)}
+
+        self.assertEqual(buckets["current"]["amount"], 50.0)
+        self.assertEqual(buckets["31-60"]["bills"], 1)
+        self.assertEqual(buckets["1-30"]["bills"], 0)
+        self.assertEqual(buckets["90+"]["bills"], 0)
+
+    def test_bad_arguments_are_rejected(self):
+        for kwargs in (
+            {"granularity": "hour"},
+            {"top": 0},
+            {"since": self.now, "until": self.now - timedelta(days=1)},
+        ):
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    billing_analytics(**kwargs)
+
+    def test_endpoint_is_admin_only(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        self.assertEqual(client.get(ANALYTICS_URL).status_code, 403)
+
+        client.force_authenticate(make_user(role=User.Role.ADMIN))
+        response = client.get(ANALYTICS_URL, {"granularity": "week"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["totals"]["bills"], 3)
+        self.assertEqual(client.get(ANALYTICS_URL, {"granularity": "hour"}).status_code, 400)
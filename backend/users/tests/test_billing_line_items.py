@@ -0,0 +1,148 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Bill, BillLineItem, Issues, Service, User
+from .factories import make_user, make_vehicle
+
+REGISTER_URL = "/api/register-billing-items-as-issues/"
+
+
+def make_issue(vehicle, **fields):
+    values = {"vehicle": vehicle, "category": "Brake pads", "cost": 100}
+    values.update(fields)
+    return Issues.objects.create(**values)
+
+
+class RegisterBillingItemsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.serviceman = make_user(role=User.Role.SERVICE)
+        cls.vehicle = make_vehicle(cls.owner)
+        admin = make_user(role=User.Role.ADMIN)
+        now = timezone.now()
+        Service.objects.create(
+            vehicle=cls.vehicle,
+            serviceman=cls.serviceman,
+            start_time=now,
+            deadline=now + timedelta(days=1),
+            assigned_by=admin,
+            assigned_to=cls.serviceman,
+            sla_time=24,
+            sla_status="ON_TIME",
+            rating=5,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.serviceman)
+
+    def register(self, items):
+        return self.client.post(
+            REGISTER_URL,
+            {"vehicle_id": self.vehicle.vehicle_id, "items": items},
+            format="json",
+        )
+
+    def test_each_item_becomes_a_line_item_on_the_bill(self):
+        response = self.register(
+            [
+                {"name": "Brake pads", "qty": 2, "rate": 150, "tax": 10},
+                {"name": "Coolant", "qty": 1.5, "rate": 40, "tax": 0},
+                {"name": "", "qty": 1, "rate": 10},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(len(data["created_issues"]), 2)
+        self.assertEqual(len(data["skipped_items"]), 1)
+
+        bill = Bill.objects.get(bill_id=data["bill"]["bill_id"])
+        self.assertEqual(bill.subtotal, Decimal("360.00"))
+        lines = {
+            line.issue.category: line
+            for line in BillLineItem.objects.filter(bill=bill).select_related("issue")
+        }
+        self.assertEqual(
+            (lines["Brake pads"].qty, lines["Brake pads"].rate, lines["Brake pads"].tax),
+            (Decimal("2.00"), Decimal("150.00"), Decimal("10.00")),
+        )
+        self.assertEqual(lines["Brake pads"].line_total, Decimal("310.00"))
+        self.assertEqual(lines["Coolant"].line_total, Decimal("60.00"))
+
+    def test_open_issue_of_the_same_category_is_updated(self):
+        issue = make_issue(self.vehicle, assigned_to=self.serviceman)
+
+        response = self.register([{"name": "brake PADS", "qty": 1, "rate": 80}])
+
+        data = response.json()["data"]
+        self.assertEqual(data["created_issues"], [])
+        self.assertEqual(data["updated_issues"][0]["issue_id"], issue.issue_id)
+        issue.refresh_from_db()
+        self.assertEqual(issue.cost, 80)
+        self.assertEqual(issue.line_items.get().rate, Decimal("80.00"))
+
+    def test_only_service_users_may_register(self):
+        self.client.force_authenticate(self.owner)
+
+        self.assertEqual(self.register([{"name": "Coolant"}]).status_code, 403)
+
+
+class DeleteIssueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicle = make_vehicle(cls.owner)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def delete(self, issue):
+        return self.client.delete(f"/api/delete-issue/{issue.issue_id}/")
+
+    def bill(self, issue=None):
+        return Bill.objects.create(
+            issue=issue,
+            vehicle=self.vehicle,
+            customer=self.owner,
+            due_date=timezone.now() + timedelta(days=7),
+            total_amount=Decimal("100.00"),
+        )
+
+    def test_unbilled_issue_is_deleted(self):
+        issue = make_issue(self.vehicle)
+
+        response = self.delete(issue)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Issues.objects.filter(pk=issue.pk).exists())
+
+    def test_issue_with_a_line_item_is_a_409(self):
+        issue = make_issue(self.vehicle)
+        BillLineItem.objects.create(bill=self.bill(), issue=issue, rate=100)
+
+        response = self.delete(issue)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json()["message"],
+            "This issue has been billed and cannot be deleted.",
+        )
+        self.assertTrue(Issues.objects.filter(pk=issue.pk).exists())
+
+    def test_issue_referenced_by_a_bill_is_a_409(self):
+        issue = make_issue(self.vehicle)
+        self.bill(issue)
+
+        self.assertEqual(self.delete(issue).status_code, 409)
+
+    def test_someone_elses_issue_is_a_404(self):
+        issue = make_issue(make_vehicle(make_user()))
+
+        self.assertEqual(self.delete(issue).status_code, 404)
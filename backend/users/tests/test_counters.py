@@ -0,0 +1,76 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..counters import (
+    COUNTED_MODELS,
+    adjust_counter,
+    rebuild_counters,
+    summary_counts,
+)
+from ..models import EntityCounter, EntityCounterShard, Vehicle, VehicleStats
+from ..telemetry import ingest_vehicle_stats
+from .factories import make_user, make_vehicle, ndjson, sample_record
+
+
+class CounterTests(TestCase):
+    def assertCountsExact(self):
+        self.assertEqual(summary_counts("counter"), summary_counts("exact"))
+
+    def test_missing_counters_are_seeded_from_live_counts(self):
+        make_vehicle(make_user())
+        EntityCounter.objects.all().delete()
+        EntityCounterShard.objects.all().delete()
+
+        self.assertCountsExact()
+        self.assertEqual(EntityCounter.objects.count(), len(COUNTED_MODELS))
+
+    def test_orm_saves_and_deletes_keep_counts_exact(self):
+        rebuild_counters()
+        owner = make_user()
+        vehicles = [make_vehicle(owner) for _ in range(3)]
+        vehicles[0].delete()
+
+        self.assertCountsExact()
+        self.assertEqual(summary_counts("counter")["vehicles"], 2)
+
+    def test_bulk_ingest_adjusts_the_stats_counter(self):
+        rebuild_counters()
+        vehicle = make_vehicle(make_user())
+        start = timezone.now() - timedelta(hours=1)
+        body = ndjson(
+            sample_record(vehicle.vehicle_id, start + timedelta(seconds=index))
+            for index in range(5)
+        )
+
+        ingest_vehicle_stats(body, "application/x-ndjson", Vehicle.objects.all())
+        # Re-sent samples are not inserted and must not be counted.
+        ingest_vehicle_stats(body, "application/x-ndjson", Vehicle.objects.all())
+
+        self.assertEqual(VehicleStats.objects.count(), 5)
+        self.assertCountsExact()
+
+    def test_count_is_the_base_row_plus_every_shard(self):
+        rebuild_counters()
+        for shard, delta in ((0, 4), (7, -1), (7, 2), (15, 3)):
+            with mock.patch("users.counters._shard", return_value=shard):
+                adjust_counter("trips", delta)
+
+        self.assertEqual(
+            dict(
+                EntityCounterShard.objects.filter(name="trips").values_list(
+                    "shard", "count"
+                )
+            ),
+            {0: 4, 7: 1, 15: 3},
+        )
+        self.assertEqual(summary_counts("counter")["trips"], 8)
+
+    def test_rebuild_folds_shards_back_into_the_base_row(self):
+        adjust_counter("trips", 5)
+
+        self.assertEqual(rebuild_counters(["trips"]), {"trips": 0})
+        self.assertFalse(EntityCounterShard.objects.filter(name="trips").exists())
+        self.assertEqual(summary_counts("counter")["trips"], 0)
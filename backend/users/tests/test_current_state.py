@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Vehicle, VehicleCurrentState
+from ..telemetry import ingest_vehicle_stats
+from .factories import make_stats, make_user, make_vehicle, ndjson, sample_record
+
+
+class CurrentStateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicle = make_vehicle(cls.owner)
+
+    def setUp(self):
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def ingest(self, *records):
+        return ingest_vehicle_stats(
+            ndjson(records), "application/x-ndjson", Vehicle.objects.all()
+        )
+
+    def state(self):
+        return VehicleCurrentState.objects.get(vehicle=self.vehicle)
+
+    def at(self, seconds):
+        return self.start + timedelta(seconds=seconds)
+
+    def test_ingest_keeps_the_newest_sample_of_the_batch(self):
+        vehicle_id = self.vehicle.vehicle_id
+        self.ingest(
+            sample_record(vehicle_id, self.at(20), battery_percentage=70),
+            sample_record(vehicle_id, self.at(30), battery_percentage=65),
+            sample_record(vehicle_id, self.at(10), battery_percentage=75),
+        )
+
+        state = self.state()
+        self.assertEqual(state.battery_percentage, 65)
+        self.assertEqual(state.recorded_at, self.at(30))
+
+    def test_late_batch_does_not_move_the_state_back(self):
+        vehicle_id = self.vehicle.vehicle_id
+        self.ingest(sample_record(vehicle_id, self.at(30), battery_percentage=65))
+        self.ingest(sample_record(vehicle_id, self.at(10), battery_percentage=75))
+
+        self.assertEqual(self.state().battery_percentage, 65)
+
+    def test_orm_saves_update_the_state(self):
+        make_stats(self.vehicle, self.at(10), battery_percentage=75)
+        self.assertEqual(self.state().battery_percentage, 75)
+
+        make_stats(self.vehicle, self.at(20), battery_percentage=70, is_charging=True)
+        state = self.state()
+        self.assertEqual(state.battery_percentage, 70)
+        self.assertTrue(state.is_charging)
+
+        make_stats(self.vehicle, self.at(5), battery_percentage=99)
+        self.assertEqual(self.state().battery_percentage, 70)
+
+    def test_one_state_row_per_vehicle(self):
+        other = make_vehicle(self.owner)
+        self.ingest(
+            sample_record(self.vehicle.vehicle_id, self.at(1)),
+            sample_record(other.vehicle_id, self.at(1)),
+            sample_record(other.vehicle_id, self.at(2)),
+        )
+
+        self.assertEqual(VehicleCurrentState.objects.count(), 2)
+
+
+class VehicleDetailsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicle = make_vehicle(cls.owner)
+        start = timezone.now() - timedelta(hours=1)
+        for index in range(5):
+            make_stats(
+                cls.vehicle, start + timedelta(minutes=index), battery_percentage=50 + index
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_current_state_and_bounded_history(self):
+        response = self.client.get("/api/get-vehicle-details/", {"history": 2})
+
+        data = response.json()["data"]
+        self.assertEqual(data["history_limit"], 2)
+        self.assertEqual(data["current_state"][0]["battery_percentage"], 54)
+        self.assertEqual(
+            [row["battery_percentage"] for row in data["vehicle_stats"]], [54, 53]
+        )
+
+    def test_history_is_clamped(self):
+        data = self.client.get("/api/get-vehicle-details/", {"history": 10**6}).json()
+
+        self.assertEqual(data["data"]["history_limit"], 500)
+        self.assertEqual(len(data["data"]["vehicle_stats"]), 5)
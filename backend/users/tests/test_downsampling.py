@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..downsampling import downsample_series, envelope, lttb
+from .factories import make_stats, make_user, make_vehicle
+
+
+def _series(size, seed=7):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(1, 60, size))
+    y = np.sin(np.arange(size) / 50.0) * 40 + 50 + rng.normal(0, 3, size)
+    return x, y
+
+
+class LttbTests(SimpleTestCase):
+    def test_output_size_and_order(self):
+        x, y = _series(5000)
+        for points in (3, 4, 100, 4999):
+            with self.subTest(points=points):
+                selected, _ = lttb(x, y, points)
+                self.assertEqual(selected.size, points)
+                self.assertEqual(selected[0], 0)
+                self.assertEqual(selected[-1], x.size - 1)
+                self.assertTrue(np.all(np.diff(selected) > 0))
+
+    def test_one_point_from_each_bucket(self):
+        x, y = _series(1000)
+        selected, edges = lttb(x, y, 50)
+
+        interior = selected[1:-1]
+        self.assertTrue(np.all(interior >= edges[:-1]))
+        self.assertTrue(np.all(interior < edges[1:]))
+
+    def test_spike_survives(self):
+        x = np.arange(1000, dtype=float)
+        y = np.zeros(1000)
+        y[637] = 100
+
+        selected, _ = lttb(x, y, 20)
+
+        self.assertIn(637, selected)
+
+    def test_short_series_is_returned_whole(self):
+        x, y = _series(10)
+        selected, edges = lttb(x, y, 10)
+
+        np.testing.assert_array_equal(selected, np.arange(10))
+        self.assertIsNone(edges)
+
+    def test_too_few_points_is_an_error(self):
+        x, y = _series(100)
+        with self.assertRaises(ValueError):
+            lttb(x, y, 2)
+
+    def test_envelope_matches_each_bucket(self):
+        x, y = _series(777)
+        selected, edges = lttb(x, y, 40)
+
+        lows, highs = envelope(y, edges)
+
+        self.assertEqual(lows.size, selected.size)
+        buckets = [(0, 1)] + list(zip(edges[:-1], edges[1:])) + [(y.size - 1, y.size)]
+        for index, (start, end) in enumerate(buckets):
+            self.assertEqual(lows[index], y[start:end].min())
+            self.assertEqual(highs[index], y[start:end].max())
+        self.assertTrue(np.all((lows <= y[selected]) & (y[selected] <= highs)))
+
+    def test_series_payload(self):
+        x, y = _series(300)
+        samples = {"recorded_at": x, "battery_percentage": y}
+
+        series = downsample_series(samples, 30, metrics=("battery_percentage",))
+
+        payload = series["battery_percentage"]
+        self.assertEqual(
+            [len(payload[key]) for key in ("recorded_at", "value", "min", "max")],
+            [30, 30, 30, 30],
+        )
+        self.assertEqual(payload["recorded_at"], sorted(payload["recorded_at"]))
+
+
+class DownsampledChargingDetailsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicle = make_vehicle(cls.owner)
+        start = timezone.now() - timedelta(days=1)
+        for index in range(40):
+            make_stats(
+                cls.vehicle,
+                start + timedelta(minutes=index),
+                battery_percentage=index % 20,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def get(self, **params):
+        return self.client.get("/api/get-charging-details/", params)
+
+    def test_points_returns_downsampled_series(self):
+        response = self.get(vehicle_id=self.vehicle.vehicle_id, points=10)
+
+        self.assertEqual(response.status_code, 200)
+        (series,) = response.json()["data"]["downsampled"]
+        self.assertEqual(series["samples"], 40)
+        self.assertEqual(series["points"], 10)
+        battery = series["series"]["battery_percentage"]
+        self.assertEqual(len(battery["value"]), 10)
+        for value, low, high in zip(battery["value"], battery["min"], battery["max"]):
+            self.assertTrue(low <= value <= high)
+        self.assertEqual((min(battery["min"]), max(battery["max"])), (0.0, 19.0))
+
+    def test_bad_points_are_a_400(self):
+        for points in ("many", 2, 10**6):
+            with self.subTest(points=points):
+                self.assertEqual(self.get(points=points).status_code, 400)
@@ -0,0 +1,119 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..evon_text2sql import check_plan, inject_limit, run_read_only
+from ..views import EvonView
+from .factories import make_company
+
+
+def _node(node_type, cost, rows, children=(), relation=None):
+    node = {"Node Type": node_type, "Total Cost": cost, "Plan Rows": rows}
+    if children:
+        node["Plans"] = list(children)
+    if relation:
+        node["Relation Name"] = relation
+    return node
+
+
+class _ExplainCursor:
+    """Stands in for a cursor whose EXPLAIN returns ``plan``."""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.executed = []
+
+    def execute(self, sql, params):
+        self.executed.append(sql)
+
+    def fetchone(self):
+        return (json.dumps([{"Plan": self.plan}]),)
+
+
+@override_settings(EVON_SQL_MAX_COST=1000, EVON_SQL_MAX_JOIN_ROWS=100)
+class CheckPlanTests(SimpleTestCase):
+    def test_cheap_plan_is_summarised(self):
+        plan = _node(
+            "Limit", 10, 5, [_node("Seq Scan", 50, 5, relation="users_vehicle")]
+        )
+        cursor = _ExplainCursor(plan)
+
+        summary = check_plan(cursor, "SELECT 1")
+
+        self.assertTrue(cursor.executed[0].startswith("EXPLAIN (FORMAT JSON) "))
+        self.assertEqual(summary["total_cost"], 10)
+        self.assertEqual(summary["max_cost"], 50)
+        self.assertEqual(summary["nodes"], 2)
+        self.assertEqual(summary["relations"], ["users_vehicle"])
+
+    def test_expensive_node_under_a_cheap_limit_is_blocked(self):
+        # LIMIT scales its own cost by the rows it fetches; the sort under
+        # it still has to read everything.
+        plan = _node(
+            "Limit",
+            5,
+            201,
+            [_node("Sort", 90000, 10**6, [_node("Seq Scan", 20000, 10**6)])],
+        )
+
+        with self.assertRaisesMessage(ValueError, "estimated cost 90000 exceeds 1000"):
+            check_plan(_ExplainCursor(plan), "SELECT 1")
+
+    def test_exploding_join_is_blocked(self):
+        plan = _node(
+            "Limit",
+            10,
+            201,
+            [_node("Hash Join", 500, 5000, [_node("Seq Scan", 1, 10)])],
+        )
+
+        with self.assertRaisesMessage(ValueError, "a join is estimated at 5000 rows"):
+            check_plan(_ExplainCursor(plan), "SELECT 1")
+
+
+class RunReadOnlyTests(TestCase):
+    def test_inject_limit_wraps_the_query_and_drops_comments(self):
+        self.assertEqual(
+            inject_limit("SELECT 1 LIMIT 5 -- trailing", 10),
+            "SELECT * FROM (\nSELECT 1 LIMIT 5\n) AS evon_query LIMIT 10",
+        )
+
+    def test_rows_are_capped_and_truncation_reported(self):
+        for index in range(3):
+            make_company(company_name=f"Fleet {index}")
+        sql = "SELECT company_name FROM users_company ORDER BY company_name"
+
+        rows, truncated, plan = run_read_only(sql, row_cap=2)
+
+        self.assertEqual(rows, [{"company_name": "Fleet 0"}, {"company_name": "Fleet 1"}])
+        self.assertTrue(truncated)
+        self.assertIsNone(plan)
+        self.assertFalse(run_read_only(sql, row_cap=3)[1])
+
+    def test_unsafe_sql_is_refused(self):
+        with self.assertRaisesMessage(ValueError, "Unsafe SQL query was blocked"):
+            run_read_only("DELETE FROM users_company")
+
+
+class ExposeSqlTests(SimpleTestCase):
+    result = ("SELECT 1", [{"one": 1}], False, {"max_cost": 1.0})
+
+    def answer(self):
+        with mock.patch.object(EvonView, "text2sql", mock.AsyncMock(return_value=self.result)):
+            return async_to_sync(EvonView._try_langchain_text2sql)("how many?")
+
+    def test_sql_is_hidden_by_default(self):
+        self.assertEqual(self.answer()[3], {})
+
+    @override_settings(EVON_EXPOSE_SQL=True)
+    def test_sql_is_exposed_when_enabled(self):
+        self.assertEqual(
+            self.answer()[3],
+            {"sql": {"query": "SELECT 1", "plan": {"max_cost": 1.0}}},
+        )
+
+    @override_settings(EVON_EXPOSE_SQL="False")
+    def test_only_a_real_boolean_enables_exposure(self):
+        self.assertEqual(self.answer()[3], {})
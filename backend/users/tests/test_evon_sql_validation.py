@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from scripts.bench_evon_sql_validation import CORPUS
+
+from .. import evon_text2sql
+from ..evon_text2sql import clear_validation_cache, extract_sql, validate_sql
+
+
+class ValidateSqlTests(SimpleTestCase):
+    def setUp(self):
+        clear_validation_cache()
+
+    def assertSafe(self, sql):
+        safe, reason = validate_sql(sql)
+        self.assertTrue(safe, f"{sql!r} was rejected: {reason}")
+
+    def assertUnsafe(self, sql, reason=None):
+        safe, actual = validate_sql(sql)
+        self.assertFalse(safe, f"{sql!r} was accepted")
+        if reason:
+            self.assertIn(reason, actual)
+
+    def test_benchmark_corpus(self):
+        for sql, expected in CORPUS:
+            with self.subTest(sql=sql):
+                if expected:
+                    self.assertSafe(sql)
+                else:
+                    self.assertUnsafe(sql)
+
+    def test_tables_after_a_join_condition_are_checked(self):
+        self.assertUnsafe(
+            "SELECT * FROM users_user u JOIN users_trip t ON t.vehicle_id = u.user_id, "
+            "pg_authid p",
+            "pg_authid",
+        )
+        self.assertUnsafe(
+            "SELECT * FROM users_user u JOIN users_trip t USING (vehicle_id), pg_shadow",
+            "pg_shadow",
+        )
+
+    def test_table_modifiers_do_not_hide_the_next_table(self):
+        self.assertUnsafe("SELECT * FROM ONLY pg_authid", "pg_authid")
+        self.assertUnsafe(
+            "SELECT * FROM users_user TABLESAMPLE BERNOULLI (5) REPEATABLE (1), pg_authid",
+            "pg_authid",
+        )
+
+    def test_with_ordinality_is_parsed_not_crashed_on(self):
+        self.assertSafe(
+            "SELECT * FROM unnest(ARRAY[1, 2]) WITH ORDINALITY AS u(value, position)"
+        )
+        self.assertUnsafe("SELECT * FROM users_user WITH ORDINALITY, pg_authid")
+
+    def test_cte_names_only_shadow_tables_inside_their_query(self):
+        self.assertUnsafe(
+            "SELECT * FROM (WITH pg_authid AS (SELECT 1) SELECT * FROM pg_authid) a, "
+            "pg_authid",
+            "pg_authid",
+        )
+        self.assertUnsafe(
+            "WITH pg_authid AS (SELECT * FROM pg_authid) SELECT * FROM pg_authid",
+            "pg_authid",
+        )
+        self.assertSafe(
+            "WITH recent AS (SELECT * FROM users_trip) SELECT * FROM recent r "
+            "JOIN users_vehicle v ON v.vehicle_id = r.vehicle_id"
+        )
+
+    def test_only_the_public_schema_is_readable(self):
+        self.assertSafe("SELECT * FROM public.users_vehicle")
+        self.assertUnsafe("SELECT * FROM archive.users_vehicle")
+        self.assertUnsafe("SELECT * FROM pg_catalog.pg_authid")
+
+    def test_statements_other_than_one_select_are_refused(self):
+        self.assertUnsafe("", "empty query")
+        self.assertUnsafe("SELECT 1; SELECT 2", "exactly one statement")
+        self.assertUnsafe("UPDATE users_user SET is_staff = true", "only SELECT")
+        self.assertUnsafe("SELECT * FROM users_user FOR UPDATE")
+
+    def test_verdicts_are_cached(self):
+        sql = "SELECT COUNT(*) FROM users_trip"
+        validate_sql(sql)
+        with mock.patch.object(evon_text2sql, "_check_sql") as check:
+            self.assertEqual(validate_sql(sql), (True, None))
+        check.assert_not_called()
+
+    def test_extract_sql_from_model_output(self):
+        self.assertEqual(
+            extract_sql("Here you go:\n```sql\nSELECT 1;\n```"), "SELECT 1"
+        )
+        self.assertEqual(extract_sql("SELECT 1; DROP TABLE x"), "SELECT 1; DROP TABLE x")
@@ -0,0 +1,340 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import IngestBatch, User, Vehicle, VehicleStats
+from ..telemetry import (
+    BatchTooLarge,
+    MalformedBatch,
+    ingest_vehicle_stats,
+    parse_batch,
+    validate_samples,
+)
+from .factories import make_user, make_vehicle, ndjson, sample_record
+
+INGEST_URL = "/api/ingest/vehicle-stats/"
+
+
+class ParseBatchTests(TestCase):
+    def test_ndjson_skips_blank_lines_and_reports_bad_ones(self):
+        body = b'{"vehicle_id": 1}\n\nnot json\n[1, 2]\n{"vehicle_id": 2}\n'
+        records, errors = parse_batch(body, "application/x-ndjson")
+
+        self.assertEqual(
+            records, [(1, {"vehicle_id": 1}), (5, {"vehicle_id": 2})]
+        )
+        self.assertEqual(
+            errors,
+            [
+                {"line": 3, "reason": "Invalid JSON."},
+                {"line": 4, "reason": "Expected a JSON object."},
+            ],
+        )
+
+    def test_csv_rows_keep_their_line_numbers(self):
+        body = b"vehicle_id,battery_percentage\n1,50\n2,60\n"
+        records, errors = parse_batch(body, "text/csv; charset=utf-8")
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            records,
+            [
+                (2, {"vehicle_id": "1", "battery_percentage": "50"}),
+                (3, {"vehicle_id": "2", "battery_percentage": "60"}),
+            ],
+        )
+
+    def test_byte_order_mark_is_ignored(self):
+        records, _ = parse_batch(b'\xef\xbb\xbf{"vehicle_id": 1}', "application/json")
+        self.assertEqual(records, [(1, {"vehicle_id": 1})])
+
+    def test_body_that_is_not_utf8_is_malformed(self):
+        with self.assertRaises(MalformedBatch):
+            parse_batch(b'{"vehicle_id": "\xff"}', "application/x-ndjson")
+
+    def test_broken_csv_framing_is_malformed(self):
+        # A field past csv.field_size_limit() means the quoting went astray.
+        body = b'vehicle_id\n"' + b"1" * 200000 + b'"\n'
+        with self.assertRaises(MalformedBatch):
+            parse_batch(body, "text/csv")
+
+
+class ValidateSamplesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicle = make_vehicle(cls.owner)
+        cls.other_vehicle = make_vehicle(make_user())
+        cls.now = timezone.now()
+
+    def validate(self, *records):
+        numbered = list(enumerate(records, start=1))
+        return validate_samples(numbered, Vehicle.objects.filter(owner=self.owner))
+
+    def test_valid_record_is_normalised(self):
+        samples, errors = self.validate(
+            sample_record(
+                str(self.vehicle.vehicle_id),
+                self.now,
+                battery_percentage="55",
+                total=1000.0,
+                is_charging="yes",
+            )
+        )
+
+        self.assertEqual(errors, [])
+        self.assertEqual(samples[0]["vehicle_id"], self.vehicle.vehicle_id)
+        self.assertEqual(samples[0]["battery_percentage"], 55)
+        self.assertEqual(samples[0]["total"], 1000)
+        self.assertIs(samples[0]["is_charging"], True)
+        self.assertEqual(samples[0]["recorded_at"], self.now)
+
+    def test_epoch_seconds_and_naive_datetimes_are_utc(self):
+        epoch = sample_record(self.vehicle.vehicle_id, self.now)
+        epoch["recorded_at"] = 1700000000
+        naive = sample_record(self.vehicle.vehicle_id, self.now)
+        naive["recorded_at"] = "2023-11-14T22:13:20"
+
+        samples, errors = self.validate(epoch, naive)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(samples[0]["recorded_at"], samples[1]["recorded_at"])
+        self.assertEqual(samples[0]["recorded_at"].timestamp(), 1700000000)
+
+    def test_invalid_records_are_rejected_with_a_reason(self):
+        vehicle_id = self.vehicle.vehicle_id
+        missing = sample_record(vehicle_id, self.now)
+        del missing["temperature"]
+
+        samples, errors = self.validate(
+            missing,
+            sample_record(vehicle_id, self.now, total="lots"),
+            sample_record(vehicle_id, self.now, total=1.5),
+            sample_record(vehicle_id, self.now, battery_health=101),
+            sample_record(vehicle_id, self.now, battery_percentage=True),
+            sample_record(vehicle_id, self.now + timedelta(hours=1)),
+            {**sample_record(vehicle_id, self.now), "recorded_at": "yesterday"},
+            sample_record(self.other_vehicle.vehicle_id, self.now),
+        )
+
+        self.assertEqual(samples, [])
+        self.assertEqual(
+            [error["reason"] for error in errors],
+            [
+                "temperature is required.",
+                "total must be an integer.",
+                "total must be an integer.",
+                "battery_health must be between 0 and 100.",
+                "battery_percentage must be an integer.",
+                "recorded_at is in the future.",
+                "recorded_at must be an ISO 8601 datetime or epoch seconds.",
+                f"Vehicle {self.other_vehicle.vehicle_id} not found or not permitted.",
+            ],
+        )
+
+    def test_vehicles_are_resolved_with_one_query(self):
+        records = [
+            sample_record(self.vehicle.vehicle_id, self.now - timedelta(seconds=index))
+            for index in range(20)
+        ]
+        with self.assertNumQueries(1):
+            samples, _ = self.validate(*records)
+        self.assertEqual(len(samples), 20)
+
+
+class IngestVehicleStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicle = make_vehicle(cls.owner)
+        cls.other_vehicle = make_vehicle(make_user())
+        cls.admin = make_user(role=User.Role.ADMIN)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def post(self, body, content_type="application/x-ndjson", **extra):
+        return self.client.post(INGEST_URL, body, content_type=content_type, **extra)
+
+    def records(self, count, vehicle=None, offset=0):
+        vehicle_id = (vehicle or self.vehicle).vehicle_id
+        return [
+            sample_record(
+                vehicle_id,
+                self.start + timedelta(seconds=offset + index),
+                battery_percentage=index % 100,
+            )
+            for index in range(count)
+        ]
+
+    def test_valid_batch_is_written_and_reported(self):
+        records = self.records(3)
+        body = ndjson(records) + "\nnot json"
+
+        response = self.post(body)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["received"], 4)
+        self.assertEqual(data["accepted"], 3)
+        self.assertEqual(data["inserted"], 3)
+        self.assertEqual(data["duplicates"], 0)
+        self.assertEqual(data["rejected"], 1)
+        self.assertEqual(data["errors"], [{"line": 4, "reason": "Invalid JSON."}])
+        self.assertEqual(data["write_method"], "insert")
+        self.assertFalse(data["replayed"])
+        self.assertEqual(
+            list(
+                VehicleStats.objects.order_by("recorded_at").values_list(
+                    "battery_percentage", flat=True
+                )
+            ),
+            [0, 1, 2],
+        )
+
+    def test_csv_batch_is_accepted(self):
+        records = self.records(2)
+        header = ",".join(records[0])
+        rows = [",".join(str(value) for value in record.values()) for record in records]
+
+        response = self.post("\n".join([header] + rows), content_type="text/csv")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["inserted"], 2)
+
+    def test_owner_cannot_write_to_another_vehicle(self):
+        response = self.post(ndjson(self.records(1, vehicle=self.other_vehicle)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["rejected"], 1)
+        self.assertFalse(VehicleStats.objects.exists())
+
+    def test_admin_can_write_to_any_vehicle(self):
+        self.client.force_authenticate(self.admin)
+
+        response = self.post(ndjson(self.records(1, vehicle=self.other_vehicle)))
+
+        self.assertEqual(response.json()["data"]["inserted"], 1)
+
+    def test_resent_samples_are_counted_as_duplicates(self):
+        self.post(ndjson(self.records(2)))
+
+        response = self.post(ndjson(self.records(3)))
+
+        data = response.json()["data"]
+        self.assertEqual(data["inserted"], 1)
+        self.assertEqual(data["duplicates"], 2)
+        self.assertEqual(VehicleStats.objects.count(), 3)
+
+    def test_body_that_is_not_utf8_is_a_400(self):
+        response = self.post(b"\xff\xfe")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["success"])
+
+    def test_oversized_idempotency_key_is_a_400(self):
+        response = self.post(ndjson(self.records(1)), HTTP_IDEMPOTENCY_KEY="k" * 256)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(VehicleStats.objects.exists())
+
+    @mock.patch("users.telemetry.INGEST_MAX_ROWS", 2)
+    def test_batch_over_the_row_limit_is_a_413(self):
+        response = self.post(ndjson(self.records(3)))
+
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(VehicleStats.objects.exists())
+
+    @mock.patch("users.telemetry.INGEST_MAX_ROWS", 2)
+    def test_row_limit_counts_unparseable_lines(self):
+        body = ndjson(self.records(2)) + "\nnot json"
+        with self.assertRaises(BatchTooLarge):
+            ingest_vehicle_stats(body, "application/x-ndjson", Vehicle.objects.all())
+
+
+class IdempotencyKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicle = make_vehicle(cls.owner)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        start = timezone.now() - timedelta(hours=1)
+        self.body = ndjson(
+            sample_record(self.vehicle.vehicle_id, start + timedelta(seconds=index))
+            for index in range(3)
+        )
+
+    def post(self, body, key="batch-1"):
+        return self.client.post(
+            INGEST_URL,
+            body,
+            content_type="application/x-ndjson",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_stored_report(self):
+        first = self.post(self.body).json()["data"]
+
+        with self.assertNumQueries(1):
+            retry = ingest_vehicle_stats(
+                self.body,
+                "application/x-ndjson",
+                Vehicle.objects.all(),
+                user=self.owner,
+                idempotency_key="batch-1",
+            )
+
+        self.assertTrue(retry["replayed"])
+        self.assertEqual(retry["inserted"], 3)
+        self.assertEqual({**retry, "replayed": False}, first)
+        self.assertEqual(VehicleStats.objects.count(), 3)
+        self.assertEqual(IngestBatch.objects.get().report["inserted"], 3)
+
+    def test_same_key_with_another_payload_is_a_422(self):
+        self.post(self.body)
+
+        response = self.post(self.body + "\n")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(
+            response.json()["message"],
+            "Idempotency-Key was already used for a different batch.",
+        )
+
+    def test_keys_are_scoped_per_user(self):
+        self.post(self.body)
+        self.client.force_authenticate(make_user(role=User.Role.ADMIN))
+
+        response = self.post(self.body)
+
+        data = response.json()["data"]
+        self.assertFalse(data["replayed"])
+        self.assertEqual(data["duplicates"], 3)
+        self.assertEqual(IngestBatch.objects.count(), 2)
+
+    def test_without_a_key_retries_are_deduplicated_per_sample(self):
+        self.post(self.body, key="")
+
+        data = self.post(self.body, key="").json()["data"]
+
+        self.assertFalse(data["replayed"])
+        self.assertEqual(data["inserted"], 0)
+        self.assertEqual(data["duplicates"], 3)
+        self.assertFalse(IngestBatch.objects.exists())
+
+    def test_duplicate_timestamps_within_a_batch_are_stored_once(self):
+        record = sample_record(self.vehicle.vehicle_id, timezone.now())
+
+        data = self.post(ndjson([record, record]), key="").json()["data"]
+
+        self.assertEqual(data["accepted"], 2)
+        self.assertEqual(data["inserted"], 1)
+        self.assertEqual(data["duplicates"], 1)
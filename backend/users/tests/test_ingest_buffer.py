@@ -0,0 +1,149 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..ingest_buffer import BufferFull, IngestBuffer, active_buffer
+from ..models import IngestBatch, User, VehicleStats
+from .factories import make_user, make_vehicle, ndjson, sample_record
+
+INGEST_URL = "/api/ingest/vehicle-stats/"
+
+
+@mock.patch("users.ingest_buffer.close_old_connections")
+@mock.patch.object(IngestBuffer, "_ensure_started")
+class BufferedIngestTests(TestCase):
+    """
+    The flusher thread is never started; tests flush on their own thread so
+    the writes land in the test transaction.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicle = make_vehicle(cls.owner)
+
+    def setUp(self):
+        self.buffer = IngestBuffer(
+            capacity=5, flush_rows=4, flush_interval=60, drain_timeout=1
+        )
+        patcher = mock.patch(
+            "users.views.IngestView.active_buffer", return_value=self.buffer
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def body(self, count, offset=0):
+        return ndjson(
+            sample_record(
+                self.vehicle.vehicle_id, self.start + timedelta(seconds=offset + index)
+            )
+            for index in range(count)
+        )
+
+    def post(self, body, **extra):
+        return self.client.post(
+            INGEST_URL, body, content_type="application/x-ndjson", **extra
+        )
+
+    def flush(self):
+        with self.buffer._lock:
+            samples = self.buffer._take()
+        self.buffer._flush(samples)
+
+    def test_batch_is_queued_then_flushed(self, *mocks):
+        response = self.post(self.body(3))
+
+        self.assertEqual(response.status_code, 202)
+        data = response.json()["data"]
+        self.assertEqual(data["write_method"], "buffered")
+        self.assertEqual(data["accepted"], 3)
+        self.assertIsNone(data["inserted"])
+        self.assertFalse(VehicleStats.objects.exists())
+        self.assertEqual(self.buffer.metrics()["depth"], 3)
+
+        self.flush()
+
+        self.assertEqual(VehicleStats.objects.count(), 3)
+        metrics = self.buffer.metrics()
+        self.assertEqual((metrics["depth"], metrics["flushed"]), (0, 3))
+        self.assertEqual((metrics["inserted"], metrics["duplicates"]), (3, 0))
+
+    def test_flush_takes_whole_batches_up_to_flush_rows(self, *mocks):
+        self.buffer.offer([{"n": 1}] * 3)
+        self.buffer.offer([{"n": 2}] * 2)
+
+        with self.buffer._lock:
+            self.assertEqual(len(self.buffer._take()), 3)
+            self.assertEqual(self.buffer._in_flight, 3)
+            self.assertEqual(self.buffer._pending, 2)
+
+    def test_full_buffer_is_a_429_with_retry_after(self, *mocks):
+        self.post(self.body(3))
+
+        response = self.post(self.body(3, offset=10))
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        metrics = self.buffer.metrics()
+        self.assertEqual(metrics["depth"], 3)
+        self.assertEqual(metrics["rejected_batches"], 1)
+        self.assertEqual(metrics["dropped"]["backpressure"], 3)
+
+    def test_samples_being_flushed_count_against_capacity(self, *mocks):
+        self.buffer.offer([{}] * 4)
+        with self.buffer._lock:
+            self.buffer._take()
+
+        with self.assertRaises(BufferFull):
+            self.buffer.offer([{}] * 2)
+
+    def test_buffered_batch_records_no_idempotency_key(self, *mocks):
+        self.post(self.body(2), HTTP_IDEMPOTENCY_KEY="retry-me")
+        self.flush()
+
+        retry = self.post(self.body(2), HTTP_IDEMPOTENCY_KEY="retry-me")
+
+        self.assertEqual(retry.status_code, 202)
+        self.assertFalse(retry.json()["data"]["replayed"])
+        self.assertFalse(IngestBatch.objects.exists())
+        self.flush()
+        self.assertEqual(VehicleStats.objects.count(), 2)
+        self.assertEqual(self.buffer.metrics()["duplicates"], 2)
+
+    def test_failed_flush_is_counted_as_dropped(self, *mocks):
+        self.buffer.offer([{"vehicle_id": self.vehicle.vehicle_id}])
+
+        with mock.patch("users.ingest_buffer.write_samples", side_effect=RuntimeError):
+            with self.assertLogs("users.ingest_buffer", "ERROR"):
+                self.flush()
+
+        metrics = self.buffer.metrics()
+        self.assertEqual(metrics["flush_errors"], 1)
+        self.assertEqual(metrics["dropped"]["flush_error"], 1)
+        self.assertEqual(metrics["in_flight"], 0)
+
+
+class IngestModeTests(TestCase):
+    @override_settings(INGEST_MODE="sync")
+    def test_sync_mode_has_no_buffer(self):
+        self.assertIsNone(active_buffer())
+
+    @override_settings(INGEST_MODE="BUFFERED")
+    def test_buffered_mode(self):
+        self.assertIsInstance(active_buffer(), IngestBuffer)
+
+    def test_metrics_are_admin_only(self):
+        client = APIClient()
+        client.force_authenticate(make_user())
+        self.assertEqual(client.get("/api/admin/ingest-metrics/").status_code, 403)
+
+        client.force_authenticate(make_user(role=User.Role.ADMIN))
+        data = client.get("/api/admin/ingest-metrics/").json()["data"]
+        self.assertEqual(data["mode"], "sync")
+        self.assertIn("dropped", data)
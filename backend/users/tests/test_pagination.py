@@ -0,0 +1,137 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Trip
+from ..views.role_based_url_handler import _decode_cursor, _encode_cursor
+from .factories import make_user, make_vehicle
+
+TRIPS_URL = "/api/get-trip-details/"
+
+
+def _cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+class CursorTests(TestCase):
+    def test_round_trip(self):
+        moment = timezone.now()
+        self.assertEqual(_decode_cursor(_encode_cursor(moment, 42)), (moment, 42))
+
+    def test_malformed_cursors_are_rejected(self):
+        moment = timezone.now().isoformat()
+        for cursor in (
+            "not base64!",
+            base64.urlsafe_b64encode(b"\xff\xfe").decode("ascii"),
+            _cursor([moment, 1]),
+            _cursor({"t": moment}),
+            _cursor({"t": moment, "k": "1"}),
+            _cursor({"t": moment, "k": 1.5}),
+            _cursor({"t": moment, "k": True}),
+            _cursor({"t": moment, "k": [1]}),
+            _cursor({"t": 1700000000, "k": 1}),
+            _cursor({"t": "yesterday", "k": 1}),
+        ):
+            with self.subTest(cursor=cursor):
+                with self.assertRaisesMessage(ValueError, "cursor is invalid."):
+                    _decode_cursor(cursor)
+
+
+class TripPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user()
+        cls.vehicle = make_vehicle(cls.owner)
+        cls.start = timezone.now().replace(microsecond=0) - timedelta(days=10)
+        # Two trips per day so pages have to break ties on trip_id.
+        for index in range(10):
+            Trip.objects.create(
+                vehicle=cls.vehicle,
+                start_date=cls.start + timedelta(days=index // 2),
+                end_date=cls.start + timedelta(days=index // 2, hours=1),
+                start_location="A",
+                end_location="B",
+                distance=10,
+                duration=60,
+                average_speed=10,
+                battery_used=5,
+                cost=1,
+                efficiency=2,
+                status="completed",
+            )
+        Trip.objects.create(
+            vehicle=make_vehicle(make_user()),
+            start_date=cls.start,
+            end_date=cls.start,
+            start_location="A",
+            end_location="B",
+            distance=10,
+            duration=60,
+            average_speed=10,
+            battery_used=5,
+            cost=1,
+            efficiency=2,
+            status="completed",
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def get(self, **params):
+        return self.client.get(TRIPS_URL, params)
+
+    def test_without_limit_or_cursor_everything_is_returned(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["data"]), 10)
+        self.assertIsNone(response.json()["pagination"])
+
+    def test_pages_cover_every_row_once_newest_first(self):
+        expected = list(
+            Trip.objects.filter(vehicle=self.vehicle)
+            .order_by("-start_date", "-trip_id")
+            .values_list("trip_id", flat=True)
+        )
+
+        seen = []
+        params = {"limit": 3}
+        while True:
+            body = self.get(**params).json()
+            seen.extend(row["trip_id"] for row in body["data"])
+            if not body["pagination"]["has_more"]:
+                self.assertIsNone(body["pagination"]["next_cursor"])
+                break
+            params = {"limit": 3, "cursor": body["pagination"]["next_cursor"]}
+
+        self.assertEqual(seen, expected)
+
+    def test_time_window_bounds_are_inclusive_then_exclusive(self):
+        since = self.start + timedelta(days=1)
+        until = self.start + timedelta(days=3)
+
+        body = self.get(since=since.isoformat(), until=until.isoformat()).json()
+
+        self.assertEqual(len(body["data"]), 4)
+
+    def test_limit_is_capped(self):
+        body = self.get(limit=100000).json()
+
+        self.assertEqual(body["pagination"]["limit"], 1000)
+
+    def test_bad_parameters_are_a_400(self):
+        for params in (
+            {"limit": "ten"},
+            {"limit": 0},
+            {"cursor": _cursor({"t": self.start.isoformat(), "k": "1 OR 1=1"})},
+            {"since": "last week"},
+        ):
+            with self.subTest(params=params):
+                response = self.get(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.json()["success"])
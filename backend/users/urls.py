@@ -10,6 +10,9 @@ from .views import (
     BillViews,
     AdminDashboardView,
     EvonView,
+    IngestView,
+    BatteryAnalyticsView,
+    DashboardSummaryView,
 )
 from .views.authView import (
     RegisterView,
@@ -47,6 +50,24 @@ urlpatterns = [
         VehicleViews.GetChargingDetails,
         name="charging-details",
     ),
+    # Battery analytics endpoints
+    path(
+        "vehicles/<int:vehicle_id>/battery-analytics/",
+        BatteryAnalyticsView.BatteryAnalytics,
+        name="battery-analytics",
+    ),
+    # Dashboard summary endpoints
+    path(
+        "dashboard/daily-summary/",
+        DashboardSummaryView.DailySummary,
+        name="daily-summary",
+    ),
+    # Telemetry ingestion endpoints
+    path(
+        "ingest/vehicle-stats/",
+        IngestView.IngestVehicleStats,
+        name="ingest-vehicle-stats",
+    ),
     # Trip endpoints
     path("get-trip-details/", TripDetailsView.TripDetails, name="trip-details"),
     # Service and Issue endpoints
@@ -96,6 +117,21 @@ urlpatterns = [
         AdminDashboardView.AdminDashboardData,
         name="admin-dashboard-data",
     ),
+    path(
+        "admin/scope-search/",
+        AdminDashboardView.AdminScopeSearch,
+        name="admin-scope-search",
+    ),
+    path(
+        "admin/billing-analytics/",
+        AdminDashboardView.AdminBillingAnalytics,
+        name="admin-billing-analytics",
+    ),
+    path(
+        "admin/ingest-metrics/",
+        AdminDashboardView.AdminIngestMetrics,
+        name="admin-ingest-metrics",
+    ),
     path(
         "admin/evon-query/",
         EvonView.EvonQuery,
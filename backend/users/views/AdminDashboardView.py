@@ -1,10 +1,25 @@
-from django.http import JsonResponse
-from django.db.models import Count
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Case, Count, IntegerField, Value, When
 from django.db.models import Q
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from django.views.decorators.csrf import csrf_exempt
+import time
 
+from ..counters import (
+    COUNT_MODES,
+    count_select_sql,
+    counts_mode,
+    resolve_counts,
+    summary_counts,
+)
+from ..battery_stats import fleet_battery_stats, vehicle_battery_stats
+from ..billing_analytics import DEFAULT_TOP_CUSTOMERS, billing_analytics
+from ..ingest_buffer import ingest_buffer, ingest_mode
+from ..rollups import daily_summary
+from .role_based_url_handler import parse_time_window
 from ..models import (
     Bill,
     ChargeHistory,
@@ -20,6 +35,10 @@ from ..models import (
     VehicleStats,
 )
 
+STREAM_CHUNK_SIZE = 2000
+SCOPE_SEARCH_DEFAULT_LIMIT = 10
+SCOPE_SEARCH_MAX_LIMIT = 50
+
 
 def _is_admin(user):
     return str(getattr(user, "role", "")).upper() == "ADMIN"
@@ -29,23 +48,6 @@ def _as_bool(value):
     return str(value).strip().lower() in {"1", "true", "yes", "on"}
 
 
-def _summary_counts():
-    return {
-        "companies": Company.objects.count(),
-        "users": User.objects.count(),
-        "vehicles": Vehicle.objects.count(),
-        "vehicle_stats": VehicleStats.objects.count(),
-        "trips": Trip.objects.count(),
-        "charge_history": ChargeHistory.objects.count(),
-        "tasks": Task.objects.count(),
-        "service_tasks": ServiceTask.objects.count(),
-        "services": Service.objects.count(),
-        "issues": Issues.objects.count(),
-        "notifications": Notification.objects.count(),
-        "bills": Bill.objects.count(),
-    }
-
-
 def _scope_options():
     users = list(
         User.objects.filter(is_active=True)
@@ -66,7 +68,101 @@ def _scope_options():
     return {"users": users, "vehicles": vehicles}
 
 
-def _build_user_scoped_data(user_id):
+SCOPE_USERS_JSON_SQL = (
+    "(SELECT COALESCE(json_agg(json_build_object("
+    "'user_id', u.user_id, 'name', u.name, 'email', u.email, 'role', u.role"
+    ") ORDER BY u.name), '[]'::json) "
+    "FROM users_user u WHERE u.is_active)"
+)
+
+SCOPE_VEHICLES_JSON_SQL = (
+    "(SELECT COALESCE(json_agg(json_build_object("
+    "'vehicle_id', v.vehicle_id, 'registration_number', v.registration_number, "
+    "'vehicle_model', v.vehicle_model, 'owner__name', o.name"
+    ") ORDER BY v.registration_number), '[]'::json) "
+    "FROM users_vehicle v LEFT JOIN users_user o ON o.user_id = v.owner_id "
+    "WHERE v.is_active)"
+)
+
+
+def _summary_and_options(mode, include_options=False):
+    """
+    Fetch summary counts and, when requested, the full scope option lists
+    in a single SQL statement.
+
+    On PostgreSQL the option lists are aggregated to JSON server-side as
+    extra columns of the count query; other backends fall back to one
+    statement for the counts plus the ORM option queries. Options are None
+    unless ``include_options`` is set; use the scope search endpoint instead.
+    """
+    if not include_options:
+        return summary_counts(mode), None
+
+    if connection.vendor != "postgresql":
+        return summary_counts(mode), _scope_options()
+
+    count_sql, params = count_select_sql(mode)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {count_sql}, {SCOPE_USERS_JSON_SQL}, {SCOPE_VEHICLES_JSON_SQL}",
+            params,
+        )
+        row = cursor.fetchone()
+
+    counts = resolve_counts(row[:-2])
+    return counts, {"users": row[-2], "vehicles": row[-1]}
+
+
+def _search_scope_options(query, scope_type, limit):
+    """
+    Return the top ``limit`` active users and/or vehicles matching ``query``.
+
+    Matches use icontains, served by the trigram indexes on PostgreSQL;
+    prefix matches rank ahead of substring matches.
+    """
+    results = {}
+
+    if scope_type in {"all", "user"}:
+        results["users"] = list(
+            User.objects.filter(is_active=True)
+            .filter(Q(name__icontains=query) | Q(email__icontains=query))
+            .annotate(
+                rank=Case(
+                    When(
+                        Q(name__istartswith=query) | Q(email__istartswith=query),
+                        then=Value(0),
+                    ),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                )
+            )
+            .order_by("rank", "name", "user_id")
+            .values("user_id", "name", "email", "role")[:limit]
+        )
+
+    if scope_type in {"all", "vehicle"}:
+        results["vehicles"] = list(
+            Vehicle.objects.filter(is_active=True, registration_number__icontains=query)
+            .annotate(
+                rank=Case(
+                    When(registration_number__istartswith=query, then=Value(0)),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                )
+            )
+            .order_by("rank", "registration_number", "vehicle_id")
+            .values(
+                "vehicle_id",
+                "registration_number",
+                "vehicle_model",
+                "owner__name",
+            )[:limit]
+        )
+
+    return results
+
+
+def _user_scoped_querysets(user_id):
     user_qs = User.objects.filter(user_id=user_id)
     owned_vehicles_qs = Vehicle.objects.filter(owner_id=user_id)
     owned_vehicle_ids = list(owned_vehicles_qs.values_list("vehicle_id", flat=True))
@@ -76,7 +172,7 @@ def _build_user_scoped_data(user_id):
     company_ids.discard(None)
 
     return {
-        "companies": list(
+        "companies": (
             Company.objects.filter(company_id__in=company_ids).values(
                 "company_id",
                 "company_name",
@@ -89,7 +185,7 @@ def _build_user_scoped_data(user_id):
                 "deactivated_at",
             )
         ),
-        "users": list(
+        "users": (
             user_qs.select_related("company").values(
                 "user_id",
                 "name",
@@ -109,7 +205,7 @@ def _build_user_scoped_data(user_id):
                 "last_login",
             )
         ),
-        "vehicles": list(
+        "vehicles": (
             owned_vehicles_qs.select_related("owner", "company").values(
                 "vehicle_id",
                 "vehicle_model",
@@ -126,7 +222,7 @@ def _build_user_scoped_data(user_id):
                 "deactivated_at",
             )
         ),
-        "vehicle_stats": list(
+        "vehicle_stats": (
             VehicleStats.objects.filter(vehicle_id__in=owned_vehicle_ids)
             .select_related("vehicle")
             .values(
@@ -144,7 +240,7 @@ def _build_user_scoped_data(user_id):
                 "recorded_at",
             )
         ),
-        "trips": list(
+        "trips": (
             Trip.objects.filter(vehicle_id__in=owned_vehicle_ids)
             .select_related("vehicle")
             .values(
@@ -165,7 +261,7 @@ def _build_user_scoped_data(user_id):
                 "notes",
             )
         ),
-        "charge_history": list(
+        "charge_history": (
             ChargeHistory.objects.filter(vehicle_id__in=owned_vehicle_ids)
             .select_related("vehicle")
             .values(
@@ -179,7 +275,7 @@ def _build_user_scoped_data(user_id):
                 "cost",
             )
         ),
-        "tasks": list(
+        "tasks": (
             Task.objects.filter(assigned_to_id=user_id)
             .select_related("assigned_to")
             .values(
@@ -196,7 +292,7 @@ def _build_user_scoped_data(user_id):
                 "created_at",
             )
         ),
-        "service_tasks": list(
+        "service_tasks": (
             ServiceTask.objects.filter(
                 Q(serviceman_id=user_id) | Q(vehicle_id__in=owned_vehicle_ids)
             )
@@ -213,7 +309,7 @@ def _build_user_scoped_data(user_id):
                 "serviceman__email",
             )
         ),
-        "services": list(
+        "services": (
             Service.objects.filter(
                 Q(serviceman_id=user_id)
                 | Q(assigned_by_id=user_id)
@@ -244,7 +340,7 @@ def _build_user_scoped_data(user_id):
                 "task_count",
             )
         ),
-        "issues": list(
+        "issues": (
             Issues.objects.filter(
                 Q(assigned_to_id=user_id)
                 | Q(assigned_by_id=user_id)
@@ -269,7 +365,7 @@ def _build_user_scoped_data(user_id):
                 "cost",
             )
         ),
-        "notifications": list(
+        "notifications": (
             Notification.objects.filter(
                 Q(user_id=user_id) | Q(vehicle_id__in=owned_vehicle_ids)
             )
@@ -286,7 +382,7 @@ def _build_user_scoped_data(user_id):
                 "created_at",
             )
         ),
-        "bills": list(
+        "bills": (
             Bill.objects.filter(
                 Q(customer_id=user_id) | Q(vehicle_id__in=owned_vehicle_ids)
             )
@@ -316,7 +412,7 @@ def _build_user_scoped_data(user_id):
     }
 
 
-def _build_vehicle_scoped_data(vehicle_id):
+def _vehicle_scoped_querysets(vehicle_id):
     vehicle_qs = Vehicle.objects.filter(vehicle_id=vehicle_id)
     owner_id = vehicle_qs.values_list("owner_id", flat=True).first()
     company_id = vehicle_qs.values_list("company_id", flat=True).first()
@@ -330,7 +426,7 @@ def _build_vehicle_scoped_data(vehicle_id):
         company_filter = Q(company_id=company_id)
 
     return {
-        "companies": list(
+        "companies": (
             Company.objects.filter(company_filter).values(
                 "company_id",
                 "company_name",
@@ -343,7 +439,7 @@ def _build_vehicle_scoped_data(vehicle_id):
                 "deactivated_at",
             )
         ),
-        "users": list(
+        "users": (
             User.objects.filter(user_filter).select_related("company").values(
                 "user_id",
                 "name",
@@ -363,7 +459,7 @@ def _build_vehicle_scoped_data(vehicle_id):
                 "last_login",
             )
         ),
-        "vehicles": list(
+        "vehicles": (
             vehicle_qs.select_related("owner", "company").values(
                 "vehicle_id",
                 "vehicle_model",
@@ -380,7 +476,7 @@ def _build_vehicle_scoped_data(vehicle_id):
                 "deactivated_at",
             )
         ),
-        "vehicle_stats": list(
+        "vehicle_stats": (
             VehicleStats.objects.filter(vehicle_id=vehicle_id)
             .select_related("vehicle")
             .values(
@@ -398,7 +494,7 @@ def _build_vehicle_scoped_data(vehicle_id):
                 "recorded_at",
             )
         ),
-        "trips": list(
+        "trips": (
             Trip.objects.filter(vehicle_id=vehicle_id)
             .select_related("vehicle")
             .values(
@@ -419,7 +515,7 @@ def _build_vehicle_scoped_data(vehicle_id):
                 "notes",
             )
         ),
-        "charge_history": list(
+        "charge_history": (
             ChargeHistory.objects.filter(vehicle_id=vehicle_id)
             .select_related("vehicle")
             .values(
@@ -433,8 +529,8 @@ def _build_vehicle_scoped_data(vehicle_id):
                 "cost",
             )
         ),
-        "tasks": [],
-        "service_tasks": list(
+        "tasks": Task.objects.none(),
+        "service_tasks": (
             ServiceTask.objects.filter(vehicle_id=vehicle_id)
             .select_related("vehicle", "serviceman")
             .values(
@@ -448,7 +544,7 @@ def _build_vehicle_scoped_data(vehicle_id):
                 "serviceman__email",
             )
         ),
-        "services": list(
+        "services": (
             Service.objects.filter(vehicle_id=vehicle_id)
             .select_related("vehicle", "serviceman", "assigned_by", "assigned_to")
             .annotate(task_count=Count("tasks"))
@@ -473,7 +569,7 @@ def _build_vehicle_scoped_data(vehicle_id):
                 "task_count",
             )
         ),
-        "issues": list(
+        "issues": (
             Issues.objects.filter(vehicle_id=vehicle_id)
             .select_related("vehicle", "assigned_to", "assigned_by")
             .values(
@@ -493,7 +589,7 @@ def _build_vehicle_scoped_data(vehicle_id):
                 "cost",
             )
         ),
-        "notifications": list(
+        "notifications": (
             Notification.objects.filter(vehicle_id=vehicle_id)
             .select_related("vehicle", "user")
             .values(
@@ -507,7 +603,7 @@ def _build_vehicle_scoped_data(vehicle_id):
                 "created_at",
             )
         ),
-        "bills": list(
+        "bills": (
             Bill.objects.filter(vehicle_id=vehicle_id)
             .select_related("service", "issue", "vehicle", "customer")
             .values(
@@ -534,6 +630,52 @@ def _build_vehicle_scoped_data(vehicle_id):
     }
 
 
+def _build_user_scoped_data(user_id):
+    return {
+        key: list(queryset)
+        for key, queryset in _user_scoped_querysets(user_id).items()
+    }
+
+
+def _build_vehicle_scoped_data(vehicle_id):
+    return {
+        key: list(queryset)
+        for key, queryset in _vehicle_scoped_querysets(vehicle_id).items()
+    }
+
+
+def _stream_scoped_response(envelope, querysets):
+    """
+    Yield the scoped payload as JSON text one chunk at a time.
+
+    Each section is read through a server-side cursor so memory stays
+    bounded by STREAM_CHUNK_SIZE rows regardless of the scope's history.
+    """
+    encoder = DjangoJSONEncoder()
+    yield encoder.encode(envelope)[:-1] + ', "data": {'
+
+    scoped_counts = {}
+    for index, (key, queryset) in enumerate(querysets.items()):
+        yield ("" if index == 0 else ", ") + f"{encoder.encode(key)}: ["
+
+        count = 0
+        batch = []
+        for row in queryset.iterator(chunk_size=STREAM_CHUNK_SIZE):
+            batch.append(encoder.encode(row))
+            if len(batch) >= STREAM_CHUNK_SIZE:
+                yield (", " if count else "") + ", ".join(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            yield (", " if count else "") + ", ".join(batch)
+            count += len(batch)
+
+        yield "]"
+        scoped_counts[key] = count
+
+    yield f'}}, "scoped_counts": {encoder.encode(scoped_counts)}}}'
+
+
 @csrf_exempt
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -553,8 +695,14 @@ def AdminDashboardData(request):
         scope_type = str(request.GET.get("scope_type", "")).strip().lower()
         scope_id = request.GET.get("scope_id")
 
-        counts = _summary_counts()
-        options = _scope_options()
+        mode = str(request.GET.get("counts_mode", "")).strip().lower()
+        if mode not in COUNT_MODES:
+            mode = counts_mode()
+        include_options = _as_bool(request.GET.get("include_scope_options", "false"))
+        include_daily = _as_bool(request.GET.get("include_daily_summary", "false"))
+        include_battery = _as_bool(request.GET.get("include_battery_stats", "false"))
+        since, until = parse_time_window(request)
+        counts, options = _summary_and_options(mode, include_options)
 
         if not include_details:
             return JsonResponse(
@@ -563,7 +711,14 @@ def AdminDashboardData(request):
                     "message": "Admin summary fetched successfully.",
                     "icon": "success",
                     "counts": counts,
+                    "counts_mode": mode,
                     "scope_options": options,
+                    "daily_summary": (
+                        daily_summary(None, since, until) if include_daily else None
+                    ),
+                    "battery_stats": (
+                        {"fleet": fleet_battery_stats()} if include_battery else None
+                    ),
                     "data": {},
                     "scoped": False,
                 },
@@ -596,6 +751,49 @@ def AdminDashboardData(request):
                 status=400,
             )
 
+        summary = None
+        battery_stats = None
+        if include_daily or include_battery:
+            if scope_type == "user":
+                scope_vehicle_ids = list(
+                    Vehicle.objects.filter(owner_id=scope_id).values_list(
+                        "vehicle_id", flat=True
+                    )
+                )
+            else:
+                scope_vehicle_ids = [scope_id]
+        if include_daily:
+            summary = daily_summary(scope_vehicle_ids, since, until)
+        if include_battery:
+            battery_stats = {
+                "fleet": fleet_battery_stats(scope_vehicle_ids),
+                "vehicles": vehicle_battery_stats(scope_vehicle_ids),
+            }
+
+        if _as_bool(request.GET.get("stream", "false")):
+            if scope_type == "user":
+                querysets = _user_scoped_querysets(scope_id)
+            else:
+                querysets = _vehicle_scoped_querysets(scope_id)
+
+            envelope = {
+                "success": True,
+                "message": "Scoped admin details fetched successfully.",
+                "icon": "success",
+                "counts": counts,
+                "counts_mode": mode,
+                "scope_options": options,
+                "daily_summary": summary,
+                "battery_stats": battery_stats,
+                "scoped": True,
+                "scope": {"type": scope_type, "id": scope_id},
+            }
+            return StreamingHttpResponse(
+                _stream_scoped_response(envelope, querysets),
+                content_type="application/json",
+                status=200,
+            )
+
         if scope_type == "user":
             data = _build_user_scoped_data(scope_id)
         else:
@@ -609,7 +807,10 @@ def AdminDashboardData(request):
                 "message": "Scoped admin details fetched successfully.",
                 "icon": "success",
                 "counts": counts,
+                "counts_mode": mode,
                 "scope_options": options,
+                "daily_summary": summary,
+                "battery_stats": battery_stats,
                 "scoped": True,
                 "scope": {"type": scope_type, "id": scope_id},
                 "scoped_counts": scoped_counts,
@@ -617,6 +818,15 @@ def AdminDashboardData(request):
             },
             status=200,
         )
+    except ValueError as exc:
+        return JsonResponse(
+            {
+                "success": False,
+                "message": str(exc),
+                "icon": "error",
+            },
+            status=400,
+        )
     except Exception as exc:
         return JsonResponse(
             {
@@ -626,3 +836,151 @@ def AdminDashboardData(request):
             },
             status=500,
         )
+
+
+@csrf_exempt
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def AdminScopeSearch(request):
+    if not _is_admin(request.user):
+        return JsonResponse(
+            {
+                "success": False,
+                "message": "Access denied. Admin role required.",
+                "icon": "error",
+            },
+            status=403,
+        )
+
+    query = str(request.GET.get("q", "")).strip()
+    scope_type = str(request.GET.get("scope_type", "all")).strip().lower()
+
+    if not query:
+        return JsonResponse(
+            {
+                "success": False,
+                "message": "q is required.",
+                "icon": "error",
+            },
+            status=400,
+        )
+
+    if scope_type not in {"all", "user", "vehicle"}:
+        return JsonResponse(
+            {
+                "success": False,
+                "message": "scope_type must be one of 'all', 'user' or 'vehicle'.",
+                "icon": "error",
+            },
+            status=400,
+        )
+
+    try:
+        limit = int(request.GET.get("limit", SCOPE_SEARCH_DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        limit = SCOPE_SEARCH_DEFAULT_LIMIT
+    limit = max(1, min(limit, SCOPE_SEARCH_MAX_LIMIT))
+
+    try:
+        results = _search_scope_options(query, scope_type, limit)
+        return JsonResponse(
+            {
+                "success": True,
+                "message": "Scope search completed successfully.",
+                "icon": "success",
+                "data": results,
+            },
+            status=200,
+        )
+    except Exception as exc:
+        return JsonResponse(
+            {
+                "success": False,
+                "message": f"Failed to search scope options: {str(exc)}",
+                "icon": "error",
+            },
+            status=500,
+        )
+
+
+@csrf_exempt
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def AdminBillingAnalytics(request):
+    if not _is_admin(request.user):
+        return JsonResponse(
+            {
+                "success": False,
+                "message": "Access denied. Admin role required.",
+                "icon": "error",
+            },
+            status=403,
+        )
+
+    granularity = str(request.GET.get("granularity", "day")).strip().lower()
+
+    try:
+        top = int(request.GET.get("top", DEFAULT_TOP_CUSTOMERS))
+    except (TypeError, ValueError):
+        top = DEFAULT_TOP_CUSTOMERS
+
+    try:
+        since, until = parse_time_window(request)
+        started = time.perf_counter()
+        analytics = billing_analytics(since, until, granularity, top)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    except ValueError as exc:
+        return JsonResponse(
+            {
+                "success": False,
+                "message": str(exc),
+                "icon": "error",
+            },
+            status=400,
+        )
+    except Exception as exc:
+        return JsonResponse(
+            {
+                "success": False,
+                "message": f"Failed to compute billing analytics: {str(exc)}",
+                "icon": "error",
+            },
+            status=500,
+        )
+
+    return JsonResponse(
+        {
+            "success": True,
+            "message": "Billing analytics computed successfully.",
+            "icon": "success",
+            "data": analytics,
+            "timing": {"query_ms": elapsed_ms},
+        },
+        status=200,
+    )
+
+
+@csrf_exempt
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def AdminIngestMetrics(request):
+    if not _is_admin(request.user):
+        return JsonResponse(
+            {
+                "success": False,
+                "message": "Access denied. Admin role required.",
+                "icon": "error",
+            },
+            status=403,
+        )
+
+    # Buffers are per worker process: this is the worker that answered.
+    return JsonResponse(
+        {
+            "success": True,
+            "message": "Ingest buffer metrics fetched successfully.",
+            "icon": "success",
+            "data": {"mode": ingest_mode(), **ingest_buffer().metrics()},
+        },
+        status=200,
+    )
@@ -0,0 +1,102 @@
+from rest_framework.decorators import api_view, permission_classes
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.permissions import IsAuthenticated
+from .role_based_url_handler import RoleBasedUrlHandler, BaseHandler
+from django.http import JsonResponse
+from ..battery_analytics import compute_battery_analytics, load_vehicle_samples
+from ..models import User, Vehicle
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@csrf_exempt
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def BatteryAnalytics(request, vehicle_id):
+    return RoleBasedUrlHandler(request, BatteryAnalyticsView(vehicle_id))
+
+
+class BatteryAnalyticsView(BaseHandler):
+    def __init__(self, vehicle_id):
+        self.vehicle_id = vehicle_id
+
+    def getBatteryAnalytics(self, request):
+        vehicle = (
+            Vehicle.objects.filter(vehicle_id=self.vehicle_id)
+            .values("vehicle_id", "owner_id", "registration_number")
+            .first()
+        )
+        if vehicle is None:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": "Vehicle not found.",
+                    "icon": "error",
+                },
+                status=404,
+            )
+
+        if (
+            request.user.role != User.Role.ADMIN
+            and vehicle["owner_id"] != request.user.user_id
+        ):
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": "You are not authorized to view analytics for this vehicle.",
+                    "icon": "error",
+                },
+                status=403,
+            )
+
+        try:
+            since, until = self.time_window(request)
+            started = time.perf_counter()
+            samples = load_vehicle_samples(vehicle["vehicle_id"], since, until)
+            loaded = time.perf_counter()
+            analytics = compute_battery_analytics(samples)
+            finished = time.perf_counter()
+        except ValueError as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=400,
+            )
+        except Exception as e:
+            logger.error(f"Error computing battery analytics: {str(e)}")
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": "An error occurred while computing battery analytics.",
+                    "icon": "error",
+                },
+                status=500,
+            )
+
+        logger.info(
+            f"Battery analytics computed for vehicle {self.vehicle_id} "
+            f"({analytics['samples']} samples) by user {request.user.user_id}"
+        )
+
+        return JsonResponse(
+            {
+                "success": True,
+                "message": "Battery analytics computed successfully.",
+                "icon": "success",
+                "data": {
+                    "vehicle_id": vehicle["vehicle_id"],
+                    "registration_number": vehicle["registration_number"],
+                    "analytics": analytics,
+                },
+                "timing": {
+                    "load_ms": round((loaded - started) * 1000, 2),
+                    "compute_ms": round((finished - loaded) * 1000, 2),
+                },
+            },
+            status=200,
+        )
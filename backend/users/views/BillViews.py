@@ -3,112 +3,60 @@ from django.views.decorators.csrf import csrf_exempt
 from rest_framework.permissions import IsAuthenticated
 from .role_based_url_handler import RoleBasedUrlHandler, BaseHandler
 from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Lower
 from django.utils import timezone
-from ..models import Bill, Service, Issues
+from ..models import Bill, BillLineItem, Service, Issues
+from ..counters import adjust_counter
+from ..evon_cache import invalidate_on_commit
+from ..pricing import normalize_name, pricing_catalog
+import heapq
 import logging
-import csv
-from pathlib import Path
 from datetime import timedelta
 from decimal import Decimal, InvalidOperation
-import json
 
 logger = logging.getLogger(__name__)
 
 
-PRICING_FILE_PATH = Path(__file__).resolve().parents[2] / "data" / "service_pricing.csv"
-BILLING_META_PREFIX = "[BILLING_META]"
-
-
-def _normalize_name(value: str) -> str:
-    return " ".join((value or "").strip().lower().split())
-
-
-def _load_pricing_catalog():
-    pricing_map = {}
-    pricing_rows = []
-
-    if not PRICING_FILE_PATH.exists():
-        return pricing_map, pricing_rows
-
-    with PRICING_FILE_PATH.open("r", newline="", encoding="utf-8") as csv_file:
-        reader = csv.DictReader(csv_file)
-        for row in reader:
-            service_name = (row.get("service_name") or "").strip()
-            if not service_name:
-                continue
-
-            try:
-                price = float(row.get("price") or 0)
-            except (TypeError, ValueError):
-                price = 0.0
-
-            pricing_map[_normalize_name(service_name)] = {
-                "name": service_name,
-                "price": round(price, 2),
-                "description": (row.get("description") or "").strip(),
-            }
-            pricing_rows.append(
-                {
-                    "service_name": service_name,
-                    "price": round(price, 2),
-                    "description": (row.get("description") or "").strip(),
-                }
-            )
-
-    return pricing_map, pricing_rows
-
-
-def _append_missing_pricing_rows(rows):
-    if not rows:
-        return
-
-    file_exists = PRICING_FILE_PATH.exists()
-    PRICING_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
-
-    with PRICING_FILE_PATH.open("a", newline="", encoding="utf-8") as csv_file:
-        fieldnames = ["service_name", "price", "description"]
-        writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-
-        if not file_exists:
-            writer.writeheader()
-
-        for row in rows:
-            writer.writerow(
-                {
-                    "service_name": row["service_name"],
-                    "price": f"{float(row['price']):.2f}",
-                    "description": row.get("description", ""),
-                }
-            )
-
-
-def _extract_billing_meta(description: str):
-    if not description:
-        return {}
-
-    marker_index = description.rfind(BILLING_META_PREFIX)
-    if marker_index == -1:
-        return {}
-
-    raw_json = description[marker_index + len(BILLING_META_PREFIX) :].strip()
-    try:
-        parsed = json.loads(raw_json)
-    except (TypeError, ValueError, json.JSONDecodeError):
-        return {}
-
-    if not isinstance(parsed, dict):
-        return {}
-
-    return parsed
-
-
-def _build_issue_description(base_message: str, qty: float, rate: float, tax: float):
-    payload = {
-        "qty": qty,
-        "rate": rate,
-        "tax": tax,
+def _with_latest_line_item(issues_qs):
+    """Annotate issues with the qty/rate/tax of their latest bill line item."""
+    latest_line = BillLineItem.objects.filter(issue=OuterRef("pk")).order_by(
+        "-line_item_id"
+    )
+    return issues_qs.annotate(
+        line_qty=Subquery(latest_line.values("qty")[:1]),
+        line_rate=Subquery(latest_line.values("rate")[:1]),
+        line_tax=Subquery(latest_line.values("tax")[:1]),
+    )
+
+
+def _issue_billing_item(issue, pricing_map):
+    """
+    Suggested bill item for an issue annotated by ``_with_latest_line_item``:
+    the line item rate, else the tracked issue cost, else the catalog price.
+    """
+    key = normalize_name(issue.category)
+
+    qty_value = float(issue.line_qty or 1)
+    tax_value = float(issue.line_tax or 0)
+
+    issue_price = float(issue.line_rate or 0)
+    if issue_price <= 0:
+        issue_price = float(issue.cost or 0)
+    if issue_price <= 0:
+        catalog_entry = pricing_map.get(key)
+        issue_price = float(catalog_entry["price"]) if catalog_entry else 0.0
+
+    item = {
+        "name": issue.category,
+        "price": round(issue_price, 2),
+        "source": "issue",
+        "qty": max(qty_value, 1),
+        "tax": max(tax_value, 0),
+        "issue_id": issue.issue_id,
     }
-    return f"{base_message} {BILLING_META_PREFIX} {json.dumps(payload)}"
+    return key, issue_price, item
 
 
 @csrf_exempt
@@ -151,6 +99,17 @@ class BillDetailsView(BaseHandler):
                 "payment_date",
                 "notes",
             )
+            bills, pagination = self.paginate(request, bills, "bill_date", "bill_id")
+
+        except ValueError as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=400,
+            )
 
         except Exception as e:
             logger.error(f"Error fetching bill details: {str(e)}")
@@ -174,8 +133,9 @@ class BillDetailsView(BaseHandler):
                 "message": "Bill details fetched successfully.",
                 "icon": "success",
                 "data": {
-                    "bills": list(bills),
+                    "bills": bills,
                 },
+                "pagination": pagination,
             },
             status=200,
         )
@@ -198,7 +158,8 @@ def RegisterBillingItemsAsIssues(request):
 class BillingFormDataView(BaseHandler):
     def getBillingFormData(self, request):
         try:
-            pricing_map, pricing_rows = _load_pricing_catalog()
+            catalog = pricing_catalog.snapshot()
+            pricing_map = catalog.entries
 
             services = (
                 Service.objects.filter(serviceman=request.user)
@@ -207,24 +168,22 @@ class BillingFormDataView(BaseHandler):
                 .order_by("-service_id")
             )
 
-            issues_qs = (
+            issues_qs = _with_latest_line_item(
                 Issues.objects.filter(assigned_to=request.user)
-                .select_related("vehicle")
+                .select_related("vehicle", "vehicle__owner")
                 .order_by("-issue_id")
             )
 
-            issues_by_vehicle = {}
-            for issue in issues_qs:
-                issues_by_vehicle.setdefault(issue.vehicle_id, []).append(issue)
-
             products_map = {}
             records = []
             missing_rows = []
             missing_names = set()
 
+            # Catalog products are prepared once per catalog load; only
+            # names outside the catalog are collected here.
             def add_product(name, price, description, source):
-                key = _normalize_name(name)
-                if not key:
+                key = normalize_name(name)
+                if not key or key in pricing_map:
                     return
 
                 if key not in products_map:
@@ -235,41 +194,48 @@ class BillingFormDataView(BaseHandler):
                         "source": source,
                     }
 
-            for row in pricing_rows:
-                add_product(
-                    row["service_name"],
-                    row["price"],
-                    row.get("description", ""),
-                    "pricing_catalog",
+            def add_missing(name, key, price, description):
+                if key and key not in missing_names:
+                    missing_names.add(key)
+                    missing_rows.append(
+                        {
+                            "service_name": name,
+                            "price": price,
+                            "description": description,
+                        }
+                    )
+
+            def register_issue(issue, key, issue_price):
+                issue_desc = f"Auto-added from issue #{issue.issue_id} category: {issue.category}"
+                if issue_price > 0:
+                    add_missing(issue.category, key, issue_price, issue_desc)
+                add_product(issue.category, issue_price, issue_desc, "issue")
+
+            # One pass over the issues: build each one's suggested item and
+            # group the items per vehicle. For a repeated
+            # category the latest issue's item wins, in the position of the
+            # first one.
+            issue_lines = []
+            issues_by_vehicle = {}
+            for issue in issues_qs:
+                key, issue_price, item = _issue_billing_item(issue, pricing_map)
+                issue_lines.append((issue, key, issue_price, item))
+                vehicle_issues = issues_by_vehicle.setdefault(
+                    issue.vehicle_id, {"lines": [], "items": {}}
                 )
+                vehicle_issues["lines"].append((issue, key, issue_price))
+                if key:
+                    vehicle_issues["items"][key] = item
 
+            no_issues = {"lines": [], "items": {}}
+            registered_vehicles = set()
             for service in services:
                 task_names = [task.task_name for task in service.tasks.all()]
-                related_issues = issues_by_vehicle.get(service.vehicle_id, [])
+                vehicle_issues = issues_by_vehicle.get(service.vehicle_id, no_issues)
                 suggested_items_map = {}
 
-                def upsert_suggested_item(name, price, source, issue_id=None):
-                    key = _normalize_name(name)
-                    if not key:
-                        return
-
-                    existing = suggested_items_map.get(key)
-                    item = {
-                        "name": name,
-                        "price": round(float(price), 2),
-                        "source": source,
-                        "qty": 1,
-                        "tax": 0,
-                    }
-                    if issue_id is not None:
-                        item["issue_id"] = issue_id
-
-                    # Prefer issue-based row over service-task row for same category
-                    if existing is None or source == "issue":
-                        suggested_items_map[key] = item
-
                 for task_name in task_names:
-                    key = _normalize_name(task_name)
+                    key = normalize_name(task_name)
                     catalog_entry = pricing_map.get(key)
 
                     if catalog_entry:
@@ -278,62 +244,27 @@ class BillingFormDataView(BaseHandler):
                     else:
                         item_price = 0.0
                         item_desc = f"Auto-added for service task: {task_name}"
-                        if key and key not in missing_names:
-                            missing_names.add(key)
-                            missing_rows.append(
-                                {
-                                    "service_name": task_name,
-                                    "price": item_price,
-                                    "description": item_desc,
-                                }
-                            )
-
-                    upsert_suggested_item(task_name, item_price, "service_task")
+                        add_missing(task_name, key, item_price, item_desc)
+
+                    if key and key not in suggested_items_map:
+                        suggested_items_map[key] = {
+                            "name": task_name,
+                            "price": round(float(item_price), 2),
+                            "source": "service_task",
+                            "qty": 1,
+                            "tax": 0,
+                        }
                     add_product(task_name, item_price, item_desc, "service_task")
 
-                for issue in related_issues:
-                    issue_name = issue.category
-                    key = _normalize_name(issue_name)
-                    billing_meta = _extract_billing_meta(issue.description)
-
-                    qty_value = float(billing_meta.get("qty", 1) or 1)
-                    tax_value = float(billing_meta.get("tax", 0) or 0)
+                # Prefer issue-based row over service-task row for same category
+                suggested_items_map.update(vehicle_issues["items"])
 
-                    # Always prefer tracked issue cost for issue rows
-                    issue_price = float(billing_meta.get("rate", 0) or 0)
-                    if issue_price <= 0:
-                        issue_price = float(issue.cost or 0)
-
-                    if issue_price <= 0:
-                        catalog_entry = pricing_map.get(key)
-                        issue_price = (
-                            float(catalog_entry["price"]) if catalog_entry else 0.0
-                        )
-
-                    issue_desc = f"Auto-added from issue #{issue.issue_id} category: {issue.category}"
-                    if key and key not in missing_names and issue_price > 0:
-                        missing_names.add(key)
-                        missing_rows.append(
-                            {
-                                "service_name": issue_name,
-                                "price": issue_price,
-                                "description": issue_desc,
-                            }
-                        )
-
-                    upsert_suggested_item(
-                        issue_name,
-                        issue_price,
-                        "issue",
-                        issue_id=issue.issue_id,
-                    )
-                    issue_item_key = _normalize_name(issue_name)
-                    if issue_item_key in suggested_items_map:
-                        suggested_items_map[issue_item_key]["qty"] = max(qty_value, 1)
-                        suggested_items_map[issue_item_key]["tax"] = max(tax_value, 0)
-                    add_product(issue_name, issue_price, issue_desc, "issue")
-
-                suggested_items = list(suggested_items_map.values())
+                # A vehicle's issues only add catalog rows and products the
+                # first time one of its services is seen.
+                if service.vehicle_id not in registered_vehicles:
+                    registered_vehicles.add(service.vehicle_id)
+                    for issue, key, issue_price in vehicle_issues["lines"]:
+                        register_issue(issue, key, issue_price)
 
                 records.append(
                     {
@@ -353,41 +284,20 @@ class BillingFormDataView(BaseHandler):
                             else "N/A"
                         ),
                         "task_names": task_names,
-                        "issue_ids": [issue.issue_id for issue in related_issues],
-                        "suggested_items": suggested_items,
+                        "issue_ids": [
+                            issue.issue_id for issue, _, _ in vehicle_issues["lines"]
+                        ],
+                        "suggested_items": list(suggested_items_map.values()),
                     }
                 )
 
-            for issue in issues_qs:
-                issue_name = issue.category
-                key = _normalize_name(issue_name)
-                if any(
-                    issue.issue_id in record.get("issue_ids", []) for record in records
-                ):
+            # Issues on a vehicle with a service are already part of that
+            # service's record.
+            for issue, key, issue_price, item in issue_lines:
+                if issue.vehicle_id in registered_vehicles:
                     continue
 
-                catalog_entry = pricing_map.get(key)
-                billing_meta = _extract_billing_meta(issue.description)
-                qty_value = float(billing_meta.get("qty", 1) or 1)
-                tax_value = float(billing_meta.get("tax", 0) or 0)
-                issue_price = float(billing_meta.get("rate", 0) or 0)
-                if issue_price <= 0:
-                    issue_price = float(issue.cost or 0)
-                if issue_price <= 0 and catalog_entry:
-                    issue_price = float(catalog_entry["price"])
-
-                issue_desc = f"Auto-added from issue #{issue.issue_id} category: {issue.category}"
-                if key and key not in missing_names and issue_price > 0:
-                    missing_names.add(key)
-                    missing_rows.append(
-                        {
-                            "service_name": issue_name,
-                            "price": issue_price,
-                            "description": issue_desc,
-                        }
-                    )
-
-                add_product(issue_name, issue_price, issue_desc, "issue")
+                register_issue(issue, key, issue_price)
 
                 records.append(
                     {
@@ -404,26 +314,17 @@ class BillingFormDataView(BaseHandler):
                         ),
                         "task_names": [],
                         "issue_ids": [issue.issue_id],
-                        "suggested_items": [
-                            {
-                                "name": issue_name,
-                                "price": round(issue_price, 2),
-                                "source": "issue",
-                                "issue_id": issue.issue_id,
-                                "qty": max(qty_value, 1),
-                                "tax": max(tax_value, 0),
-                            }
-                        ],
+                        "suggested_items": [item],
                     }
                 )
 
             if missing_rows:
-                _append_missing_pricing_rows(missing_rows)
+                pricing_catalog.add_missing(missing_rows)
 
-            products = sorted(
+            extra_products = sorted(
                 [
                     {
-                        "id": index + 1,
+                        "id": len(catalog.products) + index + 1,
                         "name": product["name"],
                         "price": product["price"],
                         "description": product["description"],
@@ -433,6 +334,13 @@ class BillingFormDataView(BaseHandler):
                 ],
                 key=lambda item: item["name"].lower(),
             )
+            products = list(
+                heapq.merge(
+                    catalog.products,
+                    extra_products,
+                    key=lambda item: item["name"].lower(),
+                )
+            )
 
             now = timezone.now()
 
@@ -559,7 +467,7 @@ class RegisterBillingItemsAsIssuesView(BaseHandler):
             created = []
             updated = []
             skipped = []
-            first_tracked_issue = None
+            lines = []
             subtotal_amount = Decimal("0.00")
 
             for raw_item in items:
@@ -599,76 +507,104 @@ class RegisterBillingItemsAsIssuesView(BaseHandler):
                     )
                     continue
 
-                line_subtotal = Decimal(str(qty)) * Decimal(str(rate))
+                line_qty = Decimal(str(qty))
+                line_rate = Decimal(str(rate))
+                line_subtotal = line_qty * line_rate
                 line_tax = Decimal(str(tax))
                 line_total = line_subtotal + line_tax
                 subtotal_amount += line_subtotal
-                computed_cost = int(round(float(line_total)))
-
-                existing_issue = (
-                    Issues.objects.filter(
-                        vehicle_id=vehicle_id,
-                        assigned_to=request.user,
-                        is_resolved=False,
-                        category__iexact=category,
-                    )
-                    .order_by("-issue_id")
-                    .first()
-                )
-
-                if existing_issue:
-                    existing_issue.cost = computed_cost
-                    existing_issue.description = _build_issue_description(
-                        f"Updated from billing workflow by {request.user.name}.",
-                        qty,
-                        rate,
-                        tax,
-                    )
-                    existing_issue.save(update_fields=["cost", "description"])
-                    issue = existing_issue
-                    updated.append(
-                        {
-                            "issue_id": issue.issue_id,
-                            "category": issue.category,
-                            "cost": issue.cost,
-                        }
-                    )
-                else:
-                    issue = Issues.objects.create(
-                        vehicle_id=vehicle_id,
-                        category=category,
-                        description=_build_issue_description(
-                            f"Registered from billing workflow by {request.user.name}.",
-                            qty,
-                            rate,
-                            tax,
-                        ),
-                        assigned_to=request.user,
-                        assigned_by=request.user,
-                        priority=Issues.Priority.LOW,
-                        is_resolved=False,
-                        cost=computed_cost,
-                    )
-                    created.append(
-                        {
-                            "issue_id": issue.issue_id,
-                            "category": issue.category,
-                            "cost": issue.cost,
-                        }
-                    )
-
-                if first_tracked_issue is None:
-                    first_tracked_issue = issue
+                lines.append((category, line_qty, line_rate, line_tax, line_total))
 
             try:
                 tax_percentage = Decimal("10.00")
                 tax_amount = (subtotal_amount * tax_percentage) / Decimal("100")
                 discount_amount = Decimal("0.00")
                 total_amount = subtotal_amount + tax_amount - discount_amount
+            except (InvalidOperation, ValueError):
+                return JsonResponse(
+                    {
+                        "success": False,
+                        "message": "Unable to compute bill totals.",
+                        "icon": "error",
+                    },
+                    status=400,
+                )
+
+            with transaction.atomic():
+                # One lookup for every open issue a line item could update;
+                # the newest issue per category wins, as with the old
+                # per-item ``category__iexact`` query.
+                open_issues = {}
+                if lines:
+                    for issue in (
+                        Issues.objects.annotate(category_key=Lower("category"))
+                        .filter(
+                            vehicle_id=vehicle_id,
+                            assigned_to=request.user,
+                            is_resolved=False,
+                            category_key__in={line[0].lower() for line in lines},
+                        )
+                        .order_by("-issue_id")
+                    ):
+                        open_issues.setdefault(issue.category_key, issue)
+
+                new_issues = []
+                changed_issues = {}
+                tracked = []
+                line_items = []
+                for category, qty, rate, tax, line_total in lines:
+                    key = category.lower()
+                    computed_cost = int(round(float(line_total)))
+                    issue = open_issues.get(key)
+                    if issue is not None:
+                        issue.cost = computed_cost
+                        issue.description = (
+                            f"Updated from billing workflow by {request.user.name}."
+                        )
+                        if issue.pk is not None:
+                            changed_issues[issue.pk] = issue
+                        tracked.append((updated, issue, computed_cost))
+                    else:
+                        issue = Issues(
+                            vehicle_id=vehicle_id,
+                            category=category,
+                            description=(
+                                f"Registered from billing workflow by {request.user.name}."
+                            ),
+                            assigned_to=request.user,
+                            assigned_by=request.user,
+                            priority=Issues.Priority.LOW,
+                            is_resolved=False,
+                            cost=computed_cost,
+                        )
+                        # Later items with the same name update this issue.
+                        open_issues[key] = issue
+                        new_issues.append(issue)
+                        tracked.append((created, issue, computed_cost))
+                    line_items.append(
+                        BillLineItem(
+                            issue=issue,
+                            qty=qty,
+                            rate=rate,
+                            tax=tax,
+                            line_total=line_total,
+                        )
+                    )
+
+                if new_issues:
+                    Issues.objects.bulk_create(new_issues)
+                    # bulk_create skips post_save, which keeps the counter.
+                    adjust_counter("issues", len(new_issues))
+                if changed_issues:
+                    Issues.objects.bulk_update(
+                        changed_issues.values(), ["cost", "description"]
+                    )
+                if new_issues or changed_issues:
+                    invalidate_on_commit(Issues)
 
                 bill = Bill.objects.create(
                     service=related_service,
-                    issue=first_tracked_issue,
+                    issue=tracked[0][1] if tracked else None,
                     vehicle=vehicle,
                     customer=vehicle.owner or request.user,
                     due_date=timezone.now() + timedelta(days=7),
@@ -680,14 +616,17 @@ class RegisterBillingItemsAsIssuesView(BaseHandler):
                     payment_method=payment_method if payment_method else None,
                     notes=f"Generated from service billing UI ({place}).",
                 )
-            except (InvalidOperation, ValueError):
-                return JsonResponse(
+                for line_item in line_items:
+                    line_item.bill = bill
+                BillLineItem.objects.bulk_create(line_items)
+
+            for bucket, issue, cost in tracked:
+                bucket.append(
                     {
-                        "success": False,
-                        "message": "Unable to compute bill totals.",
-                        "icon": "error",
-                    },
-                    status=400,
+                        "issue_id": issue.issue_id,
+                        "category": issue.category,
+                        "cost": cost,
+                    }
                 )
 
             message = (
@@ -0,0 +1,76 @@
+from rest_framework.decorators import api_view, permission_classes
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.permissions import IsAuthenticated
+from .role_based_url_handler import RoleBasedUrlHandler, BaseHandler
+from django.http import JsonResponse
+from ..models import User, Vehicle
+from ..rollups import daily_summary
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@csrf_exempt
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def DailySummary(request):
+    return RoleBasedUrlHandler(request, DailySummaryView())
+
+
+class DailySummaryView(BaseHandler):
+    def getDailySummary(self, request):
+        vehicle_id = request.query_params.get("vehicle_id")
+
+        try:
+            since, until = self.time_window(request)
+            if vehicle_id:
+                try:
+                    vehicle_id = int(vehicle_id)
+                except ValueError:
+                    raise ValueError("vehicle_id must be an integer.")
+
+            if request.user.role == User.Role.ADMIN:
+                # Admins may summarise any vehicle or, without vehicle_id,
+                # the whole fleet.
+                vehicle_ids = [vehicle_id] if vehicle_id else None
+            else:
+                vehicles = Vehicle.objects.filter(owner=request.user)
+                if vehicle_id:
+                    vehicles = vehicles.filter(vehicle_id=vehicle_id)
+                vehicle_ids = list(vehicles.values_list("vehicle_id", flat=True))
+
+            summary = daily_summary(vehicle_ids, since, until)
+        except ValueError as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=400,
+            )
+        except Exception as e:
+            logger.error(f"Error fetching daily summary: {str(e)}")
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": "An error occurred while fetching the daily summary.",
+                    "icon": "error",
+                },
+                status=500,
+            )
+
+        logger.info(
+            f"Daily summary ({summary['source']}) fetched for user {request.user.user_id}"
+            + (f" and vehicle {vehicle_id}" if vehicle_id else "")
+        )
+
+        return JsonResponse(
+            {
+                "success": True,
+                "message": "Daily summary fetched successfully.",
+                "icon": "success",
+                "data": summary,
+            },
+            status=200,
+        )
@@ -0,0 +1,140 @@
+from rest_framework.decorators import api_view, permission_classes
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.permissions import IsAuthenticated
+from .role_based_url_handler import RoleBasedUrlHandler, BaseHandler
+from django.http import JsonResponse
+from ..models import User, Vehicle
+from ..ingest_buffer import BufferFull, active_buffer
+from ..telemetry import (
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    BatchTooLarge,
+    IdempotencyKeyReused,
+    MalformedBatch,
+    ingest_vehicle_stats,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@csrf_exempt
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def IngestVehicleStats(request):
+    return RoleBasedUrlHandler(request, IngestVehicleStatsView())
+
+
+class IngestVehicleStatsView(BaseHandler):
+    def postIngestVehicleStats(self, request):
+        # Admins may push samples for any vehicle, everyone else only for
+        # vehicles they own.
+        if getattr(request.user, "role", "") == User.Role.ADMIN:
+            vehicle_queryset = Vehicle.objects.all()
+        else:
+            vehicle_queryset = Vehicle.objects.filter(owner=request.user)
+
+        idempotency_key = (request.headers.get("Idempotency-Key") or "").strip()
+        if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": (
+                        f"Idempotency-Key must be at most "
+                        f"{IDEMPOTENCY_KEY_MAX_LENGTH} characters."
+                    ),
+                    "icon": "error",
+                },
+                status=400,
+            )
+
+        try:
+            report = ingest_vehicle_stats(
+                request.body,
+                request.content_type,
+                vehicle_queryset,
+                user=request.user,
+                idempotency_key=idempotency_key or None,
+                buffer=active_buffer(),
+            )
+        except BufferFull as e:
+            logger.warning(
+                f"Ingest buffer refused a batch from user {request.user.user_id}: {e}"
+            )
+            response = JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=429,
+            )
+            response["Retry-After"] = str(e.retry_after)
+            return response
+        except IdempotencyKeyReused as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=422,
+            )
+        except MalformedBatch as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=400,
+            )
+        except BatchTooLarge as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=413,
+            )
+        except Exception as e:
+            logger.error(f"Error ingesting vehicle stats: {str(e)}", exc_info=True)
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": "An error occurred while ingesting vehicle stats.",
+                    "icon": "error",
+                },
+                status=500,
+            )
+
+        queued = report["write_method"] == "buffered"
+        if report["replayed"]:
+            logger.info(
+                f"Replayed ingest batch {idempotency_key} for user {request.user.user_id}"
+            )
+        elif queued:
+            logger.info(
+                f"Queued {report['accepted']} vehicle stats samples "
+                f"({report['rejected']} rejected) for user {request.user.user_id}"
+            )
+        else:
+            logger.info(
+                f"Ingested {report['inserted']} vehicle stats samples "
+                f"({report['duplicates']} duplicate, {report['rejected']} rejected, "
+                f"{report['rows_per_sec']} rows/sec) for user {request.user.user_id}"
+            )
+
+        return JsonResponse(
+            {
+                "success": True,
+                "message": (
+                    "Vehicle stats batch queued for writing."
+                    if queued
+                    else "Vehicle stats batch ingested successfully."
+                ),
+                "icon": "success",
+                "data": report,
+            },
+            status=202 if queued else 200,
+        )
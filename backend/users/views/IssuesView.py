@@ -6,6 +6,7 @@ from django.http import JsonResponse
 from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError, DatabaseError
+from django.db.models import ProtectedError
 from django.utils import timezone
 from ..models import Issues
 import logging
@@ -58,6 +59,21 @@ def DeleteIssue(request, issue_id):
             status=404,
         )
 
+    except ProtectedError as e:
+        # Bills and their line items keep the issue they charged for.
+        logger.warning(
+            f"Issue {issue_id} not deleted for user {request.user.user_id}: "
+            f"referenced by {len(e.protected_objects)} billing record(s)"
+        )
+        return JsonResponse(
+            {
+                "success": False,
+                "message": "This issue has been billed and cannot be deleted.",
+                "icon": "error",
+            },
+            status=409,
+        )
+
     except Exception as e:
         logger.error(f"Error deleting issue {issue_id}: {str(e)}")
         return JsonResponse(
@@ -178,6 +194,19 @@ class IssueDetailsView(BaseHandler):
                 "is_resolved",
                 "cost",
             )
+            issue_details, pagination = self.paginate(
+                request, issue_details, "date_reported", "issue_id"
+            )
+
+        except ValueError as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=400,
+            )
 
         except Exception as e:
             logger.error(f"Error fetching issue details: {str(e)}")
@@ -200,7 +229,8 @@ class IssueDetailsView(BaseHandler):
                 "success": True,
                 "message": "Issue details fetched successfully.",
                 "icon": "success",
-                "data": list(issue_details),
+                "data": issue_details,
+                "pagination": pagination,
             },
             status=200,
         )
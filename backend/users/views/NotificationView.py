@@ -50,6 +50,19 @@ class NotificationDetailsView(BaseHandler):
                 )
                 .order_by("-created_at")
             )
+            notifications, pagination = self.paginate(
+                request, notifications, "created_at", "notification_id"
+            )
+
+        except ValueError as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=400,
+            )
 
         except Exception as e:
             logger.error(f"Error fetching notifications: {str(e)}")
@@ -71,7 +84,8 @@ class NotificationDetailsView(BaseHandler):
                 "success": True,
                 "message": "Notifications fetched successfully.",
                 "icon": "success",
-                "data": list(notifications),
+                "data": notifications,
+                "pagination": pagination,
             },
             status=200,
         )
@@ -47,6 +47,19 @@ class ServiceDetailsView(BaseHandler):
                     "rating",
                 )
             )
+            service_details, pagination = self.paginate(
+                request, service_details, "start_time", "service_id"
+            )
+
+        except ValueError as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=400,
+            )
 
         except Exception as e:
             logger.error(f"Error fetching service details: {str(e)}")
@@ -68,7 +81,8 @@ class ServiceDetailsView(BaseHandler):
                 "success": True,
                 "message": "Service details fetched successfully.",
                 "icon": "success",
-                "data": list(service_details),
+                "data": service_details,
+                "pagination": pagination,
             },
             status=200,
         )
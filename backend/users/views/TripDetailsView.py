@@ -49,6 +49,19 @@ class TripDetailsView(BaseHandler):
                 "status",
                 "notes",
             )
+            trip_details, pagination = self.paginate(
+                request, trip_details, "start_date", "trip_id"
+            )
+
+        except ValueError as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=400,
+            )
 
         except Exception as e:
             logger.error(f"Error fetching trip details: {str(e)}")
@@ -71,7 +84,8 @@ class TripDetailsView(BaseHandler):
                 "success": True,
                 "message": "Trip details fetched successfully.",
                 "icon": "success",
-                "data": list(trip_details),
+                "data": trip_details,
+                "pagination": pagination,
             },
             status=200,
         )
@@ -6,12 +6,16 @@ from django.http import JsonResponse
 from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError, DatabaseError
-from ..models import Vehicle, VehicleStats
+from ..models import Vehicle, VehicleCurrentState, VehicleStats
+from ..downsampling import downsampled_vehicle_series
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+VEHICLE_HISTORY_DEFAULT = 50
+VEHICLE_HISTORY_MAX = 500
+
 
 @csrf_exempt
 @api_view(["GET"])
@@ -23,7 +27,7 @@ def VehicleDetails(request):
 class VehicleDetailsView(BaseHandler):
     def getVehicleDetails(self, request):
         try:
-            vehicle = (
+            vehicle = list(
                 Vehicle.objects.filter(owner=request.user)
                 .all()
                 .values(
@@ -50,11 +54,14 @@ class VehicleDetailsView(BaseHandler):
             )
 
         try:
-            vehicle_stats = (
-                VehicleStats.objects.filter(vehicle__owner=request.user)
-                .all()
-                .values(
-                    "stats_id",
+            history = int(request.GET.get("history", VEHICLE_HISTORY_DEFAULT))
+        except (TypeError, ValueError):
+            history = VEHICLE_HISTORY_DEFAULT
+        history = max(0, min(history, VEHICLE_HISTORY_MAX))
+
+        try:
+            current_state = list(
+                VehicleCurrentState.objects.filter(vehicle__owner=request.user).values(
                     "vehicle_id",
                     "battery_percentage",
                     "total",
@@ -67,6 +74,28 @@ class VehicleDetailsView(BaseHandler):
                     "recorded_at",
                 )
             )
+
+            # The newest ``history`` samples per vehicle, one indexed
+            # (vehicle, -recorded_at) range read each.
+            vehicle_stats = []
+            for row in vehicle if history else []:
+                vehicle_stats.extend(
+                    VehicleStats.objects.filter(vehicle_id=row["vehicle_id"])
+                    .order_by("-recorded_at", "-stats_id")
+                    .values(
+                        "stats_id",
+                        "vehicle_id",
+                        "battery_percentage",
+                        "total",
+                        "battery_health",
+                        "charging_time",
+                        "temperature",
+                        "battery_capacity",
+                        "is_charging",
+                        "estimated_range",
+                        "recorded_at",
+                    )[:history]
+                )
         except Exception as e:
             logger.error(f"Error fetching vehicle stats: {str(e)}")
             return JsonResponse(
@@ -88,8 +117,10 @@ class VehicleDetailsView(BaseHandler):
                 "message": "Vehicle details fetched successfully.",
                 "icon": "success",
                 "data": {
-                    "vehicle": list(vehicle),
-                    "vehicle_stats": list(vehicle_stats),
+                    "vehicle": vehicle,
+                    "current_state": current_state,
+                    "vehicle_stats": vehicle_stats,
+                    "history_limit": history,
                 },
             },
             status=200,
@@ -119,6 +150,9 @@ class ChargingDetailsView(BaseHandler):
                     vehicle_id=vehicle_id
                 )
 
+            if request.query_params.get("points"):
+                return self.downsampled(request, vehicle_id)
+
             vehicle_stats = vehicle_stats_queryset.all().values(
                 "stats_id",
                 "vehicle_id",
@@ -132,6 +166,18 @@ class ChargingDetailsView(BaseHandler):
                 "estimated_range",
                 "recorded_at",
             )
+            vehicle_stats, pagination = self.paginate(
+                request, vehicle_stats, "recorded_at", "stats_id"
+            )
+        except ValueError as e:
+            return JsonResponse(
+                {
+                    "success": False,
+                    "message": str(e),
+                    "icon": "error",
+                },
+                status=400,
+            )
         except Exception as e:
             logger.error(f"Error fetching vehicle stats: {str(e)}")
             return JsonResponse(
@@ -154,7 +200,44 @@ class ChargingDetailsView(BaseHandler):
                 "message": "Vehicle stats fetched successfully.",
                 "icon": "success",
                 "data": {
-                    "vehicle_stats": list(vehicle_stats),
+                    "vehicle_stats": vehicle_stats,
+                },
+                "pagination": pagination,
+            },
+            status=200,
+        )
+
+    def downsampled(self, request, vehicle_id):
+        """``?points=N``: LTTB-downsampled chart series per vehicle."""
+        try:
+            points = int(request.query_params.get("points"))
+        except (TypeError, ValueError):
+            raise ValueError("points must be an integer.")
+        since, until = self.time_window(request)
+
+        vehicles = Vehicle.objects.filter(owner=request.user)
+        if vehicle_id:
+            vehicles = vehicles.filter(vehicle_id=vehicle_id)
+        series = [
+            downsampled_vehicle_series(owned_id, points, since, until)
+            for owned_id in vehicles.order_by("vehicle_id").values_list(
+                "vehicle_id", flat=True
+            )
+        ]
+
+        logger.info(
+            f"Downsampled vehicle stats to {points} points for user "
+            f"{request.user.user_id}"
+            + (f" and vehicle {vehicle_id}" if vehicle_id else "")
+        )
+
+        return JsonResponse(
+            {
+                "success": True,
+                "message": "Vehicle stats fetched successfully.",
+                "icon": "success",
+                "data": {
+                    "downsampled": series,
                 },
             },
             status=200,
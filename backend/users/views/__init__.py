@@ -8,6 +8,9 @@ from . import NotificationView
 from . import BillViews
 from . import AdminDashboardView
 from . import EvonView
+from . import IngestView
+from . import BatteryAnalyticsView
+from . import DashboardSummaryView
 from . import authView
 from .role_based_url_handler import RoleBasedUrlHandler, BaseHandler
 
@@ -23,6 +26,9 @@ __all__ = [
     "BillViews",
     "AdminDashboardView",
     "EvonView",
+    "IngestView",
+    "BatteryAnalyticsView",
+    "DashboardSummaryView",
     "authView",
     "RoleBasedUrlHandler",
     "BaseHandler",
@@ -1,9 +1,74 @@
 from django.http import JsonResponse
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework.permissions import IsAuthenticated
+from datetime import datetime, time
+import base64
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _parse_time_bound(value, name):
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+
+    if parsed is None:
+        raise ValueError(f"{name} must be an ISO 8601 date or datetime.")
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_time_window(request):
+    """
+    Parse the ``since`` (inclusive) and ``until`` (exclusive) query
+    parameters into aware datetimes; missing bounds are None.
+
+    Raises ValueError for malformed values.
+    """
+    params = request.GET
+    since = params.get("since")
+    until = params.get("until")
+    return (
+        _parse_time_bound(since, "since") if since else None,
+        _parse_time_bound(until, "until") if until else None,
+    )
+
+
+def _encode_cursor(time_value, pk_value):
+    payload = json.dumps({"t": time_value.isoformat(), "k": pk_value})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    """
+    Return the ``(time, pk)`` of a ``next_cursor``. The cursor comes from
+    the client, so anything but a JSON object with an ISO ``t`` and an
+    integer ``k`` is rejected with ValueError.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        time_value, pk_value = payload["t"], payload["k"]
+        if not isinstance(time_value, str):
+            raise ValueError
+        if not isinstance(pk_value, int) or isinstance(pk_value, bool):
+            raise ValueError
+        return _parse_time_bound(time_value, "cursor"), pk_value
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise ValueError("cursor is invalid.")
+
 
 class BaseHandler:
     """
@@ -17,6 +82,73 @@ class BaseHandler:
         """
         raise NotImplementedError("Subclasses must implement handle_request method")
 
+    def time_window(self, request):
+        """See ``parse_time_window``."""
+        return parse_time_window(request)
+
+    def paginate(self, request, queryset, time_field, pk_field):
+        """
+        Apply time-window filters and keyset pagination to a list queryset.
+
+        Query parameters:
+            since: inclusive lower bound on ``time_field`` (ISO date/datetime)
+            until: exclusive upper bound on ``time_field``
+            limit: page size, capped at MAX_PAGE_SIZE
+            cursor: opaque ``next_cursor`` from the previous page
+
+        Pages are ordered newest first on ``(time_field, pk_field)`` and
+        continue strictly after the cursor row, so deep pages cost the same
+        as the first one. When neither ``limit`` nor ``cursor`` is given the
+        full (filtered) list is returned and pagination is None.
+
+        Raises ValueError for malformed parameters.
+
+        Returns:
+            (rows, pagination) where rows is a list
+        """
+        params = request.GET
+
+        since, until = self.time_window(request)
+        if since:
+            queryset = queryset.filter(**{f"{time_field}__gte": since})
+        if until:
+            queryset = queryset.filter(**{f"{time_field}__lt": until})
+
+        limit = params.get("limit")
+        cursor = params.get("cursor")
+        if not limit and not cursor:
+            return list(queryset), None
+
+        try:
+            limit = int(limit) if limit else DEFAULT_PAGE_SIZE
+        except (TypeError, ValueError):
+            raise ValueError("limit must be a positive integer.")
+        if limit <= 0:
+            raise ValueError("limit must be a positive integer.")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+        if cursor:
+            cursor_time, cursor_pk = _decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f"{time_field}__lt": cursor_time})
+                | Q(**{time_field: cursor_time, f"{pk_field}__lt": cursor_pk})
+            )
+
+        rows = list(queryset.order_by(f"-{time_field}", f"-{pk_field}")[: limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = _encode_cursor(last[time_field], last[pk_field])
+
+        return rows, {
+            "limit": limit,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+
 
 class RoleBasedUrlHandler:
     """
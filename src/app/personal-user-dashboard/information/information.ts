@@ -45,6 +45,7 @@ export class Information implements OnInit {
   chargingData: any = null;
   isLoadingCharging: boolean = true;
   chargingError: string = '';
+  chargingSummary: any = null;
 
   // Bill details
   billsData: any[] = [];
@@ -375,6 +376,7 @@ export class Information implements OnInit {
 
   ngOnInit(): void {
     this.loadChargingDetails();
+    this.loadChargingSummary();
     this.loadBillDetails();
     this.loadIssueDetails();
   }
@@ -408,6 +410,20 @@ export class Information implements OnInit {
     });
   }
 
+  loadChargingSummary(): void {
+    // Charging totals over the endpoint's default window (last 30 days).
+    this.apiService.getDailySummary(this.getSelectedVehicleId()).subscribe({
+      next: (response) => {
+        if (response.success && response.data?.totals) {
+          this.chargingSummary = response.data.totals;
+        }
+      },
+      error: (error) => {
+        console.error('Error loading charging summary:', error);
+      },
+    });
+  }
+
   loadBillDetails(): void {
     this.isLoadingBills = true;
     this.billsError = '';
@@ -527,7 +543,9 @@ export class Information implements OnInit {
       },
       error: (error) => {
         console.error('Error deleting issue:', error);
-        alert('Failed to delete issue. Please try again.');
+        alert(
+          error?.error?.message || 'Failed to delete issue. Please try again.',
+        );
       },
     });
   }
@@ -71,12 +71,14 @@ export class Userdashboard implements OnInit {
   pageSize = 5;
   index = 0;
   statistics!: Partial<ChartOptions>;
+  statisticsRange: '24h' | '30d' | '1y' = '24h';
+  totalEnergyConsumed: number = 0;
   isLoading: boolean = true;
   isSwitchingVehicle: boolean = false;
   error: string = '';
 
   constructor(private apiService: ApiService) {
-    this.statistics = this.statisticsChangeFunction([10, 30, 42, 12, 50]);
+    this.statistics = this.statisticsChangeFunction([], []);
   }
 
   ngOnInit(): void {
@@ -176,6 +178,7 @@ export class Userdashboard implements OnInit {
 
             // Now load trip details for the selected vehicle
             this.loadTripDetails();
+            this.loadDailySummary();
           }
 
           this.isLoading = false;
@@ -208,12 +211,16 @@ export class Userdashboard implements OnInit {
       }
     }
 
-    // Get vehicle stats for selected vehicle
-    if (data.vehicle_stats && data.vehicle_stats.length > 0) {
+    // Get the latest stats for selected vehicle: the per-vehicle current
+    // state, falling back to the newest-first history window.
+    const latestStats = data.current_state?.length
+      ? data.current_state
+      : data.vehicle_stats;
+    if (latestStats && latestStats.length > 0) {
       this.vehicleStats =
-        data.vehicle_stats.find(
+        latestStats.find(
           (vs: any) => vs.vehicle_id === this.selectedVehicleId,
-        ) || data.vehicle_stats[0];
+        ) || latestStats[0];
 
       this.batteryHealth = this.vehicleStats.battery_health || 0;
       this.temperature = this.vehicleStats.temperature || 0;
@@ -257,13 +264,41 @@ export class Userdashboard implements OnInit {
 
     // Reload trip details for the selected vehicle
     this.loadTripDetails();
+    this.loadDailySummary();
   }
 
   retryLoadVehicleDetails(): void {
     this.loadVehicleDetails();
   }
 
-  statisticsChangeFunction(data: number[]): Partial<ChartOptions> {
+  loadDailySummary(range: '24h' | '30d' | '1y' = this.statisticsRange): void {
+    this.statisticsRange = range;
+    const days = range === '24h' ? 1 : range === '30d' ? 30 : 365;
+    const since = new Date(Date.now() - days * 24 * 60 * 60 * 1000);
+
+    this.apiService
+      .getDailySummary(this.selectedVehicleId, since.toISOString())
+      .subscribe({
+        next: (response) => {
+          if (response?.success && response.data) {
+            const summary = response.data;
+            this.statistics = this.statisticsChangeFunction(
+              summary.days.map((day: any) => Number(day.energy_used ?? 0)),
+              summary.days.map((day: any) => day.day),
+            );
+            this.totalEnergyConsumed = Number(summary.totals?.energy_used ?? 0);
+          }
+        },
+        error: (error) => {
+          console.error('Error fetching daily summary:', error);
+        },
+      });
+  }
+
+  statisticsChangeFunction(
+    data: number[],
+    categories: string[],
+  ): Partial<ChartOptions> {
     return {
       series: [
         {
@@ -289,7 +324,7 @@ export class Userdashboard implements OnInit {
         align: 'left',
       },
       xaxis: {
-        categories: ['9AM', '11AM', '1PM', '3PM', '5PM', '7PM'],
+        categories: categories,
       },
     };
   }
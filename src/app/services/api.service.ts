@@ -185,6 +185,36 @@ export class ApiService {
     });
   }
 
+  /**
+   * Get per-day trip, charging and battery aggregates
+   * @param vehicleId Optional vehicle ID (defaults to all of the user's vehicles)
+   * @param since Optional inclusive start (ISO date/datetime, default 30 days ago)
+   * @param until Optional exclusive end (ISO date/datetime, default now)
+   * @returns Observable with daily series and totals
+   */
+  getDailySummary(
+    vehicleId?: number,
+    since?: string,
+    until?: string,
+  ): Observable<any> {
+    let params = new HttpParams();
+    if (vehicleId) {
+      params = params.set('vehicle_id', String(vehicleId));
+    }
+    if (since) {
+      params = params.set('since', since);
+    }
+    if (until) {
+      params = params.set('until', until);
+    }
+    return this.http.get(`${this.apiUrl}/dashboard/daily-summary/`, {
+      params,
+      headers: {
+        Authorization: `Bearer ${localStorage.getItem('accessToken')}`,
+      },
+    });
+  }
+
   /**
    * Get service details
    * @returns Observable with service data
@@ -340,6 +370,11 @@ export class ApiService {
       String(includeDetails),
     );
 
+    if (!includeDetails) {
+      // The summary omits the full user/vehicle lists unless asked for.
+      params = params.set('include_scope_options', 'true');
+    }
+
     if (includeDetails && scopeType && scopeId !== undefined) {
       params = params
         .set('scope_type', scopeType)